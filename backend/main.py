@@ -1,21 +1,61 @@
+import asyncio
+import bisect
+import contextvars
+import csv
+import functools
+import hashlib
+import hmac
+import itertools
+import json
+import math
 import os
-from datetime import datetime, timedelta
-from typing import Any, List, Union
+import random
+import secrets
+import select
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple, Union
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
-from sqlalchemy import (create_engine, Column, Integer, String, Float,
-                        DateTime, ForeignKey, func)
+from sqlalchemy import (create_engine, event, BigInteger, Column, Integer, String, Float, Text, DateTime,
+                        SmallInteger, Date, ForeignKey, Index, UniqueConstraint, and_, cast, func, or_, text,
+                        true, update)
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.orm import configure_mappers, sessionmaker, Session, relationship
 from sqlalchemy.sql import case
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
 import base64
+import gzip
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
+import orjson
+
+# Optional encoders: a missing package simply drops that encoding from negotiation.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Optional profiler, imported by enable_profiling() only when PROFILING_ENABLED is set.
+pyinstrument = SpeedscopeRenderer = None
+# Optional columnar engine, imported by enable_columnar_analytics() when ANALYTICS_ENGINE is duckdb.
+duckdb = None
 
 # ===============================================================================
 # 1. SETTINGS AND CONFIGURATION
@@ -23,9 +63,79 @@ from cryptography.hazmat.backends import default_backend
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Comma-separated read replicas for read-only queries ("" reads from the primary)
+    DATABASE_REPLICA_URLS: str = ""
+    # Connection pool sizing per engine (ignored for SQLite)
+    PRIMARY_POOL_SIZE: int = 5
+    PRIMARY_MAX_OVERFLOW: int = 10
+    REPLICA_POOL_SIZE: int = 10
+    REPLICA_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT_SECONDS: float = 10
+    POOL_RECYCLE_SECONDS: int = 1800
+    # After a user writes, their reads go to the primary for this long (replica lag budget)
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    # User-sharded storage: "name=url,..." of the databases holding users' data
+    # ("" keeps everything in DATABASE_URL). DATABASE_URL then serves as the
+    # directory of users and categories. Users are placed by shard name, so a
+    # shard's URL can change without moving anyone.
+    DATABASE_SHARD_URLS: str = ""
+    SHARD_POOL_SIZE: int = 5
+    SHARD_MAX_OVERFLOW: int = 10
+    # Points per shard on the consistent-hash ring
+    SHARD_VIRTUAL_NODES: int = 64
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Response compression, in server preference order ("" disables it)
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    ZSTD_LEVEL: int = 3
+    # Live transaction feed: "memory" (single process) or "postgres" (LISTEN/NOTIFY)
+    CHANGE_FEED: str = "memory"
+    STREAM_KEEPALIVE_SECONDS: int = 15
+    # Monthly transaction partitions (Postgres only); retention 0 keeps everything
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_RETENTION_MONTHS: int = 0
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 24 * 60 * 60
+    # Upper bound on windows per /transactions/metrics/batch request
+    METRICS_BATCH_MAX_WINDOWS: int = 12
+    # Minimum pg_trgm word similarity for a typo-tolerant search match (Postgres only)
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.5
+    # Admission control: concurrent requests per endpoint group ("group=limit,..."),
+    # how long a request may wait for a slot, and the Retry-After sent when shed
+    CONCURRENCY_LIMITS: str = "transactions=8,metrics=4,search=4,snapshot=4"
+    ADMISSION_WAIT_SECONDS: float = 0.05
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    # Per-user token bucket (sustained requests per second, burst size); 0 disables it.
+    # Sized for the dashboard: a load is up to five calls, each filter change two,
+    # and every open tab of the same user draws from one bucket.
+    RATE_LIMIT_PER_SECOND: float = 25.0
+    RATE_LIMIT_BURST: int = 100
+    # statement_timeout for metrics and search queries (Postgres only); 0 disables it
+    ANALYTICS_STATEMENT_TIMEOUT_MS: int = 5000
+    # How often stale dashboard snapshots are rebuilt (0 disables the job), and
+    # how many users are rebuilt per transaction
+    SNAPSHOT_REFRESH_INTERVAL_SECONDS: int = 60
+    SNAPSHOT_REFRESH_BATCH_SIZE: int = 50
+    # Metrics, time-series and distribution queries: "sql", or "duckdb" to serve
+    # them from per-user Parquet exports kept current by a sync job every
+    # ANALYTICS_SYNC_INTERVAL_SECONDS (0 disables it), ANALYTICS_SYNC_BATCH_SIZE
+    # users per pass
+    ANALYTICS_ENGINE: str = "sql"
+    ANALYTICS_PARQUET_DIR: str = "analytics"
+    ANALYTICS_SYNC_INTERVAL_SECONDS: int = 60
+    ANALYTICS_SYNC_BATCH_SIZE: int = 50
+    ANALYTICS_DUCKDB_THREADS: int = 2
+    # Opt-in request profiling (needs pyinstrument). A request is profiled when its
+    # X-Profile-Token header matches PROFILING_TOKEN, or at random with
+    # PROFILING_SAMPLE_RATE; the profile and its SQL go to PROFILING_OUTPUT_DIR.
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    PROFILING_OUTPUT_DIR: str = "profiles"
 
     class Config:
         env_file = ".env"
@@ -36,31 +146,228 @@ settings = Settings()
 # 2. DATABASE SETUP
 # ===============================================================================
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def create_pooled_engine(url: str, pool_size: int, max_overflow: int):
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool class, which takes no sizing arguments.
+        return create_engine(url)
+    return create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+    )
+
+# The primary takes every write; replicas serve read-only sessions.
+engine = create_pooled_engine(settings.DATABASE_URL, settings.PRIMARY_POOL_SIZE, settings.PRIMARY_MAX_OVERFLOW)
+replica_engines = [create_pooled_engine(url.strip(), settings.REPLICA_POOL_SIZE, settings.REPLICA_MAX_OVERFLOW)
+                   for url in settings.DATABASE_REPLICA_URLS.split(',') if url.strip()]
+_next_replica = itertools.cycle(replica_engines)
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica and writes to the primary. The replica is
+    picked round-robin once per session. A session switches to the primary for
+    good once it flushes or executes a bulk INSERT/UPDATE/DELETE, so it reads
+    back its own writes; setting info["use_primary"] does the same up front
+    (read-your-writes stickiness).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (not replica_engines or self.info.get("use_primary") or self._flushing
+                or getattr(clause, "is_dml", False)):
+            self.info["use_primary"] = True
+            return engine
+        if "replica" not in self.info:
+            self.info["replica"] = next(_next_replica)
+        return self.info["replica"]
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# username -> monotonic deadline until which that user's reads stay on the primary.
+_recent_writers: Dict[str, float] = {}
+
+def mark_recent_write(username: str) -> None:
+    if replica_engines:
+        _recent_writers[username] = time.monotonic() + settings.READ_YOUR_WRITES_SECONDS
+
+def wrote_recently(username: str) -> bool:
+    deadline = _recent_writers.get(username)
+    if deadline is None:
+        return False
+    if deadline < time.monotonic():
+        _recent_writers.pop(username, None)
+        return False
+    return True
+
+def parse_shard_urls(spec: str) -> Dict[str, str]:
+    shards = {}
+    for entry in spec.split(','):
+        if entry.strip():
+            name, _, url = entry.partition('=')
+            shards[name.strip()] = url.strip()
+    return shards
+
+def ring_position(key: str) -> int:
+    # A stable hash: Python's hash() of a str differs between processes.
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
+
+class ShardRouter:
+    """
+    Consistent-hash ring over shard names. Each shard owns `virtual_nodes`
+    points on the ring and a user belongs to the shard of the first point at or
+    after the hash of their id, so adding or removing one of N shards only moves
+    the users on the arcs it gains or loses (about 1/N of them).
+    """
+
+    def __init__(self, names: List[str], virtual_nodes: int):
+        points = sorted((ring_position(f"{name}#{i}"), name) for name in names for i in range(virtual_nodes))
+        self.names = list(names)
+        self._positions = [position for position, _ in points]
+        self._owners = [name for _, name in points]
+
+    def shard_for(self, user_id: int) -> str:
+        index = bisect.bisect_left(self._positions, ring_position(str(user_id)))
+        return self._owners[index % len(self._owners)]
+
+# Sharded, each user's transactions, snapshot and a copy of their users row
+# live on one shard; login and category ids stay on the directory (DATABASE_URL).
+shard_engines = {name: create_pooled_engine(url, settings.SHARD_POOL_SIZE, settings.SHARD_MAX_OVERFLOW)
+                 for name, url in parse_shard_urls(settings.DATABASE_SHARD_URLS).items()}
+shard_sessions = {name: sessionmaker(bind=shard_engine, autocommit=False, autoflush=False)
+                  for name, shard_engine in shard_engines.items()}
+shard_router = ShardRouter(list(shard_engines), settings.SHARD_VIRTUAL_NODES) if shard_engines else None
+
+def user_session(user_id: int) -> Session:
+    """A new session on the database that holds the user's data."""
+    if shard_router is None:
+        return SessionLocal()
+    return shard_sessions[shard_router.shard_for(user_id)]()
+
+def data_session_factories() -> list:
+    """Session factories for every database holding user data, for jobs that visit them all."""
+    return list(shard_sessions.values()) or [SessionLocal]
+
+def data_engines() -> list:
+    return list(shard_engines.values()) or [engine]
+
+def maintain_transaction_partitions(db_engine=engine):
+    """Creates upcoming monthly partitions and archives expired ones (see db/init.sql)."""
+    with db_engine.begin() as connection:
+        connection.execute(text("SELECT ensure_transaction_partitions(:months)"),
+                           {"months": settings.PARTITION_MONTHS_AHEAD})
+        if settings.PARTITION_RETENTION_MONTHS > 0:
+            connection.execute(text("SELECT archive_transaction_partitions(:months)"),
+                               {"months": settings.PARTITION_RETENTION_MONTHS})
+
 # ===============================================================================
 # 3. SQLALCHEMY ORM MODELS
 # ===============================================================================
 
+# Amounts are stored as INTEGER (int4) cents, so the API only accepts what fits.
+MIN_AMOUNT = Decimal("-21474836.48")
+MAX_AMOUNT = Decimal("21474836.47")
+
+def to_cents(amount: Decimal) -> int:
+    return int((amount * 100).to_integral_value())
+
+def from_cents(cents: int) -> float:
+    # The double nearest to cents / 100 always prints with at most two decimals.
+    return cents / 100
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     full_name = Column(String)
+    # Bumped by a trigger on every transactions write (see db/init.sql).
+    data_version = Column(Integer, nullable=False, default=0)
     transactions = relationship("Transaction", back_populates="owner")
 
+class Category(Base):
+    # Category names are dictionary-encoded: transactions store the smallint id.
+    __tablename__ = "categories"
+    # SQLite only auto-assigns ids to INTEGER primary keys.
+    id = Column(SmallInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
 class Transaction(Base):
     __tablename__ = "transactions"
-    id = Column(Integer, primary_key=True, index=True)
+    # Covering indexes for the owner/date/category filters in section 6; they
+    # must match db/init.sql (verified by scripts/check_query_plans.py).
+    __table_args__ = (
+        Index("ix_transactions_user_date", "user_id", "transaction_date",
+              postgresql_include=["amount_cents", "category_id"]),
+        Index("ix_transactions_user_category_date", "user_id", "category_id", "transaction_date",
+              postgresql_include=["amount_cents"]),
+        # Trigram index for description search (pg_trgm + btree_gin).
+        Index("ix_transactions_user_description_trgm", "user_id", "description",
+              postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+    )
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    amount = Column(Float, nullable=False)
-    category = Column(String, nullable=False)
+    # Money is stored and aggregated as exact integer cents.
+    amount_cents = Column(Integer, nullable=False)
+    category_id = Column(SmallInteger, ForeignKey("categories.id"), nullable=False)
     description = Column(String)
-    transaction_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    transaction_date = Column(Date, nullable=False, default=lambda: datetime.utcnow().date())
     owner = relationship("User", back_populates="transactions")
+    category_entry = relationship("Category", lazy="joined")
+
+    @property
+    def amount(self) -> float:
+        """Decimal presentation of amount_cents, as exposed by the API."""
+        return from_cents(self.amount_cents)
+
+    @property
+    def category(self) -> str:
+        """Category name, as exposed by the API."""
+        return self.category_entry.name
+
+class DashboardSnapshot(Base):
+    # A user's unfiltered dashboard as compact JSON; current while data_version
+    # matches the user's (see build_dashboard_snapshot).
+    __tablename__ = "dashboard_snapshots"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    data_version = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    computed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class Budget(Base):
+    # A spending cap per week or month, for one category or (category_id None)
+    # overall. spent_cents is the running total of the period starting at
+    # period_start, kept current by a trigger on Postgres (db/init.sql) and by
+    # record_budget_spend elsewhere.
+    __tablename__ = "budgets"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(SmallInteger, ForeignKey("categories.id"))
+    period = Column(String(10), nullable=False)
+    limit_cents = Column(Integer, nullable=False)
+    period_start = Column(Date, nullable=False)
+    spent_cents = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+# One budget per user, category (or overall) and period length; must match db/init.sql.
+Index("ux_budgets_user_category_period", Budget.user_id, func.coalesce(Budget.category_id, 0), Budget.period,
+      unique=True)
+
+class BudgetAlert(Base):
+    # Recorded once per budget and period, when spending first reaches the limit.
+    __tablename__ = "budget_alerts"
+    __table_args__ = (
+        UniqueConstraint("budget_id", "period_start"),
+        Index("ix_budget_alerts_user_triggered", "user_id", "triggered_at"),
+    )
+    id = Column(Integer, primary_key=True)
+    budget_id = Column(Integer, ForeignKey("budgets.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    spent_cents = Column(BigInteger, nullable=False)
+    triggered_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
 # ===============================================================================
 # 4. Pydantic Schemas (Data Validation)
@@ -72,16 +379,34 @@ class TransactionBase(BaseModel):
     description: str | None = None
 
 class TransactionCreate(TransactionBase):
-    pass
+    # Parsed as an exact decimal so it converts to cents without float rounding.
+    amount: Decimal = Field(decimal_places=2, ge=MIN_AMOUNT, le=MAX_AMOUNT)
+    transaction_date: date | None = None
 
 class TransactionSchema(TransactionBase):
     id: int
     user_id: int
-    transaction_date: datetime
+    transaction_date: date
 
     class Config:
         from_attributes = True
 
+class MetricsWindow(BaseModel):
+    start_date: date | None = None
+    end_date: date | None = None
+    categories: List[str] | None = None
+    # Index of another window in the same request to report changes against.
+    compare_to: int | None = None
+
+class MetricsBatchRequest(BaseModel):
+    windows: List[MetricsWindow] = Field(min_length=1, max_length=settings.METRICS_BATCH_MAX_WINDOWS)
+
+class BudgetCreate(BaseModel):
+    # None budgets all spending
+    category: str | None = None
+    period: str = Field(default="month", pattern="^(week|month)$")
+    limit: Decimal = Field(gt=0, decimal_places=2, le=MAX_AMOUNT)
+
 class UserBase(BaseModel):
     username: str
     full_name: str | None = None
@@ -123,12 +448,102 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 # 6. CRUD (Create, Read, Update, Delete) Functions
 # ===============================================================================
 
+# Columns exposed by the transactions endpoint, in TransactionSchema field order.
+TRANSACTION_COLUMNS = (
+    (cast(Transaction.amount_cents, Float) / 100).label("amount"),
+    Category.name.label("category"),
+    Transaction.description,
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.transaction_date,
+)
+
+# The categories table is tiny and only ever grows, so each process keeps the
+# name <-> id mapping in memory and reloads it when it meets an unknown entry.
+# load_categories builds both dicts and swaps them in with one assignment, so
+# readers, which take no lock, never see a half-built mapping.
+_categories: Tuple[Dict[str, int], Dict[int, str]] = ({}, {})
+_categories_loaded_at = float("-inf")
+_category_lock = threading.Lock()
+
+# Unknown names in filters reload the mapping at most this often; a reload
+# cannot find names that were never created.
+CATEGORY_MISS_RELOAD_SECONDS = 5.0
+
+def load_categories(db: Session) -> Tuple[Dict[str, int], Dict[int, str]]:
+    """Reloads the category mapping and returns it as (name -> id, id -> name)."""
+    global _categories, _categories_loaded_at
+    # Sharded, a shard only holds the categories its own rows use; the
+    # directory assigns the ids and has them all.
+    directory = SessionLocal(info={"use_primary": True}) if shard_router else db
+    try:
+        # Reloads run one at a time, so an older result never replaces a newer one.
+        with _category_lock:
+            rows = directory.query(Category.id, Category.name).all()
+            _categories = ({name: id for id, name in rows}, {id: name for id, name in rows})
+            _categories_loaded_at = time.monotonic()
+            return _categories
+    finally:
+        if directory is not db:
+            directory.close()
+
+def get_category_ids(db: Session, names: List[str]) -> List[int]:
+    """Maps category names to ids, skipping names that do not exist."""
+    ids, _ = _categories
+    if (any(name not in ids for name in names)
+            and time.monotonic() - _categories_loaded_at >= CATEGORY_MISS_RELOAD_SECONDS):
+        ids, _ = load_categories(db)
+    return [ids[name] for name in names if name in ids]
+
+def get_category_name(db: Session, category_id: int) -> str:
+    _, names = _categories
+    if category_id not in names:
+        # Ids come from stored rows, so a miss means the mapping is behind.
+        _, names = load_categories(db)
+    return names[category_id]
+
+def add_category(db: Session, name: str, category_id: int | None = None) -> None:
+    try:
+        with db.begin_nested():
+            db.add(Category(id=category_id, name=name))
+    except IntegrityError:
+        # Created concurrently by another request; the caller's reload finds it.
+        pass
+
+# (shard engine, category id) pairs known to exist on that shard.
+_shard_categories: set = set()
+
+def copy_category_to_shard(db: Session, category_id: int, name: str) -> None:
+    """Gives a shard the directory's category row before its transactions reference it."""
+    if (db.bind, category_id) in _shard_categories:
+        return
+    if db.get(Category, category_id) is None:
+        add_category(db, name, category_id)
+    _shard_categories.add((db.bind, category_id))
+
+def get_or_create_category_id(db: Session, name: str) -> int:
+    ids = get_category_ids(db, [name])
+    if not ids:
+        if shard_router:
+            # The directory assigns the id; the shard gets a copy below.
+            with SessionLocal(info={"use_primary": True}) as directory:
+                add_category(directory, name)
+                directory.commit()
+        else:
+            add_category(db, name)
+        ids = [load_categories(db)[0][name]]
+    category_id = ids[0]
+    if shard_router:
+        copy_category_to_shard(db, category_id, name)
+    return category_id
+
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def get_transactions_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100, 
-                             start_date: str = None, end_date: str = None, categories: List[str] = None):
-    query = db.query(Transaction).filter(Transaction.user_id == owner_id)
+def filter_transactions(query, owner_id: int, start_date: date | None = None, end_date: date | None = None,
+                        categories: List[str] = None):
+    """Applies the owner, date and category filters shared by every transaction read."""
+    query = query.filter(Transaction.user_id == owner_id)
     
     # Apply date filters if provided
     if start_date:
@@ -138,40 +553,1155 @@ def get_transactions_by_owner(db: Session, owner_id: int, skip: int = 0, limit:
     
     # Apply category filters if provided
     if categories and len(categories) > 0:
-        query = query.filter(Transaction.category.in_(categories))
+        query = query.filter(Transaction.category_id.in_(get_category_ids(query.session, categories)))
     
+    return query
+
+def get_transactions_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100, 
+                             start_date: date | None = None, end_date: date | None = None,
+                             categories: List[str] = None):
+    # Select plain column tuples rather than ORM entities: the rows go straight
+    # to the JSON encoder, so identity-map bookkeeping would be wasted work.
+    query = db.query(*TRANSACTION_COLUMNS).select_from(Transaction).join(Category)
+    query = filter_transactions(query, owner_id, start_date, end_date, categories)
     return query.offset(skip).limit(limit).all()
 
-def get_metrics_by_owner(db: Session, owner_id: int, start_date: str = None, end_date: str = None, categories: List[str] = None):
-    query = db.query(Transaction).filter(Transaction.user_id == owner_id)
-    
-    # Apply same filters as transactions
-    if start_date:
-        query = query.filter(Transaction.transaction_date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.transaction_date <= end_date)
-    if categories and len(categories) > 0:
-        query = query.filter(Transaction.category.in_(categories))
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def search_transactions_by_owner(db: Session, owner_id: int, q: str, skip: int = 0, limit: int = 100,
+                                 start_date: date | None = None, end_date: date | None = None,
+                                 categories: List[str] = None):
+    """
+    Finds transactions whose description contains `q` (case-insensitive), or on
+    Postgres has a word similar to it, so prefixes and typos match too.
+    Best matches come first, then the most recent.
+    """
+    query = db.query(*TRANSACTION_COLUMNS).select_from(Transaction).join(Category)
+    query = filter_transactions(query, owner_id, start_date, end_date, categories)
+    contains = Transaction.description.ilike(f"%{escape_like(q)}%", escape="\\")
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Both predicates are answered by the trigram GIN index; the threshold
+        # applies to the `%>` operator for the rest of this transaction.
+        db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                   {"threshold": str(settings.SEARCH_SIMILARITY_THRESHOLD)})
+        query = query.filter(or_(contains, Transaction.description.op("%>")(q)))
+        query = query.order_by(func.word_similarity(q, Transaction.description).desc())
+    else:
+        # Portable fallback (SQLite): substring matches only.
+        query = query.filter(contains)
+
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+    return query.offset(skip).limit(limit).all()
+
+def get_metrics_by_owner(db: Session, owner_id: int, start_date: date | None = None, end_date: date | None = None,
+                         categories: List[str] = None):
+    query = filter_transactions(db.query(Transaction), owner_id, start_date, end_date, categories)
     
-    total_spent = query.with_entities(func.sum(Transaction.amount)).scalar() or 0.0
-    average_transaction = query.with_entities(func.avg(Transaction.amount)).scalar() or 0.0
+    # Integer sums only; the average is derived from them rather than computed
+    # with AVG(), which would switch Postgres to numeric arithmetic.
+    transaction_count, total_cents = query.with_entities(
+        func.count(Transaction.id),
+        func.sum(Transaction.amount_cents)
+    ).one()
+    total_cents = total_cents or 0
     
-    spending_by_category = query.group_by(Transaction.category).with_entities(
-        Transaction.category,
-        func.sum(Transaction.amount).label("total")
+    # Group on the smallint id and attach names afterwards.
+    spending_by_category = query.group_by(Transaction.category_id).with_entities(
+        Transaction.category_id,
+        func.sum(Transaction.amount_cents).label("total")
     ).all()
 
+    return summarize_metrics(db, transaction_count, total_cents, dict(spending_by_category))
+
+def summarize_metrics(db: Session, transaction_count: int, total_cents: int, cents_by_category: Dict[int, int]):
+    """Builds the metrics response from integer aggregates."""
     return {
-        "total_spent": total_spent,
-        "average_transaction": average_transaction,
-        "spending_by_category": {cat: total for cat, total in spending_by_category}
+        "transaction_count": transaction_count,
+        "total_spent": from_cents(total_cents),
+        "average_transaction": round(total_cents / transaction_count) / 100 if transaction_count else 0.0,
+        "spending_by_category": {get_category_name(db, category_id): from_cents(total)
+                                 for category_id, total in cents_by_category.items()}
     }
 
+def window_condition(db: Session, window: MetricsWindow):
+    """The date and category predicate selecting one metrics window's rows."""
+    conditions = []
+    if window.start_date:
+        conditions.append(Transaction.transaction_date >= window.start_date)
+    if window.end_date:
+        conditions.append(Transaction.transaction_date <= window.end_date)
+    if window.categories:
+        conditions.append(Transaction.category_id.in_(get_category_ids(db, window.categories)))
+    return and_(true(), *conditions)
+
+def get_metrics_for_windows(db: Session, owner_id: int, windows: List[MetricsWindow]):
+    """
+    Computes the metrics of several windows in one statement: a single pass over
+    the union of the windows, grouped by category, with one conditional
+    count/sum pair per window. Overlapping windows do not rescan rows.
+    """
+    columns = []
+    for window in windows:
+        condition = window_condition(db, window)
+        columns.append(func.count(case((condition, 1))))
+        columns.append(func.sum(case((condition, Transaction.amount_cents))))
+
+    # Bound the scan by the union of the windows so partitions can be pruned.
+    starts = [window.start_date for window in windows]
+    ends = [window.end_date for window in windows]
+    categories = [window.categories for window in windows]
+    outer = MetricsWindow(
+        start_date=min(starts) if all(starts) else None,
+        end_date=max(ends) if all(ends) else None,
+        categories=sorted(set().union(*categories)) if all(categories) else None,
+    )
+    rows = (db.query(Transaction.category_id, *columns)
+            .filter(Transaction.user_id == owner_id, window_condition(db, outer))
+            .group_by(Transaction.category_id)
+            .all())
+
+    results = []
+    for index in range(len(windows)):
+        counts = {row[0]: row[1 + 2 * index] for row in rows}
+        cents = {row[0]: row[2 + 2 * index] for row in rows if counts[row[0]]}
+        results.append(summarize_metrics(db, sum(counts.values()), sum(cents.values()), cents))
+    return results
+
+# Metrics compared between windows of a batch request.
+COMPARED_METRICS = ("transaction_count", "total_spent", "average_transaction")
+
+def compare_metrics(current: dict, baseline: dict) -> dict:
+    """Absolute and percentage change of each compared metric from baseline to current."""
+    change = {}
+    for name in COMPARED_METRICS:
+        delta = current[name] - baseline[name]
+        change[name] = {
+            "delta": round(delta, 2),
+            "percent_change": round(delta / baseline[name] * 100, 1) if baseline[name] else None,
+        }
+    return change
+
+# Time-series buckets, as accepted by date_trunc; weeks start on Monday.
+TIMESERIES_INTERVALS = ("day", "week", "month")
+DISTRIBUTION_PERCENTILES = (0.5, 0.9, 0.99)
+
+def period_start(db: Session, interval: str):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc(interval, Transaction.transaction_date), Date)
+    # SQLite: date modifiers; 'weekday 1' moves forward to the next Monday.
+    if interval == "week":
+        return func.date(Transaction.transaction_date, "-6 days", "weekday 1")
+    if interval == "month":
+        return func.date(Transaction.transaction_date, "start of month")
+    return Transaction.transaction_date
+
+def summarize_timeseries(interval: str, rows) -> dict:
+    """Builds the time-series response from (period start, count, cents) rows in period order."""
+    return {
+        "interval": interval,
+        "points": [{"period": str(period)[:10], "transaction_count": count, "total_spent": from_cents(cents)}
+                   for period, count, cents in rows],
+    }
+
+def get_spending_timeseries(db: Session, owner_id: int, interval: str = "month", start_date: date | None = None,
+                            end_date: date | None = None, categories: List[str] = None):
+    """Count and total of the user's spending per day, week or month; periods without spending are omitted."""
+    period = period_start(db, interval).label("period")
+    query = filter_transactions(db.query(period, func.count(Transaction.id), func.sum(Transaction.amount_cents)),
+                                owner_id, start_date, end_date, categories)
+    return summarize_timeseries(interval, query.group_by(period).order_by(period).all())
+
+def get_daily_totals(db: Session, owner_id: int, start_date: date | None = None, end_date: date | None = None,
+                     categories: List[str] = None) -> dict:
+    """
+    Each category's total per day, the data every dashboard chart is drawn
+    from. Columnar to keep the payload small: one entry per (day, category).
+    """
+    rows = (filter_transactions(db.query(Transaction.transaction_date, Transaction.category_id,
+                                         func.sum(Transaction.amount_cents)),
+                                owner_id, start_date, end_date, categories)
+            .group_by(Transaction.transaction_date, Transaction.category_id)
+            .order_by(Transaction.transaction_date, Transaction.category_id)
+            .all())
+    return {
+        "transaction_date": [day for day, _, _ in rows],
+        "category": [get_category_name(db, category_id) for _, category_id, _ in rows],
+        "amount": [from_cents(cents) for _, _, cents in rows],
+    }
+
+def summarize_distribution(transaction_count: int, low: int, high: int, percentiles: List[int],
+                           bucket_counts: Dict[int, int], bins: int) -> dict:
+    """
+    Builds the distribution response from integer cents. Bucket i of the
+    histogram holds amounts with (amount - low) * bins // (high - low + 1) == i,
+    so the buckets split [low, high] into `bins` equal ranges.
+    """
+    if not transaction_count:
+        return {"transaction_count": 0, "min": None, "max": None, "percentiles": {}, "histogram": []}
+    # Smallest amount of each bucket (ceil of index * span / bins), plus one past the last.
+    span = high - low + 1
+    edges = [low + -(-index * span // bins) for index in range(bins + 1)]
+    return {
+        "transaction_count": transaction_count,
+        "min": from_cents(low),
+        "max": from_cents(high),
+        "percentiles": {f"p{round(p * 100)}": from_cents(cents)
+                        for p, cents in zip(DISTRIBUTION_PERCENTILES, percentiles)},
+        "histogram": [{"lower": from_cents(edges[index]), "upper": from_cents(edges[index + 1] - 1),
+                       "count": bucket_counts.get(index, 0)}
+                      for index in range(bins)],
+    }
+
+def get_amount_distribution(db: Session, owner_id: int, bins: int = 10, start_date: date | None = None,
+                            end_date: date | None = None, categories: List[str] = None):
+    """Min, max, nearest-rank percentiles and an equal-width histogram of the user's transaction amounts."""
+    query = filter_transactions(db.query(Transaction), owner_id, start_date, end_date, categories)
+    transaction_count, low, high = query.with_entities(
+        func.count(Transaction.id), func.min(Transaction.amount_cents), func.max(Transaction.amount_cents)
+    ).one()
+    if not transaction_count:
+        return summarize_distribution(0, 0, 0, [], {}, bins)
+
+    if db.get_bind().dialect.name == "postgresql":
+        percentiles = list(query.with_entities(*[
+            func.percentile_disc(p).within_group(Transaction.amount_cents) for p in DISTRIBUTION_PERCENTILES
+        ]).one())
+    else:
+        # Nearest rank: the ceil(p * n)-th smallest amount.
+        percentiles = [query.with_entities(Transaction.amount_cents).order_by(Transaction.amount_cents)
+                       .offset(max(math.ceil(p * transaction_count) - 1, 0)).limit(1).scalar()
+                       for p in DISTRIBUTION_PERCENTILES]
+
+    bucket = (cast(Transaction.amount_cents - low, BigInteger) * bins // (high - low + 1)).label("bucket")
+    bucket_counts = dict(query.with_entities(bucket, func.count(Transaction.id)).group_by(bucket).all())
+    return summarize_distribution(transaction_count, low, high, percentiles, bucket_counts, bins)
+
+def create_transaction(db: Session, owner_id: int, transaction: TransactionCreate):
+    fields = transaction.model_dump(exclude_none=True, exclude={"amount", "category"})
+    db_transaction = Transaction(**fields, amount_cents=to_cents(transaction.amount),
+                                 category_id=get_or_create_category_id(db, transaction.category),
+                                 user_id=owner_id)
+    db.add(db_transaction)
+    db.flush()
+    if db.get_bind().dialect.name != "postgresql":
+        # On Postgres a trigger bumps the version (db/init.sql); elsewhere the API does.
+        db.execute(update(User).where(User.id == owner_id).values(data_version=User.data_version + 1)
+                   .execution_options(synchronize_session=False))
+    if db.get_bind().dialect.name != "postgresql":
+        # On Postgres a trigger updates the budget totals (db/init.sql). Either way it
+        # happens in the same transaction as the insert, so the totals never drift from the rows.
+        record_budget_spend(db, db_transaction)
+    db.commit()
+    db.refresh(db_transaction)
+    return db_transaction
+
+def budget_period_bounds(day: date, period: str):
+    """First and last day of the week (from Monday) or month containing `day`."""
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+def add_budget_alert(db: Session, budget: Budget, period_start: date, spent_cents: int) -> None:
+    try:
+        with db.begin_nested():
+            db.add(BudgetAlert(budget_id=budget.id, user_id=budget.user_id,
+                               period_start=period_start, spent_cents=spent_cents))
+    except IntegrityError:
+        # Already alerted this period (spending dipped below the limit and crossed it again).
+        pass
+
+def record_budget_spend(db: Session, transaction: Transaction) -> None:
+    """
+    Adds a new transaction to the running totals of the owner's budgets that
+    cover it, and records an alert for each budget it takes to its limit. The
+    cost is one indexed lookup of the user's budgets plus one single-row update
+    per matching budget, however long the history. Only the current period is
+    tracked, so transactions dated in another period leave the totals alone.
+    On Postgres the apply_budget_spend trigger does this instead.
+    """
+    budgets = (db.query(Budget)
+               .filter(Budget.user_id == transaction.user_id,
+                       or_(Budget.category_id.is_(None), Budget.category_id == transaction.category_id))
+               .all())
+    today = datetime.utcnow().date()
+    for budget in budgets:
+        start, end = budget_period_bounds(today, budget.period)
+        if not start <= transaction.transaction_date <= end:
+            continue
+        # One atomic statement: restart the total if the period rolled over, then add.
+        # Concurrent writers serialize on the row, so exactly one sees the limit crossed.
+        spent = db.execute(
+            update(Budget)
+            .where(Budget.id == budget.id)
+            .values(spent_cents=case((Budget.period_start < start, 0), else_=Budget.spent_cents)
+                    + transaction.amount_cents,
+                    period_start=start)
+            .returning(Budget.spent_cents)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        if spent - transaction.amount_cents < budget.limit_cents <= spent:
+            add_budget_alert(db, budget, start, spent)
+
+def create_budget(db: Session, owner_id: int, budget: BudgetCreate) -> Budget:
+    """
+    Creates a budget whose running total starts from the current period's
+    transactions (one aggregate over the user/date index); from then on
+    new transactions keep it current.
+    Raises:
+        IntegrityError: The user already has a budget for this category and period.
+    """
+    category_id = get_or_create_category_id(db, budget.category) if budget.category else None
+    start, end = budget_period_bounds(datetime.utcnow().date(), budget.period)
+    query = db.query(func.sum(Transaction.amount_cents)).filter(
+        Transaction.user_id == owner_id, Transaction.transaction_date.between(start, end))
+    if category_id is not None:
+        query = query.filter(Transaction.category_id == category_id)
+    db_budget = Budget(user_id=owner_id, category_id=category_id, period=budget.period,
+                       limit_cents=to_cents(budget.limit), period_start=start, spent_cents=query.scalar() or 0)
+    db.add(db_budget)
+    db.flush()
+    if db_budget.spent_cents >= db_budget.limit_cents:
+        add_budget_alert(db, db_budget, start, db_budget.spent_cents)
+    db.commit()
+    db.refresh(db_budget)
+    return db_budget
+
+def summarize_budget(db: Session, budget: Budget, today: date) -> dict:
+    start, end = budget_period_bounds(today, budget.period)
+    # No transaction yet in this period: the stored total is the previous period's.
+    spent_cents = budget.spent_cents if budget.period_start == start else 0
+    return {
+        "id": budget.id,
+        "category": get_category_name(db, budget.category_id) if budget.category_id is not None else None,
+        "period": budget.period,
+        "period_start": start,
+        "period_end": end,
+        "limit": from_cents(budget.limit_cents),
+        "spent": from_cents(spent_cents),
+        "remaining": from_cents(budget.limit_cents - spent_cents),
+        "percent_used": round(spent_cents / budget.limit_cents * 100, 1),
+    }
+
+def get_budget_progress(db: Session, owner_id: int) -> List[dict]:
+    """Each of the user's budgets with its spending in the current period, read from the running totals."""
+    budgets = (db.query(Budget).filter(Budget.user_id == owner_id)
+               .order_by(Budget.period, Budget.category_id.nullsfirst()).all())
+    today = datetime.utcnow().date()
+    return [summarize_budget(db, budget, today) for budget in budgets]
+
+def get_budget_alerts(db: Session, owner_id: int, since: datetime | None = None, limit: int = 20) -> List[dict]:
+    """The user's triggered alerts, newest first."""
+    query = (db.query(BudgetAlert, Budget).join(Budget, Budget.id == BudgetAlert.budget_id)
+             .filter(BudgetAlert.user_id == owner_id))
+    if since:
+        query = query.filter(BudgetAlert.triggered_at > since)
+    rows = query.order_by(BudgetAlert.triggered_at.desc(), BudgetAlert.id.desc()).limit(limit).all()
+    return [{
+        "id": alert.id,
+        "budget_id": budget.id,
+        "category": get_category_name(db, budget.category_id) if budget.category_id is not None else None,
+        "period": budget.period,
+        "period_start": alert.period_start,
+        "limit": from_cents(budget.limit_cents),
+        "spent": from_cents(alert.spent_cents),
+        "triggered_at": alert.triggered_at,
+    } for alert, budget in rows]
+
+def build_dashboard_snapshot(db: Session, user: User) -> bytes:
+    """
+    Computes the user's unfiltered dashboard as compact JSON: the metrics, the
+    per-day totals of each category (enough to draw every chart), and the
+    bounds for the filter widgets. It is labelled with the data_version read
+    before the queries ran, so a concurrent write leaves it stale, never
+    wrongly current.
+    """
+    data_version = user.data_version
+    metrics = get_metrics_by_owner(db, owner_id=user.id)
+    daily = get_daily_totals(db, owner_id=user.id)
+    days = daily["transaction_date"]
+    return orjson.dumps({
+        "data_version": data_version,
+        "user": {"username": user.username, "full_name": user.full_name},
+        "metrics": metrics,
+        "daily": daily,
+        "bounds": {
+            "start_date": days[0] if days else None,
+            "end_date": days[-1] if days else None,
+            "categories": sorted(metrics["spending_by_category"]),
+        },
+    })
+
+def refresh_dashboard_snapshots(db: Session, limit: int) -> int:
+    """
+    Rebuilds up to `limit` snapshots that are missing or older than their
+    user's data_version, committing after each one.
+    Returns:
+        The number of users whose snapshot was rebuilt.
+    """
+    stale = (db.query(User)
+             .outerjoin(DashboardSnapshot, DashboardSnapshot.user_id == User.id)
+             .filter(or_(DashboardSnapshot.user_id.is_(None), DashboardSnapshot.data_version != User.data_version))
+             .order_by(User.id)
+             .limit(limit)
+             .all())
+    for user in stale:
+        data_version = user.data_version
+        payload = build_dashboard_snapshot(db, user)
+        db.merge(DashboardSnapshot(user_id=user.id, data_version=data_version,
+                                   payload=payload.decode(), computed_at=datetime.utcnow()))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker inserted this user's first snapshot meanwhile
+            db.rollback()
+    return len(stale)
+
+# ===============================================================================
+# 7. HTTP CONDITIONAL REQUESTS (ETags)
+# ===============================================================================
+
+# Clients may keep a copy but must revalidate it on every use.
+CACHE_CONTROL = "private, no-cache"
+
+def parse_categories(categories: str | None) -> List[str] | None:
+    """Parses a comma-separated category filter into a sorted, de-duplicated list."""
+    if not categories:
+        return None
+    return sorted({cat.strip() for cat in categories.split(',') if cat.strip()}) or None
+
+def compute_etag(scope: str, user: User, **filters) -> str:
+    """
+    Derives a weak ETag from the user's data version and the normalized filter.
+    Weak because the same representation may be sent with different encodings.
+    """
+    normalized = json.dumps(filters, sort_keys=True, default=str)
+    key = f"{scope}:{user.id}:{user.data_version}:{normalized}"
+    return f'W/"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Weak comparison of the request's If-None-Match header against `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+
+# ===============================================================================
+# 8. RESPONSE COMPRESSION
+# ===============================================================================
+
+# Bodies larger than this are compressed off the event loop.
+THREADED_COMPRESSION_SIZE = 256 * 1024
+
+def build_encoders(names: str) -> dict:
+    """Maps each configured and installed encoding to a bytes -> bytes compressor."""
+    available = {"gzip": lambda body: gzip.compress(body, compresslevel=settings.GZIP_LEVEL)}
+    if brotli is not None:
+        available["br"] = lambda body: brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    if zstandard is not None:
+        available["zstd"] = lambda body: zstandard.ZstdCompressor(level=settings.ZSTD_LEVEL).compress(body)
+    encoders = {}
+    for name in (n.strip() for n in names.split(',')):
+        if name in available:
+            encoders[name] = available[name]
+    return encoders
+
+def negotiate_encoding(accept_encoding: str, encoders: dict) -> str | None:
+    """Picks the first server-preferred encoding the client accepts with q > 0."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    for name in encoders:
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+def is_compressible(content_type: str) -> bool:
+    return (content_type.startswith(("application/json", "text/"))
+            and not content_type.startswith("text/event-stream"))
+
+class CompressionMiddleware:
+    """
+    Compresses single-chunk responses above `minimum_size` using the negotiated
+    encoding. Streaming responses are passed through untouched.
+    """
+
+    def __init__(self, app, encoders: dict, minimum_size: int):
+        self.app = app
+        self.encoders = encoders
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encoders:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encoders)
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if is_compressible(Headers(raw=message["headers"]).get("content-type", "")):
+                    start_message = message
+                else:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            headers.add_vary_header("Accept-Encoding")
+            if (encoding is None or message.get("more_body", False)
+                    or len(body) < self.minimum_size or "content-encoding" in headers):
+                await send(start)
+                await send(message)
+                return
+
+            compress = self.encoders[encoding]
+            if len(body) >= THREADED_COMPRESSION_SIZE:
+                body = await run_in_threadpool(compress, body)
+            else:
+                body = compress(body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+# ===============================================================================
+# 9. ADMISSION CONTROL
+# ===============================================================================
+
+def service_unavailable(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+class ConcurrencyLimit:
+    """
+    Dependency capping the number of in-flight requests of one endpoint group.
+    A request waits at most ADMISSION_WAIT_SECONDS for a slot, then gets a 503,
+    so a spike is shed instead of queueing on database connections.
+    """
+
+    def __init__(self, group: str, limit: int):
+        self.group = group
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self):
+        if self.semaphore.locked():
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), settings.ADMISSION_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                raise service_unavailable(f"Too many concurrent {self.group} requests")
+        else:
+            await self.semaphore.acquire()
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+def parse_concurrency_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in (part.strip() for part in spec.split(',')):
+        if item:
+            group, _, limit = item.partition('=')
+            limits[group.strip()] = int(limit)
+    return limits
+
+concurrency_limits = {group: ConcurrencyLimit(group, limit)
+                      for group, limit in parse_concurrency_limits(settings.CONCURRENCY_LIMITS).items()}
+
+async def unlimited():
+    return None
+
+def limit_concurrency(group: str):
+    """The concurrency dependency for an endpoint group; groups not configured are unlimited."""
+    return concurrency_limits.get(group, unlimited)
+
+class TokenBucketLimiter:
+    """Per-key token buckets holding up to `burst` tokens, refilled at `rate` per second."""
+
+    # Idle buckets are refilled (i.e. forgotten) once this many keys are tracked.
+    MAX_KEYS = 10_000
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Takes `cost` tokens from `key`'s bucket. Returns 0 on success, otherwise
+        the seconds until enough tokens will have accumulated."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                full_after = self.burst / self.rate
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+            return (cost - tokens) / self.rate
+
+rate_limiter = (TokenBucketLimiter(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+                if settings.RATE_LIMIT_PER_SECOND > 0 else None)
+
+async def rate_limit(request: Request):
+    """
+    Applies the per-user token bucket, keyed by the bearer token's subject so
+    throttled requests are rejected before any database work. Requests without
+    a valid token pass through to the normal authentication error.
+    """
+    if rate_limiter is None:
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return
+    try:
+        username = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+    except JWTError:
+        return
+    if username is None:
+        return
+    retry_after = rate_limiter.acquire(username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+# ===============================================================================
+# 10. CHANGE FEED (live transaction push)
+# ===============================================================================
+
+# Events buffered per subscriber before it is told to resync instead.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+class TransactionEventBus:
+    """
+    In-process fan-out of transaction events to per-user subscriber queues.
+    publish() is thread-safe: it hands each event to the subscriber's own loop.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[int, dict[asyncio.Queue, asyncio.AbstractEventLoop]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The subscriber fell behind: drop its backlog and ask it to refetch.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync", "data": {}})
+
+transaction_events = TransactionEventBus()
+
+def listen_for_transaction_notifications(stop: threading.Event, db_engine=engine):
+    """
+    Forwards NOTIFY payloads from the 'transactions' channel (see db/init.sql)
+    to the event bus, so writes from any process or loader reach subscribers.
+    """
+    while not stop.is_set():
+        connection = None
+        try:
+            cargs, cparams = db_engine.dialect.create_connect_args(db_engine.url)
+            connection = db_engine.dialect.connect(*cargs, **cparams)
+            connection.autocommit = True
+            connection.cursor().execute("LISTEN transactions")
+            while not stop.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    row = json.loads(connection.notifies.pop(0).payload)
+                    transaction_events.publish(row["user_id"], {"type": "transaction", "data": row})
+        except Exception as e:
+            print(f"Transaction listener error, reconnecting: {e}")
+            stop.wait(5)
+        finally:
+            if connection is not None:
+                connection.close()
+
+async def run_partition_maintenance(engines: list):
+    while True:
+        for db_engine in engines:
+            try:
+                await run_in_threadpool(maintain_transaction_partitions, db_engine)
+            except Exception as e:
+                print(f"Partition maintenance failed on {db_engine.url.database}: {e}")
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+def refresh_stale_snapshots() -> int:
+    rebuilt = 0
+    for session_factory in data_session_factories():
+        # The job writes, so it reads the snapshot state from the primary too
+        db = session_factory(info={"use_primary": True})
+        try:
+            while True:
+                count = refresh_dashboard_snapshots(db, settings.SNAPSHOT_REFRESH_BATCH_SIZE)
+                rebuilt += count
+                if count < settings.SNAPSHOT_REFRESH_BATCH_SIZE:
+                    break
+        finally:
+            db.close()
+    return rebuilt
+
+async def run_snapshot_refresh():
+    while True:
+        try:
+            await run_in_threadpool(refresh_stale_snapshots)
+        except Exception as e:
+            print(f"Dashboard snapshot refresh failed: {e}")
+        await asyncio.sleep(settings.SNAPSHOT_REFRESH_INTERVAL_SECONDS)
+
+def warm_up():
+    """
+    Does the one-off work the first request would otherwise pay for: configuring
+    the ORM mappers, opening a pooled connection per engine and loading the
+    category cache.
+    """
+    configure_mappers()
+    for db_engine in [engine, *replica_engines, *shard_engines.values()]:
+        with db_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    db = SessionLocal()
+    try:
+        load_categories(db)
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await run_in_threadpool(warm_up)
+    except Exception as e:
+        # The API still starts; the first requests do this work instead.
+        print(f"Warm-up failed: {e}")
+    stop_listener = threading.Event()
+    if settings.CHANGE_FEED == "postgres":
+        for db_engine in data_engines():
+            threading.Thread(target=listen_for_transaction_notifications, args=(stop_listener, db_engine),
+                             name="transaction-listener", daemon=True).start()
+    background = []
+    # The directory keeps the partitioned schema too, so seed data can be loaded before sharding.
+    partitioned = [db_engine for db_engine in dict.fromkeys([engine, *data_engines()])
+                   if db_engine.dialect.name == "postgresql"]
+    if partitioned:
+        background.append(asyncio.create_task(run_partition_maintenance(partitioned)))
+    if settings.SNAPSHOT_REFRESH_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_snapshot_refresh()))
+    if analytics_connection is not None and settings.ANALYTICS_SYNC_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_analytics_sync()))
+    yield
+    stop_listener.set()
+    for task in background:
+        task.cancel()
+
 # ===============================================================================
-# 7. FASTAPI APP AND DEPENDENCIES
+# 11. COLUMNAR ANALYTICS (optional DuckDB)
 # ===============================================================================
+# With ANALYTICS_ENGINE=duckdb, each user's transactions are exported to a
+# Parquet file named after their data_version, and the metrics, time-series
+# and distribution endpoints aggregate that file with an embedded DuckDB
+# instead of scanning rows in the database. A user without a current file
+# (new writes since the last sync) is answered by the SQL queries meanwhile.
+
+# The embedded engine, set by enable_columnar_analytics(); queries use a cursor each.
+analytics_connection = None
+
+def export_path(user_id: int, data_version: int) -> str:
+    return os.path.join(settings.ANALYTICS_PARQUET_DIR, f"user_{user_id}_v{data_version}.parquet")
+
+def current_export(user: User) -> str | None:
+    """The user's Parquet export if it is current, else None (or when the mode is off)."""
+    if analytics_connection is None:
+        return None
+    path = export_path(user.id, user.data_version)
+    return path if os.path.exists(path) else None
+
+def exported_versions() -> Dict[int, int]:
+    """user id -> data_version of each export on disk."""
+    versions = {}
+    for name in os.listdir(settings.ANALYTICS_PARQUET_DIR):
+        if name.startswith("user_") and name.endswith(".parquet"):
+            user_id, _, version = name[len("user_"):-len(".parquet")].partition("_v")
+            versions[int(user_id)] = max(int(version), versions.get(int(user_id), -1))
+    return versions
+
+def export_user_transactions(db: Session, user_id: int, data_version: int) -> None:
+    """
+    Writes the user's transactions to their Parquet export for `data_version`
+    and removes older exports. Rows are sorted by date so the row-group
+    statistics let date filters skip most of the file.
+    """
+    stem = os.path.join(settings.ANALYTICS_PARQUET_DIR, f".export_{user_id}_{secrets.token_hex(4)}")
+    rows = (db.query(Transaction.transaction_date, Transaction.category_id, Transaction.amount_cents)
+            .filter(Transaction.user_id == user_id)
+            .execution_options(yield_per=10000))
+    try:
+        with open(f"{stem}.csv", "w", newline="") as staging:
+            writer = csv.writer(staging)
+            for row in rows:
+                writer.writerow(row)
+        with analytics_connection.cursor() as cursor:
+            cursor.execute(f"""
+                COPY (SELECT * FROM read_csv('{stem}.csv', header = false, delim = ',', auto_detect = false, columns = {{
+                          'transaction_date': 'DATE', 'category_id': 'SMALLINT', 'amount_cents': 'INTEGER'}})
+                      ORDER BY transaction_date)
+                TO '{stem}.parquet' (FORMAT parquet, COMPRESSION zstd)
+            """)
+        os.replace(f"{stem}.parquet", export_path(user_id, data_version))
+    finally:
+        for leftover in (f"{stem}.csv", f"{stem}.parquet"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    for name in os.listdir(settings.ANALYTICS_PARQUET_DIR):
+        if name.startswith(f"user_{user_id}_v") and name != os.path.basename(export_path(user_id, data_version)):
+            os.remove(os.path.join(settings.ANALYTICS_PARQUET_DIR, name))
+
+def sync_analytics_exports(db: Session, limit: int) -> int:
+    """
+    Exports up to `limit` users whose Parquet file is missing or older than
+    their data_version. Like the snapshots, the version is read before the rows,
+    so a concurrent write leaves the file stale, never wrongly current.
+    Returns:
+        The number of users exported.
+    """
+    exported = exported_versions()
+    stale = [(user_id, data_version)
+             for user_id, data_version in db.query(User.id, User.data_version).order_by(User.id)
+             if exported.get(user_id) != data_version][:limit]
+    for user_id, data_version in stale:
+        export_user_transactions(db, user_id, data_version)
+        # End the read transaction between users rather than hold one for the batch.
+        db.rollback()
+    return len(stale)
 
-app = FastAPI(title="Analytics Dashboard API")
+def sync_stale_exports() -> int:
+    synced = 0
+    for session_factory in data_session_factories():
+        db = session_factory(info={"use_primary": True})
+        try:
+            while True:
+                count = sync_analytics_exports(db, settings.ANALYTICS_SYNC_BATCH_SIZE)
+                synced += count
+                if count < settings.ANALYTICS_SYNC_BATCH_SIZE:
+                    break
+        finally:
+            db.close()
+    return synced
+
+async def run_analytics_sync():
+    while True:
+        try:
+            await run_in_threadpool(sync_stale_exports)
+        except Exception as e:
+            print(f"Analytics export sync failed: {e}")
+        await asyncio.sleep(settings.ANALYTICS_SYNC_INTERVAL_SECONDS)
+
+def parquet_filter(db: Session, start_date: date | None, end_date: date | None,
+                   categories: List[str] | None):
+    """The WHERE clause and parameters matching filter_transactions() on an export."""
+    conditions, parameters = ["true"], []
+    if start_date:
+        conditions.append("transaction_date >= ?")
+        parameters.append(start_date)
+    if end_date:
+        conditions.append("transaction_date <= ?")
+        parameters.append(end_date)
+    if categories:
+        conditions.append("list_contains(?, category_id)")
+        parameters.append(get_category_ids(db, categories))
+    return " AND ".join(conditions), parameters
+
+def columnar_metrics(db: Session, path: str, start_date: date | None = None, end_date: date | None = None,
+                     categories: List[str] = None):
+    """get_metrics_by_owner() over the user's Parquet export."""
+    where, parameters = parquet_filter(db, start_date, end_date, categories)
+    with analytics_connection.cursor() as cursor:
+        rows = cursor.execute(f"""
+            SELECT category_id, count(*), sum(amount_cents) FROM read_parquet(?)
+            WHERE {where} GROUP BY category_id
+        """, [path, *parameters]).fetchall()
+    return summarize_metrics(db, sum(count for _, count, _ in rows), sum(int(cents) for _, _, cents in rows),
+                             {category_id: int(cents) for category_id, _, cents in rows})
+
+def columnar_timeseries(db: Session, path: str, interval: str = "month", start_date: date | None = None,
+                        end_date: date | None = None, categories: List[str] = None):
+    """get_spending_timeseries() over the user's Parquet export."""
+    where, parameters = parquet_filter(db, start_date, end_date, categories)
+    with analytics_connection.cursor() as cursor:
+        rows = cursor.execute(f"""
+            SELECT date_trunc(?, transaction_date) AS period, count(*), sum(amount_cents)::BIGINT
+            FROM read_parquet(?) WHERE {where} GROUP BY period ORDER BY period
+        """, [interval, path, *parameters]).fetchall()
+    return summarize_timeseries(interval, rows)
+
+def columnar_distribution(db: Session, path: str, bins: int = 10, start_date: date | None = None,
+                          end_date: date | None = None, categories: List[str] = None):
+    """get_amount_distribution() over the user's Parquet export."""
+    where, parameters = parquet_filter(db, start_date, end_date, categories)
+    with analytics_connection.cursor() as cursor:
+        # quantile_disc is the nearest-rank percentile, as in the SQL version.
+        transaction_count, low, high, percentiles = cursor.execute(f"""
+            SELECT count(*), min(amount_cents), max(amount_cents), quantile_disc(amount_cents, ?)
+            FROM read_parquet(?) WHERE {where}
+        """, [list(DISTRIBUTION_PERCENTILES), path, *parameters]).fetchone()
+        if not transaction_count:
+            return summarize_distribution(0, 0, 0, [], {}, bins)
+        bucket_counts = dict(cursor.execute(f"""
+            SELECT (amount_cents - ?)::BIGINT * ? // ? AS bucket, count(*)
+            FROM read_parquet(?) WHERE {where} GROUP BY bucket
+        """, [low, bins, high - low + 1, path, *parameters]).fetchall())
+    return summarize_distribution(transaction_count, low, high, percentiles, bucket_counts, bins)
+
+def enable_columnar_analytics() -> None:
+    """Starts the embedded engine; without it every query runs in SQL."""
+    global duckdb, analytics_connection
+    try:
+        import duckdb
+    except ImportError:
+        print("ANALYTICS_ENGINE is duckdb but duckdb is not installed; using SQL analytics")
+        return
+    os.makedirs(settings.ANALYTICS_PARQUET_DIR, exist_ok=True)
+    analytics_connection = duckdb.connect(config={"threads": settings.ANALYTICS_DUCKDB_THREADS})
+
+# ===============================================================================
+# 12. REQUEST PROFILING (opt-in)
+# ===============================================================================
+
+# The profile being collected for the current request, if any. Context variables
+# follow the request into the threadpool, so sync endpoints and SQL events see it.
+current_profile: contextvars.ContextVar["RequestProfile | None"] = contextvars.ContextVar("current_profile", default=None)
+
+# Long-lived responses a profiler would have to follow for the whole connection.
+UNPROFILED_PATHS = {"/api/v1/transactions/stream"}
+
+def should_profile(path: str, headers: Headers) -> bool:
+    """A request is profiled when it carries the profiling token or is sampled."""
+    if path in UNPROFILED_PATHS:
+        return False
+    token = headers.get("x-profile-token")
+    if token and settings.PROFILING_TOKEN and hmac.compare_digest(token, settings.PROFILING_TOKEN):
+        return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+class RequestProfile:
+    """
+    Stack samples and SQL statements collected for one request. pyinstrument samples
+    one thread per profiler, so the event loop and the endpoint's worker thread
+    each get their own profile; both land in one speedscope file.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+        self.method = method
+        self.path = path
+        self.sessions = []
+        self.statements = []
+        self.lock = threading.Lock()
+
+    def profiler(self, async_mode: str):
+        return pyinstrument.Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode=async_mode)
+
+    def add_session(self, label: str, session) -> None:
+        with self.lock:
+            self.sessions.append((label, session))
+
+    def add_statement(self, statement: str, parameters, duration_ms: float) -> None:
+        with self.lock:
+            self.statements.append({"statement": statement, "parameters": repr(parameters)[:500],
+                                    "duration_ms": round(duration_ms, 3)})
+
+    def write(self, status_code: int, duration_ms: float) -> str:
+        """Writes <id>.speedscope.json and <id>.sql.json; returns the id."""
+        os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+        base = os.path.join(settings.PROFILING_OUTPUT_DIR, self.id)
+
+        # Merge the per-thread profiles, offsetting each one's frame indices.
+        speedscope = None
+        for label, session in self.sessions:
+            rendered = json.loads(SpeedscopeRenderer().render(session))
+            rendered["profiles"][0]["name"] = label
+            if speedscope is None:
+                speedscope = rendered
+                continue
+            offset = len(speedscope["shared"]["frames"])
+            speedscope["shared"]["frames"].extend(rendered["shared"]["frames"])
+            for profile in rendered["profiles"]:
+                for event in profile["events"]:
+                    event["frame"] += offset
+                speedscope["profiles"].append(profile)
+        if speedscope is not None:
+            speedscope["name"] = f"{self.method} {self.path}"
+            with open(f"{base}.speedscope.json", "w") as f:
+                json.dump(speedscope, f)
+
+        with open(f"{base}.sql.json", "w") as f:
+            json.dump({
+                "method": self.method,
+                "path": self.path,
+                "status_code": status_code,
+                "duration_ms": round(duration_ms, 3),
+                "sql_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+                "statements": self.statements,
+            }, f, indent=2)
+        return self.id
+
+def profile_sync_endpoint(endpoint):
+    """Wraps a sync endpoint so profiled requests also sample its worker thread."""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        # The worker thread inherits the request's context, where the event-loop
+        # profiler is registered; only a non-async profiler may run alongside it.
+        profiler = profile.profiler(async_mode="disabled")
+        profiler.start()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.add_session("endpoint thread", profiler.stop())
+    return wrapper
+
+class ProfilingRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = profile_sync_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+def record_statement_start(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+def record_statement_end(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None and conn.info.get("profile_started"):
+        started = conn.info["profile_started"].pop()
+        profile.add_statement(statement, parameters, (time.perf_counter() - started) * 1000)
+
+class ProfilingMiddleware:
+    """
+    Profiles requests chosen by should_profile. The profile id is returned in the
+    X-Profile-Id header; other requests only pay for the should_profile check.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not should_profile(scope["path"], Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = profile.id
+            await send(message)
+
+        profiler = profile.profiler(async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.add_session("event loop", profiler.stop())
+            current_profile.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            await run_in_threadpool(profile.write, status_code, duration_ms)
+            print(f"Profiled {profile.method} {profile.path} in {duration_ms:.1f} ms: "
+                  f"{settings.PROFILING_OUTPUT_DIR}/{profile.id}.*")
+
+def enable_profiling(app: FastAPI) -> None:
+    """Installs the profiling hooks; without them requests pay nothing."""
+    global pyinstrument, SpeedscopeRenderer
+    try:
+        import pyinstrument
+        from pyinstrument.renderers import SpeedscopeRenderer
+    except ImportError:
+        print("PROFILING_ENABLED is set but pyinstrument is not installed; profiling is off")
+        return
+    app.router.route_class = ProfilingRoute
+    app.add_middleware(ProfilingMiddleware)
+    for db_engine in [engine, *replica_engines, *shard_engines.values()]:
+        event.listen(db_engine, "before_cursor_execute", record_statement_start)
+        event.listen(db_engine, "after_cursor_execute", record_statement_end)
+
+# ===============================================================================
+# 13. FASTAPI APP AND DEPENDENCIES
+# ===============================================================================
+
+app = FastAPI(title="Analytics Dashboard API", lifespan=lifespan, dependencies=[Depends(rate_limit)])
+app.add_middleware(
+    CompressionMiddleware,
+    encoders=build_encoders(settings.COMPRESSION_ENCODINGS),
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+)
+# Must run before the routes below are declared (it sets their route class).
+if settings.PROFILING_ENABLED:
+    enable_profiling(app)
+if settings.ANALYTICS_ENGINE == "duckdb":
+    enable_columnar_analytics()
 
 def get_db():
     db = SessionLocal()
@@ -180,27 +1710,74 @@ def get_db():
     finally:
         db.close()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_username(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    user = get_user_by_username(db, username=token_data.username)
+        raise credentials_exception()
+    username: str = payload.get("sub")
+    if username is None:
+        raise credentials_exception()
+    return username
+
+# username -> user id, for routing to shards (ids never change).
+_user_ids: Dict[str, int] = {}
+
+def get_user_db(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Session on the database that holds the authenticated user's data, picked by
+    the shard router. Unsharded, this is the request's own session.
+    """
+    if shard_router is None:
+        yield db
+        return
+    username = decode_username(token)
+    if username not in _user_ids:
+        user = get_user_by_username(db, username=username)
+        if user is None:
+            raise credentials_exception()
+        _user_ids[username] = user.id
+    user_db = user_session(_user_ids[username])
+    try:
+        yield user_db
+    finally:
+        user_db.close()
+
+@app.exception_handler(OperationalError)
+async def statement_timeout_handler(request: Request, exc: OperationalError):
+    # SQLSTATE 57014 (query_canceled) is what statement_timeout raises.
+    if getattr(exc.orig, "pgcode", None) != "57014":
+        raise exc
+    shed = service_unavailable("Query timed out")
+    return ORJSONResponse({"detail": shed.detail}, status_code=shed.status_code, headers=shed.headers)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_user_db)):
+    # Sharded, this is the shard's copy of the user, whose data_version tracks their transactions.
+    username = decode_username(token)
+    if wrote_recently(username):
+        db.info["use_primary"] = True
+    user = get_user_by_username(db, username=username)
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
     return user
 
+def apply_analytics_timeout(current_user: User = Depends(get_current_user), db: Session = Depends(get_user_db)):
+    """Bounds every statement in the request's transaction by ANALYTICS_STATEMENT_TIMEOUT_MS."""
+    # Depends on get_current_user so the timeout lands on the connection the
+    # endpoint uses: a recent writer's session has already switched to the primary.
+    if db.get_bind().dialect.name == "postgresql" and settings.ANALYTICS_STATEMENT_TIMEOUT_MS > 0:
+        db.execute(text("SELECT set_config('statement_timeout', :timeout, true)"),
+                   {"timeout": f"{settings.ANALYTICS_STATEMENT_TIMEOUT_MS}ms"})
+
 # ===============================================================================
-# 8. API ENDPOINTS
+# 14. API ENDPOINTS
 # ===============================================================================
 
 @app.post("/api/v1/login", response_model=Token)
@@ -221,25 +1798,35 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/api/v1/users/me", response_model=UserSchema)
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    # The payload embeds the user's transactions, so it is versioned like them.
+    etag = compute_etag("users/me", current_user)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
     return current_user
 
-@app.get("/api/v1/transactions", response_model=List[TransactionSchema])
+@app.get("/api/v1/transactions", response_model=List[TransactionSchema], response_class=ORJSONResponse,
+         dependencies=[Depends(limit_concurrency("transactions"))])
 def read_transactions(
+    request: Request,
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_user_db), 
     skip: int = 0, 
     limit: int = 100,
-    start_date: str = None,
-    end_date: str = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
     categories: str = None  # Comma-separated string of categories
 ):
     # Parse categories from comma-separated string
-    category_list = None
-    if categories:
-        category_list = [cat.strip() for cat in categories.split(',') if cat.strip()]
+    category_list = parse_categories(categories)
+
+    etag = compute_etag("transactions", current_user, skip=skip, limit=limit,
+                        start_date=start_date, end_date=end_date, categories=category_list)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
     
-    transactions = get_transactions_by_owner(
+    rows = get_transactions_by_owner(
         db=db, 
         owner_id=current_user.id, 
         skip=skip, 
@@ -248,21 +1835,103 @@ def read_transactions(
         end_date=end_date,
         categories=category_list
     )
-    return transactions
+    # Returning the response directly skips per-row TransactionSchema validation;
+    # response_model is kept so the OpenAPI docs still describe the payload.
+    return ORJSONResponse([row._asdict() for row in rows], headers=cache_headers(etag))
 
-@app.get("/api/v1/transactions/metrics", response_model=dict)
+@app.get("/api/v1/transactions/search", response_model=List[TransactionSchema], response_class=ORJSONResponse,
+         dependencies=[Depends(limit_concurrency("search")), Depends(apply_analytics_timeout)])
+def search_transactions(
+    request: Request,
+    q: str = Query(min_length=2, max_length=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db),
+    skip: int = 0,
+    limit: int = Query(default=50, le=500),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    categories: str = None  # Comma-separated string of categories
+):
+    category_list = parse_categories(categories)
+
+    etag = compute_etag("search", current_user, q=q.lower(), skip=skip, limit=limit,
+                        start_date=start_date, end_date=end_date, categories=category_list)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    rows = search_transactions_by_owner(
+        db=db,
+        owner_id=current_user.id,
+        q=q,
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date,
+        categories=category_list
+    )
+    return ORJSONResponse([row._asdict() for row in rows], headers=cache_headers(etag))
+
+@app.post("/api/v1/transactions", response_model=TransactionSchema, status_code=status.HTTP_201_CREATED)
+def create_user_transaction(
+    transaction: TransactionCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
+):
+    db_transaction = create_transaction(db=db, owner_id=current_user.id, transaction=transaction)
+    mark_recent_write(current_user.username)
+    # In postgres mode the NOTIFY trigger publishes the row once it commits.
+    if settings.CHANGE_FEED == "memory":
+        event = TransactionSchema.model_validate(db_transaction).model_dump(mode="json")
+        transaction_events.publish(current_user.id, {"type": "transaction", "data": event})
+    return db_transaction
+
+@app.get("/api/v1/transactions/stream")
+async def stream_transactions(current_user: User = Depends(get_current_user)):
+    """Server-sent events feed of the current user's new transactions."""
+    user_id = current_user.id
+    queue = transaction_events.subscribe(user_id)
+
+    async def event_stream():
+        try:
+            # Flushes the headers immediately and sets the client's reconnect delay.
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+        finally:
+            transaction_events.unsubscribe(user_id, queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/v1/transactions/metrics", response_model=dict,
+         dependencies=[Depends(limit_concurrency("metrics")), Depends(apply_analytics_timeout)])
 def read_user_metrics(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db),
-    start_date: str = None,
-    end_date: str = None,
+    db: Session = Depends(get_user_db),
+    start_date: date | None = None,
+    end_date: date | None = None,
     categories: str = None  # Comma-separated string of categories
 ):
     # Parse categories from comma-separated string
-    category_list = None
-    if categories:
-        category_list = [cat.strip() for cat in categories.split(',') if cat.strip()]
-    
+    category_list = parse_categories(categories)
+
+    # Answer revalidations before touching the aggregate queries.
+    etag = compute_etag("metrics", current_user, start_date=start_date,
+                        end_date=end_date, categories=category_list)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
+
+    export = current_export(current_user)
+    if export:
+        return columnar_metrics(db, export, start_date=start_date, end_date=end_date, categories=category_list)
     return get_metrics_by_owner(
         db=db, 
         owner_id=current_user.id,
@@ -271,6 +1940,177 @@ def read_user_metrics(
         categories=category_list
     )
 
+@app.get("/api/v1/transactions/timeseries", response_model=dict,
+         dependencies=[Depends(limit_concurrency("metrics")), Depends(apply_analytics_timeout)])
+def read_spending_timeseries(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db),
+    interval: str = Query(default="month", pattern=f"^({'|'.join(TIMESERIES_INTERVALS)})$"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    categories: str = None  # Comma-separated string of categories
+):
+    category_list = parse_categories(categories)
+
+    etag = compute_etag("timeseries", current_user, interval=interval, start_date=start_date,
+                        end_date=end_date, categories=category_list)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
+
+    filters = dict(interval=interval, start_date=start_date, end_date=end_date, categories=category_list)
+    export = current_export(current_user)
+    if export:
+        return columnar_timeseries(db, export, **filters)
+    return get_spending_timeseries(db, owner_id=current_user.id, **filters)
+
+@app.get("/api/v1/transactions/distribution", response_model=dict,
+         dependencies=[Depends(limit_concurrency("metrics")), Depends(apply_analytics_timeout)])
+def read_amount_distribution(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db),
+    bins: int = Query(default=10, ge=1, le=100),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    categories: str = None  # Comma-separated string of categories
+):
+    category_list = parse_categories(categories)
+
+    etag = compute_etag("distribution", current_user, bins=bins, start_date=start_date,
+                        end_date=end_date, categories=category_list)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
+
+    filters = dict(bins=bins, start_date=start_date, end_date=end_date, categories=category_list)
+    export = current_export(current_user)
+    if export:
+        return columnar_distribution(db, export, **filters)
+    return get_amount_distribution(db, owner_id=current_user.id, **filters)
+
+@app.get("/api/v1/transactions/daily", response_model=dict,
+         dependencies=[Depends(limit_concurrency("metrics")), Depends(apply_analytics_timeout)])
+def read_daily_totals(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    categories: str = None  # Comma-separated string of categories
+):
+    """Per-day category totals for the filters, in the dashboard snapshot's `daily` format."""
+    category_list = parse_categories(categories)
+
+    etag = compute_etag("daily", current_user, start_date=start_date, end_date=end_date, categories=category_list)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
+
+    return get_daily_totals(db, owner_id=current_user.id, start_date=start_date, end_date=end_date,
+                            categories=category_list)
+
+@app.post("/api/v1/transactions/metrics/batch", response_model=dict,
+         dependencies=[Depends(limit_concurrency("metrics")), Depends(apply_analytics_timeout)])
+def read_user_metrics_batch(
+    batch: MetricsBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
+):
+    windows = batch.windows
+    for index, window in enumerate(windows):
+        if window.compare_to is not None and not (0 <= window.compare_to < len(windows) and window.compare_to != index):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"windows[{index}].compare_to must be the index of another window",
+            )
+        if window.categories is not None:
+            window.categories = sorted(set(window.categories)) or None
+
+    metrics = get_metrics_for_windows(db, owner_id=current_user.id, windows=windows)
+    return {
+        "windows": [
+            {
+                **window.model_dump(),
+                "metrics": metrics[index],
+                "change": (compare_metrics(metrics[index], metrics[window.compare_to])
+                           if window.compare_to is not None else None),
+            }
+            for index, window in enumerate(windows)
+        ]
+    }
+
+@app.get("/api/v1/dashboard/snapshot", response_model=dict,
+         dependencies=[Depends(limit_concurrency("snapshot")), Depends(apply_analytics_timeout)])
+def read_dashboard_snapshot(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
+):
+    etag = compute_etag("dashboard/snapshot", current_user)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    # Served as stored while current; otherwise computed now (the background
+    # job stores the rebuilt snapshot on its next pass).
+    snapshot = db.get(DashboardSnapshot, current_user.id)
+    if snapshot is not None and snapshot.data_version == current_user.data_version:
+        content = snapshot.payload.encode()
+    else:
+        content = build_dashboard_snapshot(db, current_user)
+    return Response(content, media_type="application/json", headers=cache_headers(etag))
+
+@app.get("/api/v1/budgets", response_model=List[dict])
+def read_budgets(current_user: User = Depends(get_current_user), db: Session = Depends(get_user_db)):
+    return get_budget_progress(db, owner_id=current_user.id)
+
+@app.post("/api/v1/budgets", response_model=dict, status_code=status.HTTP_201_CREATED)
+def create_user_budget(
+    budget: BudgetCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
+):
+    # The starting total is read where the budget is written, never from a lagging replica.
+    db.info["use_primary"] = True
+    try:
+        db_budget = create_budget(db, owner_id=current_user.id, budget=budget)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A budget for this category and period already exists",
+        )
+    mark_recent_write(current_user.username)
+    return summarize_budget(db, db_budget, datetime.utcnow().date())
+
+@app.delete("/api/v1/budgets/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_user_budget(
+    budget_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
+):
+    db.info["use_primary"] = True
+    deleted = db.query(Budget).filter(Budget.id == budget_id, Budget.user_id == current_user.id).delete()
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
+    db.commit()
+    mark_recent_write(current_user.username)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@app.get("/api/v1/alerts", response_model=List[dict])
+def read_budget_alerts(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db),
+    since: datetime | None = None,
+    limit: int = Query(default=20, le=100)
+):
+    """Budget alerts triggered for the current user, newest first; `since` returns only later ones."""
+    return get_budget_alerts(db, owner_id=current_user.id, since=since, limit=limit)
+
 @app.get("/")
 def read_root():
     return {"message": "API is running"}
@@ -0,0 +1,129 @@
+"""
+Benchmark for the columnar analytics mode (ANALYTICS_ENGINE=duckdb) against
+the SQL queries it replaces (Postgres only).
+
+Seeds users with years of synthetic history, exports them to Parquet as the
+sync job does, then times each query both ways for every user: unfiltered
+metrics, metrics for one quarter and two categories, a monthly and a weekly
+time series, and the amount distribution. Results must match; the script
+reports p50/p95 per engine, the speedup, the export time and the Parquet size
+next to the table size. The seeded rows are rolled back at the end.
+
+Run from the backend directory against a database built from db/init.sql:
+    python -m scripts.bench_analytics --users 10 --rows-per-user 200000
+"""
+import os
+import shutil
+import tempfile
+
+# main.py reads the analytics settings at import time.
+PARQUET_DIR = tempfile.mkdtemp(prefix="analytics-bench-")
+os.environ["ANALYTICS_ENGINE"] = "duckdb"
+os.environ["ANALYTICS_PARQUET_DIR"] = PARQUET_DIR
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+import main
+from main import (SessionLocal, columnar_distribution, columnar_metrics, columnar_timeseries, engine,
+                  export_path, export_user_transactions, get_amount_distribution, get_metrics_by_owner,
+                  get_spending_timeseries, load_categories)
+from scripts.check_query_plans import seed_large_dataset
+
+QUARTER = {"start_date": date(2024, 1, 1), "end_date": date(2024, 3, 31)}
+
+# (label, SQL function, columnar function, keyword arguments shared by both)
+SCENARIOS = [
+    ("metrics", get_metrics_by_owner, columnar_metrics, {}),
+    ("metrics, quarter + 2 categories", get_metrics_by_owner, columnar_metrics,
+     {**QUARTER, "categories": ["Groceries", "Travel"]}),
+    ("time series, monthly", get_spending_timeseries, columnar_timeseries, {"interval": "month"}),
+    ("time series, weekly", get_spending_timeseries, columnar_timeseries, {"interval": "week"}),
+    ("distribution, 20 bins", get_amount_distribution, columnar_distribution, {"bins": 20}),
+]
+
+
+def p95(values: list) -> float:
+    return statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+
+
+def timed(call) -> tuple:
+    started = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--rows-per-user", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per user and scenario (best counts)")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("The analytics benchmark requires Postgres (DATABASE_URL).")
+        return 1
+    if main.analytics_connection is None:
+        return 1
+
+    db = SessionLocal()
+    mismatches = []
+    try:
+        # No parallel workers; DuckDB likewise runs with ANALYTICS_DUCKDB_THREADS.
+        db.execute(text("SET max_parallel_workers_per_gather = 0"))
+        started = time.perf_counter()
+        first_user = seed_large_dataset(db, args.users, args.rows_per_user)
+        user_ids = range(first_user, first_user + args.users)
+        print(f"seeded {args.users * args.rows_per_user} rows in {time.perf_counter() - started:.1f} s")
+        load_categories(db)
+
+        started = time.perf_counter()
+        for user_id in user_ids:
+            export_user_transactions(db, user_id, 0)
+        export_s = time.perf_counter() - started
+        parquet_bytes = sum(os.path.getsize(export_path(user_id, 0)) for user_id in user_ids)
+        table_bytes = db.execute(text("""
+            SELECT sum(pg_relation_size(inhrelid)) FROM pg_inherits
+            WHERE inhparent = 'transactions'::regclass
+        """)).scalar()
+        print(f"exported {args.users} users in {export_s:.1f} s "
+              f"({args.users * args.rows_per_user / export_s:,.0f} rows/s); "
+              f"parquet {parquet_bytes / 2**20:.1f} MiB, transactions heap {table_bytes / 2**20:.1f} MiB "
+              f"(all users, before the seed is rolled back)")
+
+        print(f"\n{'scenario':<34} {'sql p50':>9} {'p95':>9} {'duckdb p50':>11} {'p95':>9} {'speedup':>8}")
+        for label, sql_query, columnar_query, kwargs in SCENARIOS:
+            sql_ms, columnar_ms = [], []
+            for user_id in user_ids:
+                path = export_path(user_id, 0)
+                runs = [timed(lambda: sql_query(db, user_id, **kwargs)) for _ in range(args.repeat)]
+                expected, elapsed = runs[0][0], min(ms for _, ms in runs)
+                sql_ms.append(elapsed)
+                runs = [timed(lambda: columnar_query(db, path, **kwargs)) for _ in range(args.repeat)]
+                actual, elapsed = runs[0][0], min(ms for _, ms in runs)
+                columnar_ms.append(elapsed)
+                if actual != expected:
+                    mismatches.append(f"{label}, user {user_id}")
+            sql_p50, columnar_p50 = statistics.median(sql_ms), statistics.median(columnar_ms)
+            print(f"{label:<34} {sql_p50:9.1f} {p95(sql_ms):9.1f} "
+                  f"{columnar_p50:11.1f} {p95(columnar_ms):9.1f} "
+                  f"{sql_p50 / columnar_p50:7.1f}x")
+    finally:
+        db.rollback()
+        db.close()
+        shutil.rmtree(PARQUET_DIR, ignore_errors=True)
+
+    if mismatches:
+        print(f"\nResults differ for: {', '.join(mismatches)}")
+        return 1
+    print("\nBoth engines returned identical results")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,120 @@
+"""
+Benchmark for dictionary-encoded categories (Postgres only).
+
+Builds two temporary copies of the transactions layout with identical
+synthetic rows: one storing the category name as VARCHAR on every row,
+one storing a SMALLINT id into a categories lookup table. Both get the
+covering indexes declared on Transaction. Reports heap and index sizes and
+best-of-N wall time for the per-category spending aggregate.
+
+Run from the backend directory against DATABASE_URL:
+    python -m scripts.bench_category_encoding --rows 1000000
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import text
+
+from main import engine
+
+CATEGORIES = ["Groceries", "Utilities", "Transport", "Dining", "Shopping", "Travel",
+              "Health", "Entertainment", "Education", "Technology"]
+
+LAYOUTS = {
+    "varchar": {
+        "column": "category VARCHAR(50) NOT NULL",
+        "value": "(SELECT name FROM bench_categories WHERE id = s.category_id)",
+        "key": "category",
+        "group_by": "SELECT category, sum(amount_cents) FROM {table} WHERE user_id = :user_id GROUP BY category",
+    },
+    "smallint": {
+        "column": "category_id SMALLINT NOT NULL",
+        "value": "s.category_id",
+        "key": "category_id",
+        # Names are attached after grouping, as get_metrics_by_owner does.
+        "group_by": "SELECT c.name, t.total FROM (SELECT category_id, sum(amount_cents) AS total "
+                    "FROM {table} WHERE user_id = :user_id GROUP BY category_id) t "
+                    "JOIN bench_categories c ON c.id = t.category_id",
+    },
+}
+
+
+def create_table(conn, layout: str, rows: int, users: int) -> str:
+    spec = LAYOUTS[layout]
+    table = f"bench_transactions_{layout}"
+    conn.execute(text(f"""
+        CREATE TEMP TABLE {table} (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            amount_cents INTEGER NOT NULL,
+            {spec['column']},
+            transaction_date DATE NOT NULL
+        )
+    """))
+    conn.execute(text(f"""
+        INSERT INTO {table} (user_id, amount_cents, {spec['key']}, transaction_date)
+        SELECT s.user_id, s.amount_cents, {spec['value']}, s.transaction_date
+        FROM (SELECT 1 + g % :users AS user_id,
+                     hashint4(g) & 65535 AS amount_cents,
+                     (1 + (hashint4(g + 1) & 65535) % :categories)::smallint AS category_id,
+                     DATE '2023-01-01' + g % 1000 AS transaction_date
+              FROM generate_series(1, :rows) AS g) AS s
+    """), {"rows": rows, "users": users, "categories": len(CATEGORIES)})
+    conn.execute(text(f"CREATE INDEX ON {table} (user_id, transaction_date) "
+                      f"INCLUDE (amount_cents, {spec['key']})"))
+    conn.execute(text(f"CREATE INDEX ON {table} (user_id, {spec['key']}, transaction_date) "
+                      f"INCLUDE (amount_cents)"))
+    conn.execute(text(f"VACUUM ANALYZE {table}"))
+    return table
+
+
+def sizes(conn, table: str) -> tuple[int, int]:
+    """Returns (heap bytes, secondary index bytes), excluding the primary key."""
+    heap = conn.execute(text("SELECT pg_relation_size(:table)"), {"table": table}).scalar()
+    indexes = conn.execute(text("""
+        SELECT coalesce(sum(pg_relation_size(indexrelid)), 0)
+        FROM pg_index WHERE indrelid = CAST(:table AS regclass) AND NOT indisprimary
+    """), {"table": table}).scalar()
+    return heap, indexes
+
+
+def best_of(conn, sql: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql), {"user_id": 1}).all()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("The category encoding benchmark requires Postgres (DATABASE_URL).")
+        return 1
+
+    # VACUUM cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SET max_parallel_workers_per_gather = 0"))
+        conn.execute(text("CREATE TEMP TABLE bench_categories (id SMALLINT PRIMARY KEY, name VARCHAR(50) NOT NULL)"))
+        conn.execute(text("INSERT INTO bench_categories SELECT ordinality, name "
+                          "FROM unnest(CAST(:names AS text[])) WITH ORDINALITY AS name"),
+                     {"names": CATEGORIES})
+
+        for layout in LAYOUTS:
+            table = create_table(conn, layout, args.rows, args.users)
+            heap, indexes = sizes(conn, table)
+            elapsed = best_of(conn, LAYOUTS[layout]["group_by"].format(table=table), args.repeat)
+            print(f"{layout:<9} rows={args.rows:>9}  heap={heap / 1024 / 1024:8.1f} MiB  "
+                  f"indexes={indexes / 1024 / 1024:8.1f} MiB  group_by best={elapsed * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
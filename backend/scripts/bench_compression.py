@@ -0,0 +1,82 @@
+"""
+Benchmark for negotiated response compression against a running backend.
+
+For a small (metrics) and a large (transactions) response, requests each
+encoding in turn and reports bytes on the wire and end-to-end latency
+including decompression. Start the backend with COMPRESSION_MINIMUM_SIZE=0
+so small bodies are compressed too, then tune the threshold from the output.
+Requests are sent back to back, so they soon exceed the per-user rate limit;
+a 429 is waited out for its Retry-After and not timed. Starting the backend
+with RATE_LIMIT_PER_SECOND=0 as well avoids the waits.
+
+Run from the backend directory:
+    python -m scripts.bench_compression --base-url http://localhost:8000/api/v1 \
+        --username john.doe@example.com --password password123
+"""
+import argparse
+import gzip
+import statistics
+import time
+
+import brotli
+import requests
+import zstandard
+
+DECODERS = {
+    "identity": lambda body: body,
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body),
+}
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    response = requests.post(f"{base_url}/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def fetch(session: requests.Session, url: str, params: dict, encoding: str) -> tuple[int, float, str]:
+    """Returns (wire bytes, seconds to decoded body, encoding actually used)."""
+    while True:
+        started = time.perf_counter()
+        response = session.get(url, params=params, headers={"Accept-Encoding": encoding}, stream=True)
+        if response.status_code != 429:
+            break
+        response.close()
+        time.sleep(float(response.headers.get("Retry-After", 1)))
+    response.raise_for_status()
+    raw = response.raw.read(decode_content=False)
+    used = response.headers.get("Content-Encoding", "identity")
+    DECODERS[used](raw)
+    return len(raw), time.perf_counter() - started, used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--username", default="john.doe@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--large-limit", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {login(args.base_url, args.username, args.password)}"
+    cases = {
+        "small": (f"{args.base_url}/transactions/metrics", {}),
+        "large": (f"{args.base_url}/transactions", {"limit": args.large_limit}),
+    }
+
+    for label, (url, params) in cases.items():
+        for encoding in DECODERS:
+            samples = [fetch(session, url, params, encoding) for _ in range(args.repeat)]
+            wire, _, used = samples[-1]
+            latencies = sorted(seconds * 1000 for _, seconds, _ in samples)
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            print(f"{label:<6} requested={encoding:<9} served={used:<9} wire={wire:>10} B  "
+                  f"p50={statistics.median(latencies):8.2f} ms  p95={p95:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
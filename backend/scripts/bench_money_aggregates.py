@@ -0,0 +1,83 @@
+"""
+Benchmark for SUM / GROUP BY over money stored as NUMERIC(10, 2) versus
+INTEGER cents (Postgres only).
+
+Builds two temporary tables with identical synthetic rows, one per storage
+type, and times the aggregates used by get_metrics_by_owner: a whole-table
+count + sum and a sum grouped by category. Reports best-of-N wall time and
+the on-disk size of each table.
+
+Run from the backend directory against DATABASE_URL:
+    python -m scripts.bench_money_aggregates --rows 1000000
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import text
+
+from main import engine
+
+TABLES = {
+    "numeric": "amount NUMERIC(10, 2) NOT NULL",
+    "cents": "amount INTEGER NOT NULL",
+}
+
+QUERIES = {
+    "count + sum": "SELECT count(*), sum(amount) FROM {table}",
+    "sum by category": "SELECT category, sum(amount) FROM {table} GROUP BY category",
+}
+
+
+def create_table(conn, name: str, column: str, rows: int) -> None:
+    conn.execute(text(f"CREATE TEMP TABLE {name} ({column}, category VARCHAR(50) NOT NULL)"))
+    # Same random draws for both tables: cents are generated, numeric divides by 100.
+    value = "cents" if name.endswith("cents") else "cents / 100.0"
+    conn.execute(text(f"""
+        INSERT INTO {name} (amount, category)
+        SELECT {value}, 'Category ' || (g % 12)
+        FROM (SELECT g, (hashint4(g) & 65535) * 7 AS cents
+              FROM generate_series(1, :rows) AS g) AS s
+    """), {"rows": rows})
+    conn.execute(text(f"ANALYZE {name}"))
+
+
+def best_of(conn, sql: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql)).all()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("The money aggregate benchmark requires Postgres (DATABASE_URL).")
+        return 1
+
+    with engine.connect() as conn:
+        # Keep the comparison to a single backend process.
+        conn.execute(text("SET max_parallel_workers_per_gather = 0"))
+        for kind, column in TABLES.items():
+            create_table(conn, f"bench_money_{kind}", column, args.rows)
+
+        for kind in TABLES:
+            table = f"bench_money_{kind}"
+            size = conn.execute(text(f"SELECT pg_relation_size('{table}')")).scalar()
+            print(f"{kind:<8} rows={args.rows:>9}  table={size / 1024 / 1024:8.1f} MiB")
+        for label, query in QUERIES.items():
+            for kind in TABLES:
+                elapsed = best_of(conn, query.format(table=f"bench_money_{kind}"), args.repeat)
+                print(f"{label:<16} {kind:<8} best={elapsed * 1000:9.1f} ms")
+        conn.rollback()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
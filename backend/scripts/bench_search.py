@@ -0,0 +1,85 @@
+"""
+Latency benchmark for transaction description search (Postgres with pg_trgm).
+
+Seeds a multi-million-row synthetic dataset with merchant-style descriptions,
+then runs search_transactions_by_owner for random users. The queries cover
+prefixes, substrings, typos, date/category filters and later pages. Reports
+p50/p95/max per scenario and fails when any p95 exceeds --target-ms. The
+seeded rows are rolled back at the end.
+
+Run from the backend directory against a database built from db/init.sql:
+    python -m scripts.bench_search --users 1000 --rows-per-user 2000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+from main import SessionLocal, engine, load_categories, search_transactions_by_owner
+from scripts.check_query_plans import seed_large_dataset
+
+MERCHANTS = [
+    "Costco Wholesale", "Uber Trip", "Uber Eats order", "Amazon Marketplace", "Starbucks Coffee",
+    "Shell Gas Station", "Netflix Subscription", "Whole Foods Market", "Trader Joe's", "Target Store",
+    "Walmart Supercenter", "Spotify Premium", "Delta Air Lines", "Airbnb Stay", "Apple Store",
+    "CVS Pharmacy", "Home Depot", "Lyft Ride", "Chipotle Mexican Grill", "Best Buy Electronics",
+]
+
+# (label, query, keyword arguments for search_transactions_by_owner)
+SCENARIOS = [
+    ("prefix", "Cost", {}),
+    ("substring", "eats", {}),
+    ("typo", "Starbuks", {}),
+    ("typo", "Costko", {}),
+    ("prefix + quarter", "Uber", {"start_date": date(2024, 1, 1), "end_date": date(2024, 3, 31)}),
+    ("prefix + categories", "Shell", {"categories": ["Transport", "Travel"]}),
+    ("prefix, page 3", "Uber", {"skip": 100, "limit": 50}),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rows-per-user", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=50, help="random users per scenario")
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("The search benchmark requires Postgres (DATABASE_URL).")
+        return 1
+
+    db = SessionLocal()
+    failures = []
+    try:
+        started = time.perf_counter()
+        first_user = seed_large_dataset(db, args.users, args.rows_per_user, MERCHANTS)
+        print(f"seeded {args.users * args.rows_per_user} rows in {time.perf_counter() - started:.1f} s")
+        load_categories(db)
+
+        for label, q, kwargs in SCENARIOS:
+            timings, matches = [], 0
+            for _ in range(args.samples):
+                owner_id = first_user + random.randrange(args.users)
+                started = time.perf_counter()
+                rows = search_transactions_by_owner(db, owner_id, q, **{"limit": 50, **kwargs})
+                timings.append((time.perf_counter() - started) * 1000)
+                matches += len(rows)
+            timings.sort()
+            p95 = timings[int(0.95 * (len(timings) - 1))]
+            ok = p95 <= args.target_ms
+            print(f"[{'PASS' if ok else 'FAIL'}] {label:<20} q={q!r:<11} p50={statistics.median(timings):7.1f} ms  "
+                  f"p95={p95:7.1f} ms  max={timings[-1]:7.1f} ms  avg_rows={matches / args.samples:5.1f}")
+            if not ok:
+                failures.append(label)
+    finally:
+        db.rollback()
+        db.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
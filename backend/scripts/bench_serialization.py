@@ -0,0 +1,104 @@
+"""
+Benchmark for the /api/v1/transactions serialization path.
+
+Compares the previous response_model path (ORM entities -> TransactionSchema
+validation -> stdlib json) against the column-tuple + orjson path used by
+read_transactions, reporting wall time and peak allocations per response size.
+
+Run from the backend directory:
+    python -m scripts.bench_serialization --rows 1000 100000
+"""
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import List
+
+# main.py reads its settings from the environment at import time.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from main import (Base, Category, Transaction, TransactionSchema, User,
+                  get_transactions_by_owner)
+
+CATEGORIES = ["Groceries", "Utilities", "Transport", "Dining", "Shopping", "Travel"]
+
+
+def seed(session, rows: int) -> None:
+    """Inserts one user with `rows` synthetic transactions."""
+    session.add(User(id=1, username="bench@example.com", password="x", full_name="Bench"))
+    session.add_all([Category(id=id, name=name) for id, name in enumerate(CATEGORIES, start=1)])
+    start = date(2020, 1, 1)
+    session.bulk_insert_mappings(Transaction, [
+        {
+            "user_id": 1,
+            "amount_cents": random.randint(100, 50_000),
+            "category_id": random.randint(1, len(CATEGORIES)),
+            "description": f"Synthetic transaction {i}",
+            "transaction_date": start + timedelta(days=i % 2000),
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def response_model_path(session, rows: int) -> bytes:
+    """Mirrors the old endpoint: ORM entities validated through response_model."""
+    adapter = TypeAdapter(List[TransactionSchema])
+    transactions = session.query(Transaction).filter(Transaction.user_id == 1).limit(rows).all()
+    validated = adapter.validate_python(transactions, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(session, rows: int) -> bytes:
+    """Mirrors the current endpoint: column tuples encoded directly by orjson."""
+    result = get_transactions_by_owner(session, owner_id=1, limit=rows)
+    return orjson.dumps([row._asdict() for row in result])
+
+
+def measure(label: str, func, session, rows: int, repeat: int) -> None:
+    """Reports best-of-`repeat` wall time and the peak traced allocation."""
+    timings = []
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.perf_counter()
+        payload = func(session, rows)
+        timings.append(time.perf_counter() - started)
+
+    session.expunge_all()
+    tracemalloc.start()
+    func(session, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<16} rows={rows:>7}  best={min(timings) * 1000:9.1f} ms  "
+          f"peak_alloc={peak / 1024 / 1024:8.1f} MiB  bytes={len(payload):>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    seed(session, max(args.rows))
+
+    for rows in args.rows:
+        measure("response_model", response_model_path, session, rows, args.repeat)
+        measure("orjson_tuples", fast_path, session, rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Cold-start benchmark for the backend API and the Panel frontend.
+
+For each service it reports:
+  * the import time of its entry module and of the heaviest modules it imports
+    directly (from `python -X importtime`), and
+  * the time from process start until the first successful request: /health
+    and an authenticated metrics call for the backend, /liveness and the login
+    page for the frontend (rendering it runs app/main.py for a new session).
+
+Every run starts a fresh interpreter; medians are reported. The backend uses
+DATABASE_URL and SECRET_KEY from the environment and logs in as --username.
+
+Run from the backend directory:
+    python -m scripts.bench_startup --runs 5
+    python -m scripts.bench_startup --service frontend
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+FRONTEND_DIR = BACKEND_DIR.parent / "frontend"
+
+
+def import_times(cwd: Path, module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Imports `module` in a fresh interpreter.
+    Returns:
+        Its cumulative import time in ms, and the cumulative time of each module it
+        imports directly (modules already imported by an earlier one count there).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    total, children = 0.0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+    return total, children
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(check: Callable[[], bool], process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"process exited with {process.returncode}")
+        try:
+            if check():
+                return
+        except OSError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError("service did not answer in time")
+
+
+def get(url: str, headers: dict | None = None) -> bool:
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=30) as response:
+        return response.status == 200
+
+
+def backend_first_requests(username: str, password: str, timeout: float) -> Dict[str, float]:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+                               cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(lambda: get(f"{base}/health"), process, timeout)
+        health_ms = (time.perf_counter() - started) * 1000
+        form = urllib.parse.urlencode({"username": username, "password": password}).encode()
+        with urllib.request.urlopen(f"{base}/api/v1/login", data=form, timeout=30) as response:
+            token = json.load(response)["access_token"]
+        get(f"{base}/api/v1/transactions/metrics", {"Authorization": f"Bearer {token}"})
+        metrics_ms = (time.perf_counter() - started) * 1000
+    finally:
+        process.terminate()
+        process.wait()
+    return {"first /health": health_ms, "first login + metrics": metrics_ms}
+
+
+def frontend_first_request(timeout: float) -> Dict[str, float]:
+    port = free_port()
+    started = time.perf_counter()
+    # The frontend imports itself as the `app` package (PYTHONPATH=/app in its image).
+    env = {**os.environ, "PYTHONPATH": str(FRONTEND_DIR)}
+    process = subprocess.Popen(["panel", "serve", "app/main.py", "--port", str(port), "--liveness"],
+                               cwd=FRONTEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(lambda: get(f"http://127.0.0.1:{port}/liveness"), process, timeout)
+        liveness_ms = (time.perf_counter() - started) * 1000
+        get(f"http://127.0.0.1:{port}/main")
+        page_ms = (time.perf_counter() - started) * 1000
+    finally:
+        process.terminate()
+        process.wait()
+    return {"first /liveness": liveness_ms, "first page (login view)": page_ms}
+
+
+def report(title: str, runs: List[Tuple[float, Dict[str, float], Dict[str, float]]], top: int) -> None:
+    print(f"\n== {title} ==")
+    print(f"entry module import: {statistics.median(r[0] for r in runs):8.1f} ms")
+    children = {name: statistics.median(r[1].get(name, 0.0) for r in runs) for name in runs[0][1]}
+    for name, ms in sorted(children.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {name:<40} {ms:8.1f} ms")
+    for name in runs[0][2]:
+        print(f"{name + ':':<26} {statistics.median(r[2][name] for r in runs):8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=["backend", "frontend", "both"], default="both")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="heaviest direct imports to list")
+    parser.add_argument("--username", default="john.doe@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    if args.service in ("backend", "both"):
+        runs = [(*import_times(BACKEND_DIR, "main"),
+                 backend_first_requests(args.username, args.password, args.timeout))
+                for _ in range(args.runs)]
+        report("backend (main.py)", runs, args.top)
+    if args.service in ("frontend", "both"):
+        runs = [(*import_times(FRONTEND_DIR, "app.main"), frontend_first_request(args.timeout))
+                for _ in range(args.runs)]
+        report("frontend (app/main.py)", runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Rebuilds stale dashboard snapshots outside the API process.
+
+Each API worker runs the same job every SNAPSHOT_REFRESH_INTERVAL_SECONDS.
+With several workers, set that to 0 on the workers and run this script from
+cron (or with --interval) so the snapshots are rebuilt exactly once.
+
+Run from the backend directory:
+    python -m scripts.build_dashboard_snapshots [--interval 60]
+"""
+import argparse
+import time
+
+from main import refresh_stale_snapshots
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, default=0,
+                        help="keep running, rebuilding every INTERVAL seconds (default: run once)")
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        rebuilt = refresh_stale_snapshots()
+        print(f"Rebuilt {rebuilt} dashboard snapshot(s) in {time.perf_counter() - started:.2f}s")
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
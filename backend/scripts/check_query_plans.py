@@ -0,0 +1,268 @@
+"""
+EXPLAIN-based checks for the transaction queries in main.py (Postgres only).
+
+Runs the real CRUD functions against DATABASE_URL, captures every SQL
+statement they issue, EXPLAINs each one and verifies that:
+  - the indexes declared on the ORM models exist in the database as declared,
+  - date-filtered queries only touch the monthly partitions overlapping the filter,
+  - on a seeded large dataset no query, description search included, falls
+    back to a sequential scan of a non-trivial partition.
+The seeded data is rolled back at the end. Exits non-zero on any failure.
+
+Run from the backend directory against a database built from db/init.sql:
+    python -m scripts.check_query_plans [--plans-dir query_plans]
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy import event, inspect, text
+
+from main import (MetricsWindow, SessionLocal, Transaction, engine, get_metrics_by_owner,
+                  get_metrics_for_windows, get_transactions_by_owner, load_categories,
+                  search_transactions_by_owner)
+
+# (label, owner_id, start_date, end_date, categories)
+PRUNING_SCENARIOS = [
+    ("single month", 1, date(2025, 6, 1), date(2025, 6, 30), None),
+    ("month boundary", 1, date(2025, 5, 15), date(2025, 6, 10), None),
+    ("single month + categories", 1, date(2025, 6, 1), date(2025, 6, 30), ["Groceries", "Utilities"]),
+    ("open-ended start", 1, date(2025, 7, 1), None, None),
+]
+
+# (label, start_date, end_date, categories, search query or None), run for the
+# first seeded user; scenarios with a query also run the description search
+SEQ_SCAN_SCENARIOS = [
+    ("all history", None, None, None, None),
+    ("one quarter", date(2024, 1, 1), date(2024, 3, 31), None, None),
+    ("categories", None, None, ["Dining", "Travel"], None),
+    ("one quarter + categories", date(2024, 1, 1), date(2024, 3, 31), ["Dining"], None),
+    ("search", None, None, None, "Costco"),
+    ("search typo + one quarter", date(2024, 1, 1), date(2024, 3, 31), None, "Starbuks"),
+]
+
+SEED_CATEGORIES = ["Groceries", "Utilities", "Transport", "Dining",
+                   "Shopping", "Travel", "Health", "Entertainment"]
+
+SEED_DESCRIPTIONS = ["Costco Wholesale", "Uber Trip", "Starbucks Coffee", "Shell Gas Station",
+                     "Netflix Subscription", "Whole Foods Market", "Delta Air Lines", "CVS Pharmacy"]
+
+# Sequential scans of partitions smaller than this are the planner's right call.
+MIN_ROWS_FOR_INDEX = 1000
+
+
+@contextmanager
+def captured_statements():
+    """Records (statement, parameters) for every query sent to the database."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(db, statement: str, parameters) -> dict:
+    # Ask for the plan as JSON so nodes can be walked reliably.
+    result = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    return result.scalar()[0]["Plan"]
+
+
+def scanned_relations(plan: dict) -> set:
+    relations = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        relations |= scanned_relations(child)
+    return relations
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def transaction_partitions(db) -> dict:
+    """Maps each attached partition to its [start, end) month, or None for the default."""
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'transactions'
+    """)).scalars()
+    partitions = {}
+    for name in rows:
+        if name.startswith("transactions_p"):
+            year, month = int(name[14:18]), int(name[19:21])
+            end = date(year + month // 12, month % 12 + 1, 1)
+            partitions[name] = (date(year, month, 1), end)
+        else:
+            partitions[name] = None
+    return partitions
+
+
+def expected_partitions(partitions: dict, start: date, end: date | None) -> set:
+    expected = {name for name, bounds in partitions.items()
+                if bounds and bounds[1] > start and (end is None or bounds[0] <= end)}
+    # Without an upper bound the default partition may hold later rows.
+    if end is None:
+        expected |= {name for name, bounds in partitions.items() if bounds is None}
+    return expected
+
+
+def check_pruning(db, partitions: dict) -> list:
+    # Warm the category cache so only the transaction queries are captured.
+    load_categories(db)
+    failures = []
+    for label, owner_id, start_date, end_date, categories in PRUNING_SCENARIOS:
+        with captured_statements() as statements:
+            get_transactions_by_owner(db, owner_id, start_date=start_date, end_date=end_date,
+                                      categories=categories)
+            get_metrics_by_owner(db, owner_id, start_date=start_date, end_date=end_date,
+                                 categories=categories)
+            get_metrics_for_windows(db, owner_id, [MetricsWindow(start_date=start_date, end_date=end_date,
+                                                                  categories=categories)])
+
+        expected = expected_partitions(partitions, start_date, end_date)
+        for number, (statement, parameters) in enumerate(statements, start=1):
+            scanned = {name for name in scanned_relations(explain(db, statement, parameters))
+                       if name in partitions}
+            ok = scanned == expected
+            print(f"[{'PASS' if ok else 'FAIL'}] pruning / {label} / query {number}: "
+                  f"{len(scanned)} of {len(partitions)} partitions")
+            if not ok:
+                failures.append(f"{label}: scanned {sorted(scanned)}, expected {sorted(expected)}\n"
+                                f"    {statement}")
+    return failures
+
+
+def check_index_sync(db) -> list:
+    """Compares the indexes declared on Transaction with those in the database."""
+    actual = {index["name"]: index for index in inspect(db.connection()).get_indexes(Transaction.__tablename__)}
+    failures = []
+    for index in Transaction.__table__.indexes:
+        declared = ([column.name for column in index.columns],
+                    list(index.dialect_options["postgresql"]["include"] or []))
+        found = actual.get(index.name)
+        found_shape = (found["column_names"], found.get("include_columns", [])) if found else None
+        ok = found_shape == declared
+        print(f"[{'PASS' if ok else 'FAIL'}] index sync / {index.name}")
+        if not ok:
+            failures.append(f"index {index.name}: declared {declared}, database has {found_shape}")
+    return failures
+
+
+def seed_large_dataset(db, users: int, rows_per_user: int, descriptions: list | None = None) -> int:
+    """
+    Seeds synthetic users, categories and transactions (triggers off) and returns
+    the first user id. Descriptions are drawn at random from `descriptions`.
+    """
+    db.execute(text("SELECT ensure_transaction_partitions(3, DATE '2023-01-01')"))
+    db.execute(text("ALTER TABLE transactions DISABLE TRIGGER USER"))
+    user_ids = db.execute(text("""
+        INSERT INTO users (username, password, full_name)
+        SELECT 'plan-check-' || g || '@example.com', 'x', 'Plan Check ' || g
+        FROM generate_series(1, :users) AS g
+        RETURNING id
+    """), {"users": users}).scalars().all()
+    db.execute(text("INSERT INTO categories (name) SELECT unnest(CAST(:categories AS text[])) ON CONFLICT DO NOTHING"),
+               {"categories": SEED_CATEGORIES})
+    category_ids = db.execute(text("SELECT id FROM categories WHERE name = ANY(:categories)"),
+                              {"categories": SEED_CATEGORIES}).scalars().all()
+    db.execute(text("""
+        INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+        SELECT u.id,
+               floor(random() * 50000)::int,
+               (CAST(:category_ids AS smallint[]))[1 + floor(random() * cardinality(CAST(:category_ids AS smallint[])))::int],
+               (CAST(:descriptions AS text[]))[1 + floor(random() * cardinality(CAST(:descriptions AS text[])))::int],
+               DATE '2023-01-01' + floor(random() * 1000)::int
+        FROM unnest(CAST(:user_ids AS integer[])) AS u(id), generate_series(1, :rows_per_user)
+    """), {"category_ids": category_ids, "user_ids": user_ids, "rows_per_user": rows_per_user,
+          "descriptions": descriptions or ["Seeded transaction"]})
+    db.execute(text("ALTER TABLE transactions ENABLE TRIGGER USER"))
+    db.execute(text("ANALYZE transactions"))
+    return min(user_ids)
+
+
+def check_seq_scans(db, owner_id: int, plans_dir: str | None) -> list:
+    sizes = dict(db.execute(text("""
+        SELECT child.relname, child.reltuples
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'transactions'
+    """)).all())
+    load_categories(db)
+    failures = []
+    for label, start_date, end_date, categories, q in SEQ_SCAN_SCENARIOS:
+        with captured_statements() as statements:
+            if q is None:
+                get_transactions_by_owner(db, owner_id, start_date=start_date, end_date=end_date,
+                                          categories=categories)
+                get_metrics_by_owner(db, owner_id, start_date=start_date, end_date=end_date,
+                                     categories=categories)
+                get_metrics_for_windows(db, owner_id, [MetricsWindow(start_date=start_date, end_date=end_date,
+                                                                      categories=categories)])
+            else:
+                search_transactions_by_owner(db, owner_id, q, limit=50, start_date=start_date,
+                                             end_date=end_date, categories=categories)
+
+        for number, (statement, parameters) in enumerate(statements, start=1):
+            if "set_config" in statement:
+                # The search's similarity threshold setting, not a table query.
+                continue
+            plan = explain(db, statement, parameters)
+            if plans_dir:
+                filename = f"{label.replace(' ', '_').replace('+', 'and')}_{number}.json"
+                with open(os.path.join(plans_dir, filename), "w") as f:
+                    json.dump({"statement": statement, "plan": plan}, f, indent=2, default=str)
+
+            seq_scans = sorted({node["Relation Name"] for node in plan_nodes(plan)
+                                if node["Node Type"] == "Seq Scan"
+                                and sizes.get(node.get("Relation Name"), 0) >= MIN_ROWS_FOR_INDEX})
+            ok = not seq_scans
+            print(f"[{'PASS' if ok else 'FAIL'}] seq scan / {label} / query {number}: "
+                  f"{plan['Node Type']}")
+            if not ok:
+                failures.append(f"{label}: sequential scan on {seq_scans}\n    {statement}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rows-per-user", type=int, default=2000)
+    parser.add_argument("--plans-dir", help="write each captured EXPLAIN plan here as JSON")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("Query plan checks require Postgres (DATABASE_URL).")
+        return 1
+    if args.plans_dir:
+        os.makedirs(args.plans_dir, exist_ok=True)
+
+    db = SessionLocal()
+    try:
+        failures = check_index_sync(db)
+        failures += check_pruning(db, transaction_partitions(db))
+        owner_id = seed_large_dataset(db, args.users, args.rows_per_user, SEED_DESCRIPTIONS)
+        failures += check_seq_scans(db, owner_id, args.plans_dir)
+    finally:
+        # Discards the seeded users, transactions and partitions.
+        db.rollback()
+        db.close()
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
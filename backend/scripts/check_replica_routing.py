@@ -0,0 +1,155 @@
+"""
+Checks read/write routing between the primary and read replicas.
+
+Two SQLite files stand in for a primary and one replica. The replica starts as
+a copy of the primary and never receives later writes, so every read shows
+which database answered it. The script checks that:
+
+  * user lookups, transaction lists and metrics are served by the replica,
+  * ingestion writes to the primary only,
+  * the writer's reads stick to the primary for READ_YOUR_WRITES_SECONDS and
+    see their own transaction, while other users keep reading the replica,
+  * reads go back to the replica once the window has passed.
+
+Run from the backend directory:
+    python -m scripts.check_replica_routing
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+# main.py builds its engines from the environment at import time.
+WORKDIR = tempfile.mkdtemp(prefix="replica-check-")
+PRIMARY_PATH = os.path.join(WORKDIR, "primary.db")
+REPLICA_PATH = os.path.join(WORKDIR, "replica.db")
+STICKY_SECONDS = 1.0
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY_PATH}"
+os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{REPLICA_PATH}"
+os.environ["READ_YOUR_WRITES_SECONDS"] = str(STICKY_SECONDS)
+os.environ["CHANGE_FEED"] = "memory"
+os.environ["SNAPSHOT_REFRESH_INTERVAL_SECONDS"] = "0"
+os.environ.setdefault("SECRET_KEY", "replica-check")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from main import Base, Category, Transaction, User
+
+failures = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+class StatementCounter:
+    """Counts SELECT and write statements per engine."""
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.reset()
+        for label, engine in engines.items():
+            event.listen(engine, "before_cursor_execute", self._listener(label))
+
+    def _listener(self, label):
+        def count(conn, cursor, statement, parameters, context, executemany):
+            kind = "read" if statement.lstrip().upper().startswith("SELECT") else "write"
+            self.counts[label][kind] += 1
+        return count
+
+    def reset(self) -> None:
+        self.counts = {label: {"read": 0, "write": 0} for label in self.engines}
+
+    def summary(self) -> str:
+        return ", ".join(f"{label}={c['read']}r/{c['write']}w" for label, c in self.counts.items())
+
+
+def seed() -> None:
+    """Creates the schema on the primary and copies it to the replica."""
+    Base.metadata.create_all(bind=main.engine)
+    db = main.SessionLocal(info={"use_primary": True})
+    db.add_all([
+        User(id=1, username="writer@example.com", password="pw", full_name="Writer"),
+        User(id=2, username="reader@example.com", password="pw", full_name="Reader"),
+        Category(id=1, name="Groceries"),
+    ])
+    db.add_all([
+        Transaction(user_id=user_id, amount_cents=1000, category_id=1,
+                    description="Seeded", transaction_date=date(2024, 1, 1))
+        for user_id in (1, 2)
+    ])
+    db.commit()
+    db.close()
+    main.engine.dispose()
+    shutil.copyfile(PRIMARY_PATH, REPLICA_PATH)
+
+
+def main_check() -> int:
+    seed()
+    counter = StatementCounter({"primary": main.engine, "replica": main.replica_engines[0]})
+
+    # Session level: reads bind to the replica, a flush moves the session to the primary.
+    db = main.SessionLocal()
+    main.get_user_by_username(db, "writer@example.com")
+    check("session reads use the replica", counter.counts["replica"]["read"] > 0 and counter.counts["primary"]["read"] == 0,
+          counter.summary())
+    counter.reset()
+    db.add(Transaction(user_id=1, amount_cents=1, category_id=1, description="Rolled back",
+                       transaction_date=date(2024, 1, 2)))
+    db.flush()
+    rows = main.get_transactions_by_owner(db, owner_id=1)
+    check("writes go to the primary", counter.counts["primary"]["write"] > 0 and counter.counts["replica"]["write"] == 0,
+          counter.summary())
+    check("session reads its own flush", any(row.description == "Rolled back" for row in rows))
+    db.rollback()
+    db.close()
+
+    with TestClient(main.app) as client:
+        def login(username):
+            response = client.post("/api/v1/login", data={"username": username, "password": "pw"})
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        counter.reset()
+        writer, reader = login("writer@example.com"), login("reader@example.com")
+        client.get("/api/v1/transactions", headers=writer)
+        client.get("/api/v1/transactions/metrics", headers=writer)
+        check("logins, lists and metrics read the replica",
+              counter.counts["primary"]["read"] == 0 and counter.counts["replica"]["read"] > 0, counter.summary())
+
+        counter.reset()
+        response = client.post("/api/v1/transactions", headers=writer,
+                               json={"amount": "12.34", "category": "Groceries", "description": "Fresh write"})
+        check("ingestion succeeds", response.status_code == 201, str(response.status_code))
+        check("ingestion writes the primary only",
+              counter.counts["primary"]["write"] > 0 and counter.counts["replica"]["write"] == 0, counter.summary())
+
+        counter.reset()
+        descriptions = [row["description"] for row in client.get("/api/v1/transactions", headers=writer).json()]
+        total = client.get("/api/v1/transactions/metrics", headers=writer).json()["total_spent"]
+        check("writer sees their own write right away", "Fresh write" in descriptions and round(total, 2) == 22.34,
+              f"total={total}")
+        check("writer reads stick to the primary", counter.counts["replica"]["read"] == 0, counter.summary())
+
+        counter.reset()
+        client.get("/api/v1/transactions", headers=reader)
+        check("other users keep reading the replica", counter.counts["primary"]["read"] == 0, counter.summary())
+
+        time.sleep(STICKY_SECONDS + 0.2)
+        counter.reset()
+        descriptions = [row["description"] for row in client.get("/api/v1/transactions", headers=writer).json()]
+        check("writer returns to the replica after the window",
+              counter.counts["primary"]["read"] == 0 and "Fresh write" not in descriptions, counter.summary())
+
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+    print(f"\n{len(failures)} check(s) failed" if failures else "\nAll routing checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,262 @@
+"""
+Checks user-sharded storage and the resharding tool against several local
+databases, for each shard count in --shards (default 1, 2 and 3). Per count it:
+
+  1. seeds users, transactions and a monthly budget per user into the
+     directory (an unsharded install),
+  2. runs scripts.reshard and checks that every user's rows sit on the shard
+     the ring picks, nothing was lost, and the API (login, transactions,
+     metrics, snapshot, ingestion with a new category, budget totals and
+     alerts) answers from that shard,
+  3. adds a shard, reshards, and checks that only users whose ring position
+     now falls to the new shard moved, and only onto it,
+  4. removes that shard again with --drain and re-checks.
+
+Each step runs in its own interpreter, since main.py builds its engines from
+the environment at import time. By default every database is a SQLite file in
+a temporary directory. With --url-template the databases are
+`template.format(name=...)` for the names directory, s0, s1, ...; they must
+exist with db/init.sql applied, and their contents are replaced.
+
+Run from the backend directory:
+    python -m scripts.check_sharding
+    python -m scripts.check_sharding --shards 2,4 \\
+        --url-template "postgresql://postgres@/shardcheck_{name}?host=/tmp/pgdata"
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+USERS = 200
+TRANSACTIONS_PER_USER = 5
+CATEGORIES = ["Groceries", "Dining", "Travel"]
+BUDGET_LIMIT_CENTS = 100
+
+
+def database_urls(template: str, shard_count: int) -> dict:
+    return {name: template.format(name=name) for name in ["directory", *(f"s{i}" for i in range(shard_count))]}
+
+
+def shard_spec(urls: dict, shard_count: int) -> str:
+    return ",".join(f"s{i}={urls[f's{i}']}" for i in range(shard_count))
+
+
+# ---------------------------------------------------------------------------
+# Steps (run in a subprocess with the shard layout in the environment)
+# ---------------------------------------------------------------------------
+
+failures = []
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail else ""))
+    if not ok:
+        failures.append(name)
+
+
+def seed_step(workdir: Path) -> None:
+    """Resets every database and loads the users, their transactions and budgets into the directory."""
+    from sqlalchemy import text
+
+    import main
+    from main import Base, Budget, Category, Transaction, User
+
+    for db_engine in [main.engine, *main.shard_engines.values()]:
+        if db_engine.dialect.name == "postgresql":
+            with db_engine.begin() as connection:
+                connection.execute(text("TRUNCATE transactions, dashboard_snapshots, users, categories "
+                                        "RESTART IDENTITY CASCADE"))
+        else:
+            Base.metadata.drop_all(bind=db_engine)
+            Base.metadata.create_all(bind=db_engine)
+
+    rng = random.Random(44)
+    expected = {}
+    db = main.SessionLocal(info={"use_primary": True})
+    month_start, _ = main.budget_period_bounds(date.today(), "month")
+    categories = [Category(name=name) for name in CATEGORIES]
+    db.add_all(categories)
+    db.flush()
+    for user_id in range(1, USERS + 1):
+        username = f"user{user_id}@example.com"
+        db.add(User(id=user_id, username=username, password="pw", full_name=f"User {user_id}"))
+        # The models declare no relationships, so flush the user before rows that reference it.
+        db.flush()
+        amounts = [rng.randint(100, 10000) for _ in range(TRANSACTIONS_PER_USER)]
+        db.add_all([Transaction(user_id=user_id, amount_cents=cents, category_id=rng.choice(categories).id,
+                                description=f"Seeded {index}", transaction_date=date(2024, 1, 1) + timedelta(days=index))
+                    for index, cents in enumerate(amounts)])
+        # Overall and small enough that the first routed $1.00 reaches it; the seeded rows are from 2024.
+        db.add(Budget(user_id=user_id, period="month", limit_cents=BUDGET_LIMIT_CENTS, period_start=month_start))
+        expected[username] = {"id": user_id, "count": len(amounts), "cents": sum(amounts), "budget_cents": 0}
+    db.commit()
+    db.close()
+    (workdir / "expected.json").write_text(json.dumps(expected))
+
+
+def verify_step(workdir: Path, api_users: int) -> None:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func
+
+    import main
+    from main import Budget, Category, Transaction, User
+
+    expected = json.loads((workdir / "expected.json").read_text())
+    placement_file = workdir / "placement.json"
+    previous = json.loads(placement_file.read_text()) if placement_file.exists() else None
+
+    counts, budgets, versions = {}, {}, {}
+    for name, factory in [("directory", main.SessionLocal), *main.shard_sessions.items()]:
+        with factory() as db:
+            versions[name] = dict(db.query(User.id, User.data_version).all())
+            counts[name] = dict(db.query(Transaction.user_id, func.count(Transaction.id))
+                                .group_by(Transaction.user_id).all())
+            budgets[name] = dict(db.query(Budget.user_id, Budget.spent_cents).all())
+    check("the directory holds no transactions", not counts.pop("directory"))
+    check("the directory holds no budgets", not budgets.pop("directory"))
+
+    placement = {username: main.shard_router.shard_for(user["id"]) for username, user in expected.items()}
+    misplaced = [username for username, user in expected.items()
+                 if any(user["id"] in rows for name, rows in counts.items() if name != placement[username])]
+    check("every user's rows are on their ring shard only", not misplaced, f"{len(misplaced)} misplaced")
+    lost = [username for username, user in expected.items()
+            if counts[placement[username]].get(user["id"], 0) != user["count"]]
+    check("no transaction was lost or duplicated", not lost, f"{len(lost)} users differ")
+    stray = [username for username, user in expected.items()
+             if budgets[placement[username]].get(user["id"]) != user["budget_cents"]
+             or any(user["id"] in rows for name, rows in budgets.items() if name != placement[username])]
+    check("every budget moved with its running total", not stray, f"{len(stray)} users differ")
+    spread = {name: sum(1 for shard in placement.values() if shard == name) for name in main.shard_sessions}
+    print(f"      users per shard: {spread}")
+
+    current = {username: versions[placement[username]][user["id"]] for username, user in expected.items()}
+    if previous is not None:
+        moved = {username for username, shard in placement.items() if previous[username] != shard}
+        gained = set(placement.values()) - set(previous.values())
+        lost_shards = set(previous.values()) - set(placement.values())
+        ok = all(placement[username] in gained or previous[username] in lost_shards for username in moved)
+        check("only users of the added or removed shard moved", ok,
+              f"{len(moved)}/{len(placement)} moved")
+        # Moved users must not reuse a version that earlier ETags and exports were labelled with.
+        reused = [username for username in moved if current[username] <= expected[username]["version"]]
+        check("moved users' data_version advanced past the source's", not reused, f"{len(reused)} reused")
+    placement_file.write_text(json.dumps(placement))
+
+    with TestClient(main.app) as client:
+        for username in list(expected)[:api_users]:
+            user = expected[username]
+            response = client.post("/api/v1/login", data={"username": username, "password": "pw"})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            rows = client.get("/api/v1/transactions", headers=headers).json()
+            metrics = client.get("/api/v1/transactions/metrics", headers=headers).json()
+            snapshot = client.get("/api/v1/dashboard/snapshot", headers=headers)
+            check(f"{username} reads their data from {placement[username]}",
+                  len(rows) == user["count"] and round(metrics["total_spent"] * 100) == user["cents"]
+                  and snapshot.status_code == 200, f"rows={len(rows)} total={metrics['total_spent']}")
+
+            category = f"Sharded {username}"
+            description = f"Routed #{user['count']}"
+            response = client.post("/api/v1/transactions", headers=headers,
+                                   json={"amount": "1.00", "category": category, "description": description})
+            with main.SessionLocal() as directory, main.user_session(user["id"]) as shard:
+                directory_id = directory.query(Category.id).filter(Category.name == category).scalar()
+                shard_id = shard.query(Category.id).filter(Category.name == category).scalar()
+                landed = shard.query(Transaction).filter(Transaction.user_id == user["id"],
+                                                         Transaction.description == description).count()
+            check(f"{username} writes to {placement[username]} with the directory's category id",
+                  response.status_code == 201 and landed == 1 and directory_id is not None and shard_id == directory_id,
+                  f"status={response.status_code} ids={directory_id}/{shard_id}")
+            user["count"] += 1
+            user["cents"] += 100
+            user["budget_cents"] += 100
+            with main.user_session(user["id"]) as shard:
+                current[username] = shard.get(User, user["id"]).data_version
+
+            budget = client.get("/api/v1/budgets", headers=headers).json()[0]
+            alerts = client.get("/api/v1/alerts", headers=headers).json()
+            check(f"{username}'s budget total and alert follow the write on {placement[username]}",
+                  round(budget["spent"] * 100) == user["budget_cents"] and len(alerts) == 1,
+                  f"spent={budget['spent']} alerts={len(alerts)}")
+    for username, version in current.items():
+        expected[username]["version"] = version
+    (workdir / "expected.json").write_text(json.dumps(expected))
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def run(args: list, env: dict) -> bool:
+    result = subprocess.run([sys.executable, "-m", *args], cwd=BACKEND_DIR, env=env)
+    return result.returncode == 0
+
+
+def check_shard_count(template: str, shard_count: int, api_users: int) -> bool:
+    workdir = Path(tempfile.mkdtemp(prefix=f"shard-check-{shard_count}-"))
+    template = template.replace("{workdir}", str(workdir))
+    urls = database_urls(template, shard_count + 1)
+
+    def env_for(count: int) -> dict:
+        return {**os.environ, "DATABASE_URL": urls["directory"], "DATABASE_SHARD_URLS": shard_spec(urls, count),
+                "DATABASE_REPLICA_URLS": "", "CHANGE_FEED": "memory", "SNAPSHOT_REFRESH_INTERVAL_SECONDS": "0",
+                "SECRET_KEY": os.environ.get("SECRET_KEY", "shard-check")}
+
+    def step(name: str, count: int) -> list:
+        return ["scripts.check_sharding", "--step", name, "--workdir", str(workdir), "--api-users", str(api_users)], env_for(count)
+
+    drain = f"s{shard_count}={urls[f's{shard_count}']}"
+    plan = [
+        # Seeding resets every database, including the shard added later.
+        (f"seed the directory ({USERS} users)", *step("seed", shard_count + 1)),
+        (f"reshard onto {shard_count} shard(s)", ["scripts.reshard"], env_for(shard_count)),
+        (f"verify {shard_count} shard(s)", *step("verify", shard_count)),
+        (f"grow to {shard_count + 1} shards", ["scripts.reshard"], env_for(shard_count + 1)),
+        (f"verify {shard_count + 1} shards", *step("verify", shard_count + 1)),
+        (f"drain s{shard_count}", ["scripts.reshard", "--drain", drain], env_for(shard_count)),
+        (f"verify {shard_count} shard(s) after the drain", *step("verify", shard_count)),
+    ]
+    ok = True
+    for title, args, env in plan:
+        print(f"\n-- {title}")
+        if not run(args, env):
+            print(f"FAIL  {title}")
+            ok = False
+            break
+    shutil.rmtree(workdir, ignore_errors=True)
+    return ok
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="1,2,3", help="comma-separated shard counts to check")
+    parser.add_argument("--url-template", default="sqlite:///{workdir}/{name}.db")
+    parser.add_argument("--api-users", type=int, default=5, help="users to exercise through the API per step")
+    parser.add_argument("--step", choices=["seed", "verify"], help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step == "seed":
+        seed_step(Path(args.workdir))
+        return 0
+    if args.step == "verify":
+        verify_step(Path(args.workdir), args.api_users)
+        return 1 if failures else 0
+
+    results = {count: check_shard_count(args.url_template, int(count), args.api_users)
+               for count in args.shards.split(",")}
+    print("\n== matrix ==")
+    for count, ok in results.items():
+        print(f"{'PASS' if ok else 'FAIL'}  {count} shard(s)")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
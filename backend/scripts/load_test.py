@@ -0,0 +1,121 @@
+"""
+Load test for admission control against a running backend.
+
+Runs two phases of --duration seconds each:
+  baseline  cheap traffic only (GET /users/me at --cheap-rate per second)
+  overload  the same cheap traffic plus --heavy-workers clients sending
+            POST /transactions/metrics/batch back to back, backing off for
+            Retry-After when shed (unless --ignore-retry-after)
+For each phase and endpoint it reports latency percentiles and the mix of
+status codes. Cheap p95/p99 should stay flat while heavy requests are shed
+with 429 (rate limit) or 503 (concurrency limit / statement timeout).
+
+Run from the backend directory:
+    python -m scripts.load_test --base-url http://localhost:8000/api/v1 \
+        --cheap-user john.doe@example.com --heavy-user charlie@example.com
+"""
+import argparse
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+# Twelve monthly windows: the most expensive batch request a client can send.
+HEAVY_BODY = {"windows": [
+    {"start_date": f"{2025 - (m // 12)}-{12 - m % 12:02d}-01", "end_date": f"{2025 - (m // 12)}-{12 - m % 12:02d}-28"}
+    for m in range(12)
+]}
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    response = requests.post(f"{base_url}/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, status: int) -> None:
+        with self.lock:
+            self.statuses[endpoint][status] += 1
+            if status == 200:
+                self.latencies[endpoint].append(seconds * 1000)
+
+    def report(self, phase: str) -> None:
+        for endpoint, statuses in sorted(self.statuses.items()):
+            latencies = sorted(self.latencies[endpoint]) or [float("nan")]
+            pct = lambda p: latencies[int(p * (len(latencies) - 1))]
+            codes = " ".join(f"{code}={count}" for code, count in sorted(statuses.items()))
+            print(f"{phase:<9} {endpoint:<7} ok p50={statistics.median(latencies):8.1f} ms  "
+                  f"p95={pct(0.95):8.1f} ms  p99={pct(0.99):8.1f} ms  [{codes}]")
+
+
+def cheap_client(base_url: str, token: str, rate: float, stop: threading.Event, recorder: Recorder) -> None:
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    interval = 1 / rate
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = session.get(f"{base_url}/users/me")
+        recorder.record("cheap", time.perf_counter() - started, response.status_code)
+        next_at += interval
+        stop.wait(max(0.0, next_at - time.perf_counter()))
+
+
+def heavy_client(base_url: str, token: str, respect_retry_after: bool, stop: threading.Event,
+                 recorder: Recorder) -> None:
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = session.post(f"{base_url}/transactions/metrics/batch", json=HEAVY_BODY)
+        recorder.record("heavy", time.perf_counter() - started, response.status_code)
+        if respect_retry_after and "Retry-After" in response.headers:
+            stop.wait(float(response.headers["Retry-After"]))
+
+
+def run_phase(label: str, duration: float, targets: list) -> None:
+    stop = threading.Event()
+    recorder = Recorder()
+    threads = [threading.Thread(target=target, args=(*args, stop, recorder), daemon=True)
+               for target, args in targets]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    recorder.report(label)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--cheap-user", default="john.doe@example.com")
+    parser.add_argument("--heavy-user", default="charlie@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--cheap-rate", type=float, default=8.0, help="cheap requests per second")
+    parser.add_argument("--heavy-workers", type=int, default=32)
+    parser.add_argument("--ignore-retry-after", action="store_true",
+                        help="heavy clients retry immediately when shed")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per phase")
+    args = parser.parse_args()
+
+    cheap_token = login(args.base_url, args.cheap_user, args.password)
+    heavy_token = login(args.base_url, args.heavy_user, args.password)
+    cheap = (cheap_client, (args.base_url, cheap_token, args.cheap_rate))
+    heavy = (heavy_client, (args.base_url, heavy_token, not args.ignore_retry_after))
+
+    run_phase("baseline", args.duration, [cheap])
+    run_phase("overload", args.duration, [cheap] + [heavy] * args.heavy_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Places every user's data on the shard the ring assigns them to.
+
+Run it after creating the shard databases (db/init.sql), after changing
+DATABASE_SHARD_URLS (adding, removing or renaming shards), and after adding
+users to the directory. For each user in the directory (DATABASE_URL) it:
+
+  * copies the users row onto the user's shard if it is missing there,
+  * moves the user's transactions, budgets and budget alerts from any other
+    database that holds them to that shard: the directory (moving off an
+    unsharded install), the other configured shards, and the databases given
+    with --drain (shards being removed from DATABASE_SHARD_URLS),
+  * drops the user's dashboard snapshot on the source; the snapshot job
+    rebuilds it on the shard.
+
+Categories the moved rows use are copied with their directory ids. Moved
+rows get new ids on their shard. They are inserted with the shard's
+transaction triggers off, so they are not announced on the change feed as new
+transactions. The user's data_version on the shard ends up past the source's
+instead, so cached ETags and exports of the old data go stale. A user's rows
+are committed on the shard before they are deleted from the source, so pause
+writes while it runs: if it stops in between, the user's rows are on both
+databases.
+
+Run from the backend directory with the new DATABASE_SHARD_URLS set:
+    python -m scripts.reshard --dry-run
+    python -m scripts.reshard --drain old3=postgresql://.../analytics_3
+"""
+import argparse
+from collections import Counter
+from typing import Dict, List
+
+from sqlalchemy import case, create_engine, func, text
+from sqlalchemy.orm import Session, sessionmaker
+
+import main
+from main import Budget, BudgetAlert, DashboardSnapshot, Transaction, User
+
+BATCH_SIZE = 5000
+
+
+def copy_user(shard: Session, user: User) -> None:
+    if shard.get(User, user.id) is None:
+        shard.add(User(id=user.id, username=user.username, password=user.password, full_name=user.full_name,
+                       data_version=user.data_version))
+        shard.flush()
+
+
+def advance_data_version(source: Session, shard: Session, user_id: int) -> None:
+    """
+    Moves the user's data_version on the shard past the one on the source.
+    Versions already handed out (in ETags, snapshots and Parquet export names)
+    then never come back for different data.
+    """
+    source_version = source.query(User.data_version).filter(User.id == user_id).scalar() or 0
+    shard.query(User).filter(User.id == user_id).update(
+        {User.data_version: case((User.data_version > source_version, User.data_version), else_=source_version) + 1},
+        synchronize_session=False)
+
+
+def copy_budgets(source: Session, shard: Session, user_id: int) -> None:
+    """Copies the user's budgets, with their running totals, and their alerts onto the shard."""
+    for budget in source.query(Budget).filter(Budget.user_id == user_id).all():
+        if budget.category_id is not None:
+            main.copy_category_to_shard(shard, budget.category_id, main.get_category_name(source, budget.category_id))
+        copy = Budget(user_id=user_id, category_id=budget.category_id, period=budget.period,
+                      limit_cents=budget.limit_cents, period_start=budget.period_start,
+                      spent_cents=budget.spent_cents, created_at=budget.created_at)
+        shard.add(copy)
+        shard.flush()
+        shard.add_all([BudgetAlert(budget_id=copy.id, user_id=user_id, period_start=alert.period_start,
+                                   spent_cents=alert.spent_cents, triggered_at=alert.triggered_at)
+                       for alert in source.query(BudgetAlert).filter(BudgetAlert.budget_id == budget.id)])
+
+
+def move_user_data(source: Session, shard: Session, user_id: int) -> int:
+    """
+    Copies the user's transactions and budgets onto the shard (committed), then
+    deletes them from the source.
+    Returns:
+        The number of transactions moved.
+    """
+    copy_budgets(source, shard, user_id)
+    postgres = shard.get_bind().dialect.name == "postgresql"
+    if postgres:
+        # Keeps the copies off the change feed; data_version is advanced below.
+        shard.execute(text("ALTER TABLE transactions DISABLE TRIGGER USER"))
+    moved, last_id = 0, 0
+    while True:
+        rows = (source.query(Transaction).filter(Transaction.user_id == user_id, Transaction.id > last_id)
+                .order_by(Transaction.id).limit(BATCH_SIZE).all())
+        if not rows:
+            break
+        for category_id in {row.category_id for row in rows}:
+            main.copy_category_to_shard(shard, category_id, main.get_category_name(source, category_id))
+        shard.add_all([Transaction(user_id=user_id, amount_cents=row.amount_cents, category_id=row.category_id,
+                                   description=row.description, transaction_date=row.transaction_date)
+                       for row in rows])
+        shard.flush()
+        moved += len(rows)
+        last_id = rows[-1].id
+    if postgres:
+        shard.execute(text("ALTER TABLE transactions ENABLE TRIGGER USER"))
+    advance_data_version(source, shard, user_id)
+    shard.commit()
+    source.query(Transaction).filter(Transaction.user_id == user_id).delete(synchronize_session=False)
+    source.query(DashboardSnapshot).filter(DashboardSnapshot.user_id == user_id).delete(synchronize_session=False)
+    source.query(BudgetAlert).filter(BudgetAlert.user_id == user_id).delete(synchronize_session=False)
+    source.query(Budget).filter(Budget.user_id == user_id).delete(synchronize_session=False)
+    source.commit()
+    return moved
+
+
+def reshard(drain: Dict[str, str], dry_run: bool = False) -> Dict[str, int]:
+    """
+    Returns:
+        Counts of users placed and moved, and of transactions moved.
+    """
+    if main.shard_router is None:
+        raise SystemExit("DATABASE_SHARD_URLS is not set; there is nothing to reshard")
+    sources = {"directory": main.SessionLocal(info={"use_primary": True})}
+    sources.update({name: factory() for name, factory in main.shard_sessions.items()})
+    sources.update({name: sessionmaker(bind=create_engine(url))() for name, url in drain.items()})
+    stats = Counter()
+    try:
+        directory = sources["directory"]
+        for user in directory.query(User).order_by(User.id).all():
+            target = main.shard_router.shard_for(user.id)
+            shard = sources[target]
+            if not dry_run:
+                copy_user(shard, user)
+                shard.commit()
+                stats["users placed"] += 1
+            for name, source in sources.items():
+                if name == target:
+                    continue
+                count = (source.query(func.count(Transaction.id))
+                         .filter(Transaction.user_id == user.id).scalar())
+                budgets = source.query(func.count(Budget.id)).filter(Budget.user_id == user.id).scalar()
+                if not count and not budgets:
+                    continue
+                print(f"{user.username}: {count} transaction(s), {budgets} budget(s) {name} -> {target}")
+                stats["users moved"] += 1
+                if not dry_run:
+                    stats["transactions moved"] += move_user_data(source, shard, user.id)
+    finally:
+        for session in sources.values():
+            session.close()
+    return dict(stats)
+
+
+def parse_drain(values: List[str]) -> Dict[str, str]:
+    return {name: url for name, _, url in (value.partition("=") for value in values)}
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drain", action="append", default=[], metavar="NAME=URL",
+                        help="a database leaving the ring; its users' rows are moved off it")
+    parser.add_argument("--dry-run", action="store_true", help="only list the moves")
+    args = parser.parse_args()
+    stats = reshard(parse_drain(args.drain), dry_run=args.dry_run)
+    print(", ".join(f"{name}: {count}" for name, count in stats.items()) or "Nothing to move")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -3,6 +3,11 @@
 -- the SQL commands in this file.
 -- We will add table creation and data insertion scripts here later. 
 
+-- Trigram matching for description search; btree_gin lets the same GIN
+-- index also hold user_id.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
 -- =================================================================
 --  Create the 'users' table
 -- =================================================================
@@ -14,31 +19,310 @@ CREATE TABLE users (
     age_bracket VARCHAR(20),
     location VARCHAR(50),
     employment_status VARCHAR(30),
+    data_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- =================================================================
+--  Create the 'categories' table
+-- =================================================================
+-- Category names are stored once here; transactions reference them by
+-- a 2-byte id instead of repeating the string on every row and index
+-- entry.
+CREATE TABLE categories (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL
+);
+
 -- =================================================================
 --  Create the 'transactions' table
 -- =================================================================
+-- Range-partitioned by month on transaction_date so date-filtered
+-- queries only scan the months they cover. The partition key must be
+-- part of the primary key.
 CREATE TABLE transactions (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER NOT NULL,
-    amount NUMERIC(10, 2) NOT NULL,
-    category VARCHAR(50) NOT NULL,
+    -- Exact money in integer cents; SUM(integer) accumulates natively in int8.
+    amount_cents INTEGER NOT NULL,
+    category_id SMALLINT NOT NULL,
     description VARCHAR(255),
     transaction_date DATE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     
+    PRIMARY KEY (id, transaction_date),
     CONSTRAINT fk_user
         FOREIGN KEY(user_id) 
         REFERENCES users(id)
-        ON DELETE CASCADE
+        ON DELETE CASCADE,
+    CONSTRAINT fk_category
+        FOREIGN KEY(category_id)
+        REFERENCES categories(id)
+) PARTITION BY RANGE (transaction_date);
+
+-- Catches rows outside the managed months until their partition exists.
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+
+-- =================================================================
+--  Indexes on 'transactions'
+-- =================================================================
+-- Every API query filters on user_id plus a date range and/or category
+-- list. The INCLUDE columns let the metrics aggregates run as
+-- index-only scans. Keep in sync with Transaction.__table_args__ in
+-- backend/main.py.
+CREATE INDEX ix_transactions_user_date
+    ON transactions (user_id, transaction_date) INCLUDE (amount_cents, category_id);
+CREATE INDEX ix_transactions_user_category_date
+    ON transactions (user_id, category_id, transaction_date) INCLUDE (amount_cents);
+
+-- Description search: ILIKE substring and pg_trgm word-similarity (%>)
+-- matches for one user.
+CREATE INDEX ix_transactions_user_description_trgm
+    ON transactions USING gin (user_id, description gin_trgm_ops);
+
+-- =================================================================
+--  Create the 'dashboard_snapshots' table
+-- =================================================================
+-- Each user's unfiltered dashboard (metrics, per-day category totals,
+-- filter bounds) as compact JSON, built by the backend's snapshot job.
+-- A snapshot is current while its data_version matches the user's.
+CREATE TABLE dashboard_snapshots (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    data_version INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc')
+);
+
+-- =================================================================
+--  Create the 'budgets' and 'budget_alerts' tables
+-- =================================================================
+-- A budget caps one user's spending per week or month, in one category
+-- or (category_id NULL) overall. spent_cents is the running total for
+-- the period starting at period_start; the backend adds each new
+-- transaction to it instead of re-summing the history. Crossing the
+-- limit records one budget_alerts row per budget and period.
+CREATE TABLE budgets (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    category_id SMALLINT REFERENCES categories(id),
+    period VARCHAR(10) NOT NULL CHECK (period IN ('week', 'month')),
+    limit_cents INTEGER NOT NULL CHECK (limit_cents > 0),
+    period_start DATE NOT NULL,
+    spent_cents BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc')
 );
 
+-- One budget per user, category (or overall) and period length.
+CREATE UNIQUE INDEX ux_budgets_user_category_period
+    ON budgets (user_id, COALESCE(category_id, 0), period);
+
+CREATE TABLE budget_alerts (
+    id SERIAL PRIMARY KEY,
+    budget_id INTEGER NOT NULL REFERENCES budgets(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    period_start DATE NOT NULL,
+    spent_cents BIGINT NOT NULL,
+    triggered_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc'),
+    UNIQUE (budget_id, period_start)
+);
+
+CREATE INDEX ix_budget_alerts_user_triggered ON budget_alerts (user_id, triggered_at);
+
+-- =================================================================
+--  Partition management
+-- =================================================================
+-- Monthly partitions are named transactions_pYYYY_MM. The backend calls
+-- ensure_transaction_partitions() at startup and daily; rows that landed
+-- in the default partition are moved into their month when it is created.
+CREATE FUNCTION ensure_transaction_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    from_month DATE DEFAULT date_trunc('month', CURRENT_DATE)::date
+) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    -- Serialize concurrent callers (e.g. several backend workers starting up).
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_transaction_partitions'));
+
+    WHILE month_start <= last_month LOOP
+        partition_name := format('transactions_p%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                           partition_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM transactions_default
+                                WHERE transaction_date >= %L AND transaction_date < %L
+                                RETURNING *)
+                 INSERT INTO %I SELECT * FROM moved',
+                month_start, (month_start + INTERVAL '1 month')::date, partition_name);
+            EXECUTE format('ALTER TABLE transactions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, (month_start + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detaches monthly partitions that ended more than retain_months ago and
+-- moves them to the 'archive' schema, where they can be dumped or dropped.
+CREATE FUNCTION archive_transaction_partitions(retain_months INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => retain_months))::date;
+    partition RECORD;
+    archived INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_transaction_partitions'));
+    CREATE SCHEMA IF NOT EXISTS archive;
+
+    FOR partition IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'transactions'
+          AND child.relname ~ '^transactions_p\d{4}_\d{2}$'
+          AND to_date(substring(child.relname from 15), 'YYYY_MM') < cutoff
+    LOOP
+        EXECUTE format('ALTER TABLE transactions DETACH PARTITION %I', partition.relname);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', partition.relname);
+        archived := archived + 1;
+    END LOOP;
+    RETURN archived;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =================================================================
+--  Per-user data version
+-- =================================================================
+-- Every write to 'transactions' bumps the owner's users.data_version.
+-- The API derives its ETags from it, so conditional requests can be
+-- answered without re-running any transaction query. Statement-level
+-- triggers keep bulk loads to one UPDATE per affected user.
+CREATE FUNCTION bump_user_data_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE users SET data_version = data_version + 1
+        WHERE id IN (SELECT DISTINCT user_id FROM new_rows);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE users SET data_version = data_version + 1
+        WHERE id IN (SELECT DISTINCT user_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_bump_version_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_bump_version_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_bump_version_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+-- =================================================================
+--  Live change feed
+-- =================================================================
+-- Each new transaction is published on the 'transactions' channel
+-- (delivered on commit). The backend listens when CHANGE_FEED=postgres
+-- and pushes the row to the owner's open dashboards.
+CREATE FUNCTION notify_transaction_insert() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('transactions', json_build_object(
+        'id', NEW.id,
+        'user_id', NEW.user_id,
+        'amount', round(NEW.amount_cents / 100.0, 2),
+        'category', (SELECT name FROM categories WHERE id = NEW.category_id),
+        'description', NEW.description,
+        'transaction_date', NEW.transaction_date
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_notify_insert
+    AFTER INSERT ON transactions
+    FOR EACH ROW EXECUTE FUNCTION notify_transaction_insert();
+
+-- =================================================================
+--  Budget running totals
+-- =================================================================
+-- New transactions dated in a budget's current (UTC) period are added
+-- to its spent_cents, restarting the total when a new period began, and
+-- a budget they take to its limit gets its alert for the period. Bulk
+-- loads update each affected budget once per statement. On other
+-- databases the backend does the same in record_budget_spend.
+CREATE FUNCTION apply_budget_spend() RETURNS TRIGGER AS $$
+BEGIN
+    WITH added AS (
+        SELECT b.id, p.start, sum(n.amount_cents) AS cents
+        FROM budgets b
+        CROSS JOIN LATERAL (
+            SELECT date_trunc(CASE b.period WHEN 'week' THEN 'week' ELSE 'month' END,
+                              NOW() AT TIME ZONE 'utc')::date AS start
+        ) p
+        JOIN new_rows n ON n.user_id = b.user_id
+            AND (b.category_id IS NULL OR b.category_id = n.category_id)
+        WHERE n.transaction_date >= p.start
+          AND n.transaction_date < p.start + CASE b.period WHEN 'week' THEN INTERVAL '1 week'
+                                                          ELSE INTERVAL '1 month' END
+        GROUP BY b.id, p.start
+    ), updated AS (
+        UPDATE budgets b
+        SET spent_cents = CASE WHEN b.period_start < a.start THEN 0 ELSE b.spent_cents END + a.cents,
+            period_start = a.start
+        FROM added a
+        WHERE b.id = a.id
+        RETURNING b.id, b.user_id, b.limit_cents, b.period_start, b.spent_cents, a.cents
+    )
+    INSERT INTO budget_alerts (budget_id, user_id, period_start, spent_cents)
+    SELECT id, user_id, period_start, spent_cents
+    FROM updated
+    WHERE spent_cents - cents < limit_cents AND limit_cents <= spent_cents
+    ON CONFLICT (budget_id, period_start) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_apply_budget_spend
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_budget_spend();
+
 -- =================================================================
 --  (Mock data will be inserted below in the next step)
 -- ================================================================= 
 
+-- Create monthly partitions from the start of the mock data onwards.
+SELECT ensure_transaction_partitions(3, DATE '2025-01-01');
+
+-- =================================================================
+--  Insert Mock Data for 'categories'
+-- =================================================================
+INSERT INTO categories (name) VALUES
+('Dining'),
+('Education'),
+('Entertainment'),
+('Groceries'),
+('Health'),
+('Shopping'),
+('Technology'),
+('Transport'),
+('Travel'),
+('Utilities');
+
 -- =================================================================
 --  Insert Mock Data for 'users'
 -- =================================================================
@@ -47,155 +331,188 @@ INSERT INTO users (id, username, password, full_name, age_bracket, location, emp
 (2, 'jane.doe@example.com', 'password123', 'Jane Doe', '18-24', 'London', 'Student'),
 (3, 'charlie@example.com', 'password123', 'Charlie Williams', '35-44', 'New York', 'Self-Employed');
 
+-- The ids above were explicit, so move the sequence past them.
+SELECT setval('users_id_seq', (SELECT max(id) FROM users));
+
+-- The transaction inserts below name their category; it is resolved to
+-- its id by joining against 'categories'.
+
 -- =================================================================
 --  Insert Mock Data for 'transactions' for John Doe (User ID: 1)
 -- =================================================================
 -- Practical Spender: Groceries, Utilities, Transport
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(1, 75.50, 'Groceries', 'Weekly grocery run', '2025-06-20'),
-(1, 50.00, 'Utilities', 'Electricity bill', '2025-06-15'),
-(1, 25.00, 'Transport', 'Metro card top-up', '2025-06-10'),
-(1, 80.25, 'Groceries', 'Stocking up pantry', '2025-06-05'),
-(1, 120.00, 'Utilities', 'Internet bill', '2025-06-01'),
-(1, 65.40, 'Groceries', 'Farmers market haul', '2025-05-25'),
-(1, 30.00, 'Transport', 'Ride-share to airport', '2025-05-22'),
-(1, 52.30, 'Utilities', 'Water bill', '2025-05-15'),
-(1, 70.00, 'Groceries', 'Groceries for the week', '2025-05-10'),
-(1, 25.00, 'Transport', 'Bus pass', '2025-05-05'),
-(1, 45.10, 'Utilities', 'Gas bill', '2025-05-01'),
-(1, 90.80, 'Groceries', 'Bulk buy at Costco', '2025-04-28'),
-(1, 68.00, 'Groceries', 'Weekly groceries', '2025-04-21'),
-(1, 25.00, 'Transport', 'Subway monthly pass', '2025-04-05'),
-(1, 115.00, 'Utilities', 'Combined utilities', '2025-04-01');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(1, 7550, 'Groceries', 'Weekly grocery run', '2025-06-20'),
+(1, 5000, 'Utilities', 'Electricity bill', '2025-06-15'),
+(1, 2500, 'Transport', 'Metro card top-up', '2025-06-10'),
+(1, 8025, 'Groceries', 'Stocking up pantry', '2025-06-05'),
+(1, 12000, 'Utilities', 'Internet bill', '2025-06-01'),
+(1, 6540, 'Groceries', 'Farmers market haul', '2025-05-25'),
+(1, 3000, 'Transport', 'Ride-share to airport', '2025-05-22'),
+(1, 5230, 'Utilities', 'Water bill', '2025-05-15'),
+(1, 7000, 'Groceries', 'Groceries for the week', '2025-05-10'),
+(1, 2500, 'Transport', 'Bus pass', '2025-05-05'),
+(1, 4510, 'Utilities', 'Gas bill', '2025-05-01'),
+(1, 9080, 'Groceries', 'Bulk buy at Costco', '2025-04-28'),
+(1, 6800, 'Groceries', 'Weekly groceries', '2025-04-21'),
+(1, 2500, 'Transport', 'Subway monthly pass', '2025-04-05'),
+(1, 11500, 'Utilities', 'Combined utilities', '2025-04-01')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- =================================================================
 --  Insert Mock Data for 'transactions' for Jane Doe (User ID: 2)
 -- =================================================================
 -- Social Spender: Dining, Entertainment, Transport
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(2, 45.00, 'Dining', 'Dinner with friends', '2025-06-22'),
-(2, 30.00, 'Entertainment', 'Movie tickets', '2025-06-18'),
-(2, 15.50, 'Transport', 'Ride-share home', '2025-06-18'),
-(2, 60.75, 'Dining', 'Brunch spot', '2025-06-12'),
-(2, 22.00, 'Entertainment', 'Concert ticket fee', '2025-06-08'),
-(2, 55.00, 'Dining', 'Takeout pizza', '2025-06-02'),
-(2, 75.00, 'Entertainment', 'Video game purchase', '2025-05-28'),
-(2, 35.20, 'Dining', 'Lunch meeting', '2025-05-20'),
-(2, 18.00, 'Transport', 'Train ticket', '2025-05-16'),
-(2, 50.00, 'Dining', 'Date night dinner', '2025-05-11'),
-(2, 40.00, 'Entertainment', 'Bowling with team', '2025-05-06'),
-(2, 25.80, 'Dining', 'Coffee and pastries', '2025-05-02'),
-(2, 150.00, 'Entertainment', 'Music festival ticket', '2025-04-25'),
-(2, 80.50, 'Dining', 'Birthday dinner celebration', '2025-04-15'),
-(2, 20.00, 'Transport', 'City bike rental', '2025-04-10');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(2, 4500, 'Dining', 'Dinner with friends', '2025-06-22'),
+(2, 3000, 'Entertainment', 'Movie tickets', '2025-06-18'),
+(2, 1550, 'Transport', 'Ride-share home', '2025-06-18'),
+(2, 6075, 'Dining', 'Brunch spot', '2025-06-12'),
+(2, 2200, 'Entertainment', 'Concert ticket fee', '2025-06-08'),
+(2, 5500, 'Dining', 'Takeout pizza', '2025-06-02'),
+(2, 7500, 'Entertainment', 'Video game purchase', '2025-05-28'),
+(2, 3520, 'Dining', 'Lunch meeting', '2025-05-20'),
+(2, 1800, 'Transport', 'Train ticket', '2025-05-16'),
+(2, 5000, 'Dining', 'Date night dinner', '2025-05-11'),
+(2, 4000, 'Entertainment', 'Bowling with team', '2025-05-06'),
+(2, 2580, 'Dining', 'Coffee and pastries', '2025-05-02'),
+(2, 15000, 'Entertainment', 'Music festival ticket', '2025-04-25'),
+(2, 8050, 'Dining', 'Birthday dinner celebration', '2025-04-15'),
+(2, 2000, 'Transport', 'City bike rental', '2025-04-10')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- =================================================================
 --  Insert Mock Data for 'transactions' for Charlie (User ID: 3)
 -- =================================================================
 -- Lifestyle Spender: Shopping, Travel, Health
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(3, 150.00, 'Shopping', 'New sneakers', '2025-06-25'),
-(3, 450.00, 'Travel', 'Flight to Miami', '2025-06-20'),
-(3, 75.00, 'Health', 'Yoga class pack', '2025-06-15'),
-(3, 85.50, 'Shopping', 'Designer shirt', '2025-06-10'),
-(3, 200.00, 'Travel', 'Hotel booking', '2025-06-05'),
-(3, 60.00, 'Health', 'Gym membership', '2025-06-01'),
-(3, 120.75, 'Shopping', 'Skincare products', '2025-05-28'),
-(3, 300.00, 'Travel', 'Weekend getaway', '2025-05-20'),
-(3, 50.00, 'Health', 'Nutritionist consultation', '2025-05-15'),
-(3, 250.00, 'Shopping', 'New headphones', '2025-05-10'),
-(3, 800.00, 'Travel', 'International flight deposit', '2025-05-02'),
-(3, 90.00, 'Health', 'Annual check-up', '2025-04-28'),
-(3, 180.00, 'Shopping', 'Watch repair', '2025-04-20'),
-(3, 95.20, 'Health', 'Massage therapy', '2025-04-12'),
-(3, 400.00, 'Travel', 'Rental car for trip', '2025-04-05');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(3, 15000, 'Shopping', 'New sneakers', '2025-06-25'),
+(3, 45000, 'Travel', 'Flight to Miami', '2025-06-20'),
+(3, 7500, 'Health', 'Yoga class pack', '2025-06-15'),
+(3, 8550, 'Shopping', 'Designer shirt', '2025-06-10'),
+(3, 20000, 'Travel', 'Hotel booking', '2025-06-05'),
+(3, 6000, 'Health', 'Gym membership', '2025-06-01'),
+(3, 12075, 'Shopping', 'Skincare products', '2025-05-28'),
+(3, 30000, 'Travel', 'Weekend getaway', '2025-05-20'),
+(3, 5000, 'Health', 'Nutritionist consultation', '2025-05-15'),
+(3, 25000, 'Shopping', 'New headphones', '2025-05-10'),
+(3, 80000, 'Travel', 'International flight deposit', '2025-05-02'),
+(3, 9000, 'Health', 'Annual check-up', '2025-04-28'),
+(3, 18000, 'Shopping', 'Watch repair', '2025-04-20'),
+(3, 9520, 'Health', 'Massage therapy', '2025-04-12'),
+(3, 40000, 'Travel', 'Rental car for trip', '2025-04-05')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- =================================================================
 --  Additional Mock Data with Higher Spending and New Categories
 -- =================================================================
 
 -- Additional transactions for John Doe (User ID: 1) - Adding Technology and Education categories
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(1, 1299.99, 'Technology', 'New MacBook Pro', '2025-06-28'),
-(1, 199.99, 'Education', 'Online Python course', '2025-06-25'),
-(1, 899.00, 'Technology', 'iPhone 15 Pro', '2025-06-22'),
-(1, 125.00, 'Groceries', 'Premium organic groceries', '2025-06-18'),
-(1, 89.99, 'Technology', 'Wireless earbuds', '2025-06-12'),
-(1, 299.00, 'Education', 'Data Science certification', '2025-06-08'),
-(1, 150.00, 'Utilities', 'High-speed internet upgrade', '2025-06-03'),
-(1, 2499.99, 'Technology', 'Gaming desktop setup', '2025-05-30'),
-(1, 75.50, 'Transport', 'Premium car service', '2025-05-26'),
-(1, 450.00, 'Education', 'AWS certification prep', '2025-05-20'),
-(1, 180.00, 'Groceries', 'Gourmet food shopping', '2025-05-15'),
-(1, 599.00, 'Technology', '4K Monitor', '2025-05-08'),
-(1, 200.00, 'Utilities', 'Smart home devices', '2025-05-02'),
-(1, 350.00, 'Education', 'Machine learning workshop', '2025-04-25'),
-(1, 95.00, 'Transport', 'Premium ride to conference', '2025-04-18');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(1, 129999, 'Technology', 'New MacBook Pro', '2025-06-28'),
+(1, 19999, 'Education', 'Online Python course', '2025-06-25'),
+(1, 89900, 'Technology', 'iPhone 15 Pro', '2025-06-22'),
+(1, 12500, 'Groceries', 'Premium organic groceries', '2025-06-18'),
+(1, 8999, 'Technology', 'Wireless earbuds', '2025-06-12'),
+(1, 29900, 'Education', 'Data Science certification', '2025-06-08'),
+(1, 15000, 'Utilities', 'High-speed internet upgrade', '2025-06-03'),
+(1, 249999, 'Technology', 'Gaming desktop setup', '2025-05-30'),
+(1, 7550, 'Transport', 'Premium car service', '2025-05-26'),
+(1, 45000, 'Education', 'AWS certification prep', '2025-05-20'),
+(1, 18000, 'Groceries', 'Gourmet food shopping', '2025-05-15'),
+(1, 59900, 'Technology', '4K Monitor', '2025-05-08'),
+(1, 20000, 'Utilities', 'Smart home devices', '2025-05-02'),
+(1, 35000, 'Education', 'Machine learning workshop', '2025-04-25'),
+(1, 9500, 'Transport', 'Premium ride to conference', '2025-04-18')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- Additional transactions for Jane Doe (User ID: 2) - Adding Technology and Education categories
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(2, 799.00, 'Technology', 'iPad Pro with accessories', '2025-06-30'),
-(2, 159.99, 'Education', 'Graphic design course', '2025-06-26'),
-(2, 220.00, 'Dining', 'Fine dining experience', '2025-06-23'),
-(2, 1299.99, 'Technology', 'MacBook Air for studies', '2025-06-19'),
-(2, 89.99, 'Entertainment', 'Premium streaming subscriptions', '2025-06-16'),
-(2, 299.00, 'Education', 'Photography masterclass', '2025-06-11'),
-(2, 450.00, 'Technology', 'Professional camera lens', '2025-06-07'),
-(2, 180.00, 'Dining', 'Michelin star restaurant', '2025-06-04'),
-(2, 125.99, 'Entertainment', 'VIP concert tickets', '2025-05-29'),
-(2, 199.99, 'Education', 'Language learning app premium', '2025-05-24'),
-(2, 899.00, 'Technology', 'High-end smartphone', '2025-05-18'),
-(2, 95.50, 'Transport', 'Luxury airport transfer', '2025-05-14'),
-(2, 349.00, 'Entertainment', 'Theater season tickets', '2025-05-09'),
-(2, 250.00, 'Education', 'Creative writing workshop', '2025-05-03'),
-(2, 75.00, 'Dining', 'Wine tasting event', '2025-04-28');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(2, 79900, 'Technology', 'iPad Pro with accessories', '2025-06-30'),
+(2, 15999, 'Education', 'Graphic design course', '2025-06-26'),
+(2, 22000, 'Dining', 'Fine dining experience', '2025-06-23'),
+(2, 129999, 'Technology', 'MacBook Air for studies', '2025-06-19'),
+(2, 8999, 'Entertainment', 'Premium streaming subscriptions', '2025-06-16'),
+(2, 29900, 'Education', 'Photography masterclass', '2025-06-11'),
+(2, 45000, 'Technology', 'Professional camera lens', '2025-06-07'),
+(2, 18000, 'Dining', 'Michelin star restaurant', '2025-06-04'),
+(2, 12599, 'Entertainment', 'VIP concert tickets', '2025-05-29'),
+(2, 19999, 'Education', 'Language learning app premium', '2025-05-24'),
+(2, 89900, 'Technology', 'High-end smartphone', '2025-05-18'),
+(2, 9550, 'Transport', 'Luxury airport transfer', '2025-05-14'),
+(2, 34900, 'Entertainment', 'Theater season tickets', '2025-05-09'),
+(2, 25000, 'Education', 'Creative writing workshop', '2025-05-03'),
+(2, 7500, 'Dining', 'Wine tasting event', '2025-04-28')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- Additional transactions for Charlie (User ID: 3) - Adding Technology and Education categories
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(3, 3499.99, 'Technology', 'High-end gaming laptop', '2025-06-29'),
-(3, 599.00, 'Education', 'Business leadership program', '2025-06-24'),
-(3, 1250.00, 'Shopping', 'Designer suit collection', '2025-06-21'),
-(3, 899.99, 'Technology', 'Professional drone', '2025-06-17'),
-(3, 1200.00, 'Travel', 'Luxury hotel suite', '2025-06-13'),
-(3, 450.00, 'Education', 'Investment strategy course', '2025-06-09'),
-(3, 2200.00, 'Technology', 'Home theater system', '2025-06-06'),
-(3, 180.00, 'Health', 'Premium spa treatment', '2025-06-02'),
-(3, 750.00, 'Shopping', 'Luxury watch', '2025-05-27'),
-(3, 399.99, 'Education', 'Real estate investment course', '2025-05-22'),
-(3, 1500.00, 'Travel', 'First-class flight upgrade', '2025-05-17'),
-(3, 999.00, 'Technology', 'Smart home automation', '2025-05-12'),
-(3, 275.00, 'Health', 'Personal trainer sessions', '2025-05-07'),
-(3, 850.00, 'Shopping', 'Premium luggage set', '2025-05-01'),
-(3, 650.00, 'Education', 'Executive MBA module', '2025-04-26'),
-(3, 320.00, 'Health', 'Advanced health screening', '2025-04-19'),
-(3, 1899.99, 'Technology', 'Professional camera equipment', '2025-04-14'),
-(3, 2500.00, 'Travel', 'Luxury cruise booking', '2025-04-08');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(3, 349999, 'Technology', 'High-end gaming laptop', '2025-06-29'),
+(3, 59900, 'Education', 'Business leadership program', '2025-06-24'),
+(3, 125000, 'Shopping', 'Designer suit collection', '2025-06-21'),
+(3, 89999, 'Technology', 'Professional drone', '2025-06-17'),
+(3, 120000, 'Travel', 'Luxury hotel suite', '2025-06-13'),
+(3, 45000, 'Education', 'Investment strategy course', '2025-06-09'),
+(3, 220000, 'Technology', 'Home theater system', '2025-06-06'),
+(3, 18000, 'Health', 'Premium spa treatment', '2025-06-02'),
+(3, 75000, 'Shopping', 'Luxury watch', '2025-05-27'),
+(3, 39999, 'Education', 'Real estate investment course', '2025-05-22'),
+(3, 150000, 'Travel', 'First-class flight upgrade', '2025-05-17'),
+(3, 99900, 'Technology', 'Smart home automation', '2025-05-12'),
+(3, 27500, 'Health', 'Personal trainer sessions', '2025-05-07'),
+(3, 85000, 'Shopping', 'Premium luggage set', '2025-05-01'),
+(3, 65000, 'Education', 'Executive MBA module', '2025-04-26'),
+(3, 32000, 'Health', 'Advanced health screening', '2025-04-19'),
+(3, 189999, 'Technology', 'Professional camera equipment', '2025-04-14'),
+(3, 250000, 'Travel', 'Luxury cruise booking', '2025-04-08')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- =================================================================
 --  Extra diverse transactions across all users for richer analytics
 -- =================================================================
 
 -- More varied spending patterns for John Doe (practical but upgrading lifestyle)
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(1, 45.99, 'Technology', 'Software subscription', '2025-07-01'),
-(1, 299.99, 'Education', 'Professional certification', '2025-07-03'),
-(1, 150.00, 'Groceries', 'Weekly premium groceries', '2025-07-05'),
-(1, 85.00, 'Transport', 'Monthly transit premium', '2025-07-07'),
-(1, 199.99, 'Technology', 'Smart fitness tracker', '2025-07-10');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(1, 4599, 'Technology', 'Software subscription', '2025-07-01'),
+(1, 29999, 'Education', 'Professional certification', '2025-07-03'),
+(1, 15000, 'Groceries', 'Weekly premium groceries', '2025-07-05'),
+(1, 8500, 'Transport', 'Monthly transit premium', '2025-07-07'),
+(1, 19999, 'Technology', 'Smart fitness tracker', '2025-07-10')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- More entertainment and tech for Jane Doe (student upgrading gear)
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(2, 49.99, 'Technology', 'Cloud storage upgrade', '2025-07-02'),
-(2, 125.00, 'Education', 'Online certification course', '2025-07-04'),
-(2, 89.99, 'Entertainment', 'Gaming subscription bundle', '2025-07-06'),
-(2, 250.00, 'Dining', 'Graduation celebration dinner', '2025-07-08'),
-(2, 399.99, 'Technology', 'Tablet for digital art', '2025-07-11');
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(2, 4999, 'Technology', 'Cloud storage upgrade', '2025-07-02'),
+(2, 12500, 'Education', 'Online certification course', '2025-07-04'),
+(2, 8999, 'Entertainment', 'Gaming subscription bundle', '2025-07-06'),
+(2, 25000, 'Dining', 'Graduation celebration dinner', '2025-07-08'),
+(2, 39999, 'Technology', 'Tablet for digital art', '2025-07-11')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name;
 
 -- More luxury and business expenses for Charlie (high earner)
-INSERT INTO transactions (user_id, amount, category, description, transaction_date) VALUES
-(3, 299.99, 'Technology', 'Premium business software', '2025-07-01'),
-(3, 1500.00, 'Education', 'Executive coaching session', '2025-07-03'),
-(3, 450.00, 'Health', 'Concierge medical service', '2025-07-05'),
-(3, 2200.00, 'Shopping', 'Custom tailored wardrobe', '2025-07-07'),
-(3, 3500.00, 'Travel', 'Private jet charter', '2025-07-09'),
-(3, 899.99, 'Technology', 'Latest smartphone pro max', '2025-07-12'); 
\ No newline at end of file
+INSERT INTO transactions (user_id, amount_cents, category_id, description, transaction_date)
+SELECT v.user_id, v.amount_cents, c.id, v.description, v.transaction_date::date
+FROM categories c JOIN (VALUES
+(3, 29999, 'Technology', 'Premium business software', '2025-07-01'),
+(3, 150000, 'Education', 'Executive coaching session', '2025-07-03'),
+(3, 45000, 'Health', 'Concierge medical service', '2025-07-05'),
+(3, 220000, 'Shopping', 'Custom tailored wardrobe', '2025-07-07'),
+(3, 350000, 'Travel', 'Private jet charter', '2025-07-09'),
+(3, 89999, 'Technology', 'Latest smartphone pro max', '2025-07-12')
+) AS v(user_id, amount_cents, category, description, transaction_date) ON v.category = c.name; 
\ No newline at end of file
@@ -0,0 +1,40 @@
+-- =================================================================
+--  Migration 001: per-user data version for HTTP ETags
+-- =================================================================
+-- init.sql only runs when the Postgres volume is first created. Apply
+-- this file to an existing database to bring it up to the same schema:
+--   psql "$DATABASE_URL" -f db/migrations/001_user_data_version.sql
+BEGIN;
+
+ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0;
+
+CREATE FUNCTION bump_user_data_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE users SET data_version = data_version + 1
+        WHERE id IN (SELECT DISTINCT user_id FROM new_rows);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE users SET data_version = data_version + 1
+        WHERE id IN (SELECT DISTINCT user_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_bump_version_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_bump_version_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_bump_version_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- =================================================================
+--  Migration 002: NOTIFY on new transactions for the live feed
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/002_transaction_notify.sql
+BEGIN;
+
+CREATE FUNCTION notify_transaction_insert() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('transactions', json_build_object(
+        'id', NEW.id,
+        'user_id', NEW.user_id,
+        'amount', NEW.amount,
+        'category', NEW.category,
+        'description', NEW.description,
+        'transaction_date', NEW.transaction_date
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_notify_insert
+    AFTER INSERT ON transactions
+    FOR EACH ROW EXECUTE FUNCTION notify_transaction_insert();
+
+COMMIT;
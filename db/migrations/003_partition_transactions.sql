@@ -0,0 +1,128 @@
+-- =================================================================
+--  Migration 003: monthly range partitioning of 'transactions'
+-- =================================================================
+-- Rebuilds 'transactions' as a partitioned table and copies the
+-- existing rows into monthly partitions. Requires 001 and 002. Takes
+-- an exclusive lock on the table for the duration of the copy.
+--   psql "$DATABASE_URL" -f db/migrations/003_partition_transactions.sql
+BEGIN;
+
+LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE transactions RENAME TO transactions_unpartitioned;
+ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT fk_user TO fk_user_unpartitioned;
+
+CREATE TABLE transactions (
+    id INTEGER NOT NULL DEFAULT nextval('transactions_id_seq'),
+    user_id INTEGER NOT NULL,
+    amount NUMERIC(10, 2) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    description VARCHAR(255),
+    transaction_date DATE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    PRIMARY KEY (id, transaction_date),
+    CONSTRAINT fk_user
+        FOREIGN KEY(user_id)
+        REFERENCES users(id)
+        ON DELETE CASCADE
+) PARTITION BY RANGE (transaction_date);
+
+-- Keep the id sequence alive when the old table is dropped.
+ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id;
+
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+
+CREATE FUNCTION ensure_transaction_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    from_month DATE DEFAULT date_trunc('month', CURRENT_DATE)::date
+) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    -- Serialize concurrent callers (e.g. several backend workers starting up).
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_transaction_partitions'));
+
+    WHILE month_start <= last_month LOOP
+        partition_name := format('transactions_p%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                           partition_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM transactions_default
+                                WHERE transaction_date >= %L AND transaction_date < %L
+                                RETURNING *)
+                 INSERT INTO %I SELECT * FROM moved',
+                month_start, (month_start + INTERVAL '1 month')::date, partition_name);
+            EXECUTE format('ALTER TABLE transactions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, (month_start + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detaches monthly partitions that ended more than retain_months ago and
+-- moves them to the 'archive' schema, where they can be dumped or dropped.
+CREATE FUNCTION archive_transaction_partitions(retain_months INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => retain_months))::date;
+    partition RECORD;
+    archived INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_transaction_partitions'));
+    CREATE SCHEMA IF NOT EXISTS archive;
+
+    FOR partition IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'transactions'
+          AND child.relname ~ '^transactions_p\d{4}_\d{2}$'
+          AND to_date(substring(child.relname from 15), 'YYYY_MM') < cutoff
+    LOOP
+        EXECUTE format('ALTER TABLE transactions DETACH PARTITION %I', partition.relname);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', partition.relname);
+        archived := archived + 1;
+    END LOOP;
+    RETURN archived;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_transaction_partitions(
+    3, COALESCE((SELECT min(transaction_date) FROM transactions_unpartitioned), CURRENT_DATE));
+
+INSERT INTO transactions (id, user_id, amount, category, description, transaction_date, created_at)
+SELECT id, user_id, amount, category, description, transaction_date, created_at
+FROM transactions_unpartitioned;
+
+-- Recreate the triggers from 001 and 002 on the new table; the old ones go
+-- with the old table. They are added after the copy so it neither bumps
+-- data versions nor sends notifications.
+DROP TABLE transactions_unpartitioned;
+
+CREATE TRIGGER transactions_bump_version_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_bump_version_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_bump_version_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+CREATE TRIGGER transactions_notify_insert
+    AFTER INSERT ON transactions
+    FOR EACH ROW EXECUTE FUNCTION notify_transaction_insert();
+
+COMMIT;
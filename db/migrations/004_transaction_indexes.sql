@@ -0,0 +1,15 @@
+-- =================================================================
+--  Migration 004: covering indexes on 'transactions'
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/004_transaction_indexes.sql
+BEGIN;
+
+CREATE INDEX ix_transactions_user_date
+    ON transactions (user_id, transaction_date) INCLUDE (amount, category);
+CREATE INDEX ix_transactions_user_category_date
+    ON transactions (user_id, category, transaction_date) INCLUDE (amount);
+
+-- init.sql seeded users with explicit ids without advancing the sequence.
+SELECT setval('users_id_seq', (SELECT max(id) FROM users));
+
+COMMIT;
@@ -0,0 +1,49 @@
+-- =================================================================
+--  Migration 005: store transaction amounts as integer cents
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/005_amount_cents.sql
+BEGIN;
+
+-- INTEGER cents hold -21,474,836.48 .. 21,474,836.47, less than NUMERIC(10,2).
+DO $$
+DECLARE
+    out_of_range BIGINT;
+BEGIN
+    SELECT count(*) INTO out_of_range FROM transactions
+    WHERE round(amount * 100) NOT BETWEEN -2147483648 AND 2147483647;
+    IF out_of_range > 0 THEN
+        RAISE EXCEPTION '% transaction(s) have an amount outside -21474836.48 .. 21474836.47 and do not fit in integer cents; fix or remove them first',
+            out_of_range;
+    END IF;
+END;
+$$;
+
+ALTER TABLE transactions ADD COLUMN amount_cents INTEGER;
+UPDATE transactions SET amount_cents = round(amount * 100)::integer;
+ALTER TABLE transactions ALTER COLUMN amount_cents SET NOT NULL;
+
+-- Dropping 'amount' also drops the covering indexes that INCLUDE it.
+ALTER TABLE transactions DROP COLUMN amount;
+
+CREATE INDEX ix_transactions_user_date
+    ON transactions (user_id, transaction_date) INCLUDE (amount_cents, category);
+CREATE INDEX ix_transactions_user_category_date
+    ON transactions (user_id, category, transaction_date) INCLUDE (amount_cents);
+
+CREATE OR REPLACE FUNCTION notify_transaction_insert() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('transactions', json_build_object(
+        'id', NEW.id,
+        'user_id', NEW.user_id,
+        'amount', round(NEW.amount_cents / 100.0, 2),
+        'category', NEW.category,
+        'description', NEW.description,
+        'transaction_date', NEW.transaction_date
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+ANALYZE transactions;
+
+COMMIT;
@@ -0,0 +1,48 @@
+-- =================================================================
+--  Migration 006: dictionary-encode transaction categories
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/006_categories.sql
+BEGIN;
+
+CREATE TABLE categories (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL
+);
+
+INSERT INTO categories (name)
+SELECT DISTINCT category FROM transactions ORDER BY category;
+
+ALTER TABLE transactions ADD COLUMN category_id SMALLINT;
+UPDATE transactions t SET category_id = c.id
+FROM categories c
+WHERE c.name = t.category;
+ALTER TABLE transactions ALTER COLUMN category_id SET NOT NULL;
+ALTER TABLE transactions ADD CONSTRAINT fk_category
+    FOREIGN KEY (category_id) REFERENCES categories(id);
+
+-- Dropping 'category' also drops the covering indexes that use it.
+ALTER TABLE transactions DROP COLUMN category;
+
+CREATE INDEX ix_transactions_user_date
+    ON transactions (user_id, transaction_date) INCLUDE (amount_cents, category_id);
+CREATE INDEX ix_transactions_user_category_date
+    ON transactions (user_id, category_id, transaction_date) INCLUDE (amount_cents);
+
+CREATE OR REPLACE FUNCTION notify_transaction_insert() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('transactions', json_build_object(
+        'id', NEW.id,
+        'user_id', NEW.user_id,
+        'amount', round(NEW.amount_cents / 100.0, 2),
+        'category', (SELECT name FROM categories WHERE id = NEW.category_id),
+        'description', NEW.description,
+        'transaction_date', NEW.transaction_date
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+-- The UPDATE above rewrote every row; reclaim the dead tuples.
+VACUUM (ANALYZE) transactions;
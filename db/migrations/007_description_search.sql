@@ -0,0 +1,13 @@
+-- =================================================================
+--  Migration 007: trigram index for description search
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/007_description_search.sql
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+CREATE INDEX ix_transactions_user_description_trgm
+    ON transactions USING gin (user_id, description gin_trgm_ops);
+
+COMMIT;
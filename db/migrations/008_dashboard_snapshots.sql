@@ -0,0 +1,16 @@
+-- =================================================================
+--  Migration 008: precomputed dashboard snapshots
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/008_dashboard_snapshots.sql
+-- The backend fills the table in the background; until then the
+-- snapshot endpoint computes snapshots on the fly.
+BEGIN;
+
+CREATE TABLE dashboard_snapshots (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    data_version INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc')
+);
+
+COMMIT;
@@ -0,0 +1,35 @@
+-- =================================================================
+--  Migration 009: budgets and budget alerts
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/009_budgets.sql
+-- A new budget starts its running total from the current period's
+-- transactions, so existing data needs no backfill.
+BEGIN;
+
+CREATE TABLE budgets (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    category_id SMALLINT REFERENCES categories(id),
+    period VARCHAR(10) NOT NULL CHECK (period IN ('week', 'month')),
+    limit_cents INTEGER NOT NULL CHECK (limit_cents > 0),
+    period_start DATE NOT NULL,
+    spent_cents BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc')
+);
+
+CREATE UNIQUE INDEX ux_budgets_user_category_period
+    ON budgets (user_id, COALESCE(category_id, 0), period);
+
+CREATE TABLE budget_alerts (
+    id SERIAL PRIMARY KEY,
+    budget_id INTEGER NOT NULL REFERENCES budgets(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    period_start DATE NOT NULL,
+    spent_cents BIGINT NOT NULL,
+    triggered_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc'),
+    UNIQUE (budget_id, period_start)
+);
+
+CREATE INDEX ix_budget_alerts_user_triggered ON budget_alerts (user_id, triggered_at);
+
+COMMIT;
@@ -0,0 +1,48 @@
+-- =================================================================
+--  Migration 010: budget running totals maintained by a trigger
+-- =================================================================
+--   psql "$DATABASE_URL" -f db/migrations/010_budget_spend_trigger.sql
+-- Rows inserted without the API (bulk loads, other services) now count
+-- toward budgets too. Deploy the backend from the same release, which
+-- leaves the totals to this trigger on Postgres; an older backend would
+-- add each API write twice.
+BEGIN;
+
+CREATE FUNCTION apply_budget_spend() RETURNS TRIGGER AS $$
+BEGIN
+    WITH added AS (
+        SELECT b.id, p.start, sum(n.amount_cents) AS cents
+        FROM budgets b
+        CROSS JOIN LATERAL (
+            SELECT date_trunc(CASE b.period WHEN 'week' THEN 'week' ELSE 'month' END,
+                              NOW() AT TIME ZONE 'utc')::date AS start
+        ) p
+        JOIN new_rows n ON n.user_id = b.user_id
+            AND (b.category_id IS NULL OR b.category_id = n.category_id)
+        WHERE n.transaction_date >= p.start
+          AND n.transaction_date < p.start + CASE b.period WHEN 'week' THEN INTERVAL '1 week'
+                                                          ELSE INTERVAL '1 month' END
+        GROUP BY b.id, p.start
+    ), updated AS (
+        UPDATE budgets b
+        SET spent_cents = CASE WHEN b.period_start < a.start THEN 0 ELSE b.spent_cents END + a.cents,
+            period_start = a.start
+        FROM added a
+        WHERE b.id = a.id
+        RETURNING b.id, b.user_id, b.limit_cents, b.period_start, b.spent_cents, a.cents
+    )
+    INSERT INTO budget_alerts (budget_id, user_id, period_start, spent_cents)
+    SELECT id, user_id, period_start, spent_cents
+    FROM updated
+    WHERE spent_cents - cents < limit_cents AND limit_cents <= spent_cents
+    ON CONFLICT (budget_id, period_start) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER transactions_apply_budget_spend
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_budget_spend();
+
+COMMIT;
@@ -1,11 +1,47 @@
+import asyncio
+import time
+from collections import deque
+from functools import partial
+
+import pandas as pd
 import panel as pn
 from app.services.api_client import api_client
+from app.services.live_updates import DashboardData, TransactionFeed
 from app.views.login_view import create_login_view
-from app.views.dashboard_components import create_metric_cards, create_charts_view, create_filter_widgets
+from app.views.dashboard_components import (create_metric_cards, create_charts_view, create_filter_widgets,
+                                           create_budget_progress, create_loading_placeholder,
+                                           create_metric_placeholders, load_holoviews)
 
 # Configure the page
 pn.extension(sizing_mode="stretch_width", notifications=True)
 
+# Number of recent sessions whose load timings are kept in pn.state.cache
+SESSION_TIMINGS_KEPT = 1000
+
+class SessionTimer:
+    """
+    Records how long a dashboard session takes to reach each loading milestone:
+    first_paint (the browser has rendered the shell), metrics (cards filled in)
+    and interactive (charts drawn, filters and live feed wired up).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        session_context = pn.state.curdoc.session_context if pn.state.curdoc else None
+        self.session_id = session_context.id if session_context else "local"
+        self.timings = {}
+        pn.state.cache.setdefault('session_timings', deque(maxlen=SESSION_TIMINGS_KEPT)).append(
+            {'session': self.session_id, 'timings': self.timings})
+
+    def mark(self, milestone: str):
+        """
+        Records the time since the session started, in milliseconds.
+        Args:
+            milestone: The milestone name, e.g. "first_paint" or "interactive".
+        """
+        self.timings[milestone] = round((time.perf_counter() - self.started) * 1000, 1)
+        print(f"TIMING - session={self.session_id} {milestone}={self.timings[milestone]} ms")
+
 class AppController:
     """Manages the application state and view by controlling a single root template."""
 
@@ -51,101 +87,223 @@ class AppController:
         pn.state.location.reload = True
 
     def build_dashboard_view(self, token: str):
-        """Clears the template and populates it with the dashboard interface."""
-        # --- Fetch User Information ---
-        user_info = api_client.get_user_info(token)
-        
-        # Extract first name from full name (fallback to username if no full name)
-        full_name = user_info.get('full_name', '')
-        username = user_info.get('username', 'User')
-        
-        if full_name:
-            # Get first part of the full name (before first space)
-            first_name = full_name.split()[0] if full_name.split() else username
-        else:
-            first_name = username
+        """
+        Paints the dashboard shell with loading placeholders, then fills it in once the
+        page has loaded: from the user's dashboard snapshot when there is one, otherwise
+        metric cards first, then the user's name, filters and charts.
+        """
+        timer = SessionTimer()
+        doc = pn.state.curdoc
 
         # --- Configure Template ---
         self.template.main.clear()
         self.template.sidebar.clear()
         self.template.sidebar_width = 300
 
-        # --- Fetch Data ---
-        transactions_df = api_client.get_transactions(token)
-
-        # --- Build Sidebar ---
+        # --- Build Sidebar Shell ---
         logout_button = pn.widgets.Button(name="Logout", icon="logout", button_type="primary", sizing_mode="stretch_width")
         logout_button.on_click(self.on_logout)
 
+        welcome = pn.pane.Markdown(
+            "### Welcome",
+            styles={
+                'font-size': '18px',
+                'font-weight': 'bold',
+                'color': '#2F4F4F'
+            }
+        )
+        filters_area = pn.Column(create_loading_placeholder("Loading filters...", height=120))
         sidebar_content = pn.Column(
-            pn.pane.Markdown(
-                f"### Welcome,\n# {first_name}", 
-                styles={
-                    'font-size': '18px',
-                    'font-weight': 'bold',
-                    'color': '#2F4F4F'
-                }
-            ),
+            welcome,
             pn.layout.Divider(),
-            "**Filters**"
+            "**Filters**",
+            filters_area,
+            pn.layout.VSpacer(),
+            logout_button
         )
         self.template.sidebar.append(sidebar_content)
 
-        if transactions_df.empty:
-            self.template.main.append(pn.pane.Alert("Could not load transaction data.", alert_type="warning"))
-            sidebar_content.append(pn.layout.VSpacer())
-            sidebar_content.append(logout_button)
-            return
-
-        # --- Create and Add Filters to Sidebar ---
-        filter_widgets = create_filter_widgets(transactions_df)
-        date_filter = filter_widgets['date_range']
-        category_filter = filter_widgets['categories']
-        sidebar_content.append(date_filter)
-        sidebar_content.append(category_filter)
-        sidebar_content.append(pn.layout.VSpacer())
-        sidebar_content.append(logout_button)
-
-        # --- Create Reactive Data Pipeline ---
-        # NOTE: Caching can be re-enabled for performance in production
-        # @pn.cache
-        def get_filtered_data(start_date, end_date, categories):
-            params = {
-                'start_date': start_date.strftime('%Y-%m-%d'), 
-                'end_date': end_date.strftime('%Y-%m-%d')
-            }
-            
-            # Format categories as comma-separated string (only if categories are selected)
-            if categories and len(categories) > 0:
-                params['categories'] = ','.join(categories)
-            
-            # Debug: Print filter parameters
-            print(f"DEBUG - Filter params: {params}")
-            print(f"DEBUG - Selected categories: {categories}")
-            
-            # Fetch both transactions and metrics reactively
-            transactions = api_client.get_transactions(token, params=params)
-            metrics = api_client.get_metrics(token, params=params)
-            
-            return transactions, metrics
-
-        bound_data = pn.bind(get_filtered_data, start_date=date_filter.param.value_start, end_date=date_filter.param.value_end, categories=category_filter.param.value)
-
-        def get_metrics_view(data):
-            transactions, metrics = data
-            return create_metric_cards(metrics)
-
-        def get_charts_view(data):
-            transactions, _ = data
-            return create_charts_view(transactions)
-
-        # --- Populate Main Area with Reactive Components ---
-        self.template.main.append(
-            pn.Column(
-                pn.bind(get_metrics_view, data=bound_data),
-                pn.bind(get_charts_view, data=bound_data)
-            )
-        )
+        # --- Build Main Area Shell ---
+        metrics_area = pn.Column(create_metric_placeholders(), sizing_mode="stretch_width")
+        budgets_area = pn.Column(create_loading_placeholder("Loading budgets...", height=80), sizing_mode="stretch_width")
+        charts_area = pn.Column(create_loading_placeholder("Loading charts...", height=600), sizing_mode="stretch_width")
+        self.template.main.append(pn.Column(metrics_area, budgets_area, charts_area))
+
+        data = DashboardData()
+
+        async def load_dashboard():
+            # Runs once the browser has rendered the shell above
+            timer.mark("first_paint")
+
+            # The API calls run on worker threads so other sessions keep being served.
+            # The precomputed snapshot has everything the default view needs in one call.
+            snapshot = await asyncio.to_thread(api_client.get_dashboard_snapshot, token)
+            if snapshot:
+                show_metrics(snapshot['metrics'])
+                budgets_task = asyncio.create_task(load_budgets())
+                show_welcome(snapshot['user'])
+                # The first session imports the charting libraries; off the event loop
+                await asyncio.to_thread(load_holoviews)
+                show_transactions(snapshot['daily'])
+                await budgets_task
+                return
+
+            # Without a snapshot, query the metrics, user and daily totals directly
+            metrics_task = asyncio.create_task(asyncio.to_thread(api_client.get_metrics_batch, token, [{}]))
+            user_task = asyncio.create_task(asyncio.to_thread(api_client.get_user_info, token))
+            transactions_task = asyncio.create_task(asyncio.to_thread(api_client.get_daily_totals, token))
+            windows = await metrics_task
+            show_metrics({**windows[0]['metrics'], 'change': windows[0]['change']} if windows else {})
+            # Once the cards are up, load the charting libraries while the rest arrives
+            charting = asyncio.create_task(asyncio.to_thread(load_holoviews))
+            budgets_task = asyncio.create_task(load_budgets())
+            show_welcome(await user_task)
+            transactions_df = await transactions_task
+            await charting
+            show_transactions(transactions_df)
+            await budgets_task
+
+        budget_refresh = {'pending': False}
+
+        async def load_budgets():
+            # Budget totals are kept by the API as transactions arrive; this only reads them
+            budget_refresh['pending'] = False
+            budgets, alerts = await asyncio.gather(asyncio.to_thread(api_client.get_budgets, token),
+                                                   asyncio.to_thread(api_client.get_alerts, token))
+            budgets_area[:] = [create_budget_progress(budgets, alerts)]
+
+        def refresh_budgets():
+            # A burst of feed events triggers one refresh; later events schedule the next
+            if not budget_refresh['pending']:
+                budget_refresh['pending'] = True
+                doc.add_next_tick_callback(load_budgets)
+
+        def show_metrics(metrics):
+            # --- Metric Cards (all-time totals until a filter is changed) ---
+            data.metrics = metrics
+            metrics_area[:] = [pn.bind(create_metric_cards, data.param.metrics)]
+            timer.mark("metrics")
+
+        def show_welcome(user_info):
+            # --- Welcome Message ---
+            # Extract first name from full name (fallback to username if no full name)
+            full_name = user_info.get('full_name') or ''
+            username = user_info.get('username', 'User')
+            first_name = full_name.split()[0] if full_name.split() else username
+            welcome.object = f"### Welcome,\n# {first_name}"
+
+        def show_transactions(transactions_df):
+            if transactions_df.empty:
+                filters_area.clear()
+                charts_area[:] = [pn.pane.Alert("Could not load transaction data.", alert_type="warning")]
+                timer.mark("interactive")
+                return
+
+            # --- Filters and Charts ---
+            filter_widgets = create_filter_widgets(transactions_df)
+            date_filter = filter_widgets['date_range']
+            category_filter = filter_widgets['categories']
+            filters_area[:] = [date_filter, category_filter]
+            # The unfiltered data is exactly what the default filters select
+            data.transactions = transactions_df
+            charts_area[:] = [pn.bind(create_charts_view, data.param.transactions)]
+            wire_filters_and_feed(date_filter, category_filter)
+            timer.mark("interactive")
+
+        def wire_filters_and_feed(date_filter, category_filter):
+            # --- Create Reactive Data Pipeline ---
+            # NOTE: Caching can be re-enabled for performance in production
+            # @pn.cache
+            latest_request = {'id': 0}
+
+            async def load_filtered_data(date_range, categories):
+                # The API calls run on worker threads so a slow backend never stalls the event loop
+                latest_request['id'] += 1
+                request_id = latest_request['id']
+                start_date, end_date = date_range
+                params = {
+                    'start_date': start_date.strftime('%Y-%m-%d'), 
+                    'end_date': end_date.strftime('%Y-%m-%d')
+                }
+                
+                # Format categories as comma-separated string (only if categories are selected)
+                if categories and len(categories) > 0:
+                    params['categories'] = ','.join(categories)
+                
+                # Debug: Print filter parameters
+                print(f"DEBUG - Filter params: {params}")
+                print(f"DEBUG - Selected categories: {categories}")
+                
+                # Fetch the chart data and metrics reactively. Like the snapshot, the charts
+                # are drawn from per-day category totals, which cover every matching row.
+                transactions_task = asyncio.create_task(asyncio.to_thread(api_client.get_daily_totals, token, params=params))
+
+                # One batch call returns the selected period and the equally long
+                # period just before it, with the change between them
+                period = pd.Timestamp(end_date).normalize() - pd.Timestamp(start_date).normalize()
+                previous_end = pd.Timestamp(start_date).normalize() - pd.Timedelta(days=1)
+                selected_categories = list(categories) if categories else None
+                windows = await asyncio.to_thread(api_client.get_metrics_batch, token, [
+                    {'start_date': params['start_date'], 'end_date': params['end_date'],
+                     'categories': selected_categories, 'compare_to': 1},
+                    {'start_date': (previous_end - period).strftime('%Y-%m-%d'), 'end_date': previous_end.strftime('%Y-%m-%d'),
+                     'categories': selected_categories},
+                ])
+                transactions = await transactions_task
+                metrics = {**windows[0]['metrics'], 'change': windows[0]['change']} if windows else {}
+
+                # A later filter change may have finished first; its data wins
+                if request_id == latest_request['id']:
+                    data.param.update(transactions=transactions, metrics=metrics)
+
+            async def reload_current_filters():
+                await load_filtered_data(date_filter.value, category_filter.value)
+
+            async def on_filters_changed(date_range, categories):
+                # value_throttled only says when to reload; value also carries the live feed's widening
+                await load_filtered_data(date_filter.value, categories)
+
+            # value_throttled only changes when the slider is released, not on every step of a drag
+            pn.bind(on_filters_changed, date_range=date_filter.param.value_throttled, categories=category_filter.param.value, watch=True)
+
+            # --- Subscribe to Live Transactions ---
+            def on_feed_event(event, row):
+                if event == "resync":
+                    doc.add_next_tick_callback(reload_current_filters)
+                    refresh_budgets()
+                    return
+                if event != "transaction":
+                    return
+                refresh_budgets()
+
+                # Widen the filter bounds so the new row can be selected. A selection that
+                # reached the newest day, or held every category, widens with them; these
+                # are programmatic value changes, so the throttled slider reload stays quiet.
+                row_date = pd.Timestamp(row['transaction_date'])
+                if row_date > pd.Timestamp(date_filter.end):
+                    follow_end = pd.Timestamp(date_filter.value_end).normalize() >= pd.Timestamp(date_filter.end).normalize()
+                    date_filter.end = row_date
+                    if follow_end:
+                        date_filter.value = (date_filter.value_start, row_date)
+                if row['category'] not in category_filter.options:
+                    all_selected = set(category_filter.value) >= set(category_filter.options)
+                    category_filter.options = sorted(category_filter.options + [row['category']])
+                    if all_selected:
+                        # This refetches the filtered data, which already includes the row;
+                        # folding it in below just shows it before that returns.
+                        category_filter.value = category_filter.value + [row['category']]
+
+                # Only fold it in when it falls inside the active filters
+                in_range = pd.Timestamp(date_filter.value_start).normalize() <= row_date.normalize() <= pd.Timestamp(date_filter.value_end).normalize()
+                if in_range and row['category'] in category_filter.value:
+                    data.apply_transaction(row)
+
+            # Feed events arrive on a background thread; apply them on the session's event loop
+            feed = TransactionFeed(token, on_event=lambda event, row: doc.add_next_tick_callback(partial(on_feed_event, event, row)))
+            feed.start()
+            pn.state.on_session_destroyed(lambda session_context: feed.stop())
+
+        pn.state.onload(load_dashboard)
 
     def get_view(self):
         """Returns the main servable template."""
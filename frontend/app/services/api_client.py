@@ -1,24 +1,135 @@
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
 import requests
 import pandas as pd
-from typing import Dict, Any, Optional, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 
 # The base URL for the backend API, accessible within the Docker network
 API_BASE_URL = "http://backend:8000/api/v1"
 
+# Upper bound on (endpoint, token, filter) entries kept for conditional requests
+VALIDATOR_CACHE_SIZE = 256
+
+# Content encodings urllib3 can decode here ("gzip,deflate" plus "br"/"zstd" when
+# brotli/zstandard are installed). The backend negotiates against this list.
+SUPPORTED_ENCODINGS = ACCEPT_ENCODING
+
+# Connections kept open to the backend, shared by every dashboard session. Each open
+# dashboard holds one for its live feed, plus one per request in flight.
+POOL_MAXSIZE = 64
+
+# (connect, read) timeouts in seconds for regular calls. Every call backs a
+# dashboard a user is waiting on, so a stuck backend fails fast instead.
+REQUEST_TIMEOUT = (3.05, 10)
+
+# GETs are retried on connection errors and on 429/502/503/504, waiting
+# backoff_factor * 2^n seconds between attempts (or the server's Retry-After)
+GET_RETRIES = 1
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Number of recent calls kept per endpoint for latency_summary()
+LATENCY_WINDOW = 500
+
 
 class ApiClient:
     """
     A client to handle all interactions with the backend FastAPI application.
     """
 
-    def __init__(self, base_url: str = API_BASE_URL):
+    def __init__(self, base_url: str = API_BASE_URL, validator_cache_size: int = VALIDATOR_CACHE_SIZE,
+                 accept_encoding: str = SUPPORTED_ENCODINGS, pool_maxsize: int = POOL_MAXSIZE,
+                 timeout: Tuple[float, float] = REQUEST_TIMEOUT, get_retries: int = GET_RETRIES):
         """
         Initializes the API client.
         Args:
             base_url: The base URL for the API endpoints.
+            validator_cache_size: Maximum number of ETag-validated responses to keep.
+            accept_encoding: Accept-Encoding header sent with every request.
+            pool_maxsize: Connections kept open to the backend across all threads.
+            timeout: (connect, read) timeout in seconds for every call except the live feed.
+            get_retries: How many times a failed GET is retried; other methods are never retried.
         """
         self.base_url = base_url
-        self.session = requests.Session()
+        self.timeout = timeout
+        self._accept_encoding = accept_encoding
+        # One connection pool shared by all threads; urllib3's pool is thread-safe,
+        # requests.Session (cookies, headers) is not, so each thread gets its own.
+        retry = Retry(total=get_retries, backoff_factor=RETRY_BACKOFF_FACTOR, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset({"GET"}), respect_retry_after_header=True, raise_on_status=False)
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+        self._local = threading.local()
+        # endpoint path -> recent call latencies in milliseconds
+        self._latencies: Dict[str, deque] = {}
+        self._latency_lock = threading.Lock()
+        # (url, token, params) -> (etag, parsed body), least recently used first
+        self._validator_cache: OrderedDict = OrderedDict()
+        self._validator_cache_size = validator_cache_size
+        self._validator_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session, mounted on the shared connection pool."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["Accept-Encoding"] = self._accept_encoding
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request with the client's timeouts and reports how long it took.
+        Args:
+            method: The HTTP method.
+            url: The endpoint URL.
+            **kwargs: Passed on to requests.Session.request.
+        Returns:
+            The response, after any retries.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        path = url[len(self.base_url):] if url.startswith(self.base_url) else url
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"DEBUG - {method} {path} failed after {elapsed_ms:.1f} ms: {type(e).__name__}")
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        retries = len(response.raw.retries.history) if getattr(response.raw, "retries", None) else 0
+        print(f"DEBUG - {method} {path} -> {response.status_code} in {elapsed_ms:.1f} ms"
+              + (f" after {retries} retries" if retries else ""))
+        with self._latency_lock:
+            self._latencies.setdefault(f"{method} {path}", deque(maxlen=LATENCY_WINDOW)).append(elapsed_ms)
+        return response
+
+    def latency_summary(self) -> Dict[str, dict]:
+        """
+        Summarizes the latency of recent calls.
+        Returns:
+            For each "METHOD /path", the number of calls kept and their p50, p95
+            and max latency in milliseconds.
+        """
+        with self._latency_lock:
+            samples = {endpoint: sorted(values) for endpoint, values in self._latencies.items()}
+        return {
+            endpoint: {
+                "calls": len(values),
+                "p50_ms": round(values[len(values) // 2], 1),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+                "max_ms": round(values[-1], 1),
+            }
+            for endpoint, values in samples.items()
+        }
 
     def login(self, username: str, password: str) -> str | None:
         """
@@ -32,7 +143,7 @@ class ApiClient:
         login_url = f"{self.base_url}/login"
         form_data = {"username": username, "password": password}
         try:
-            response = self.session.post(login_url, data=form_data)
+            response = self._request("POST", login_url, data=form_data)
             response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
             return response.json().get("access_token")
         except requests.exceptions.RequestException as e:
@@ -43,32 +154,89 @@ class ApiClient:
         """Constructs authorization headers."""
         return {"Authorization": f"Bearer {token}"}
 
-    def get_transactions(self, token: str, params: dict | None = None) -> pd.DataFrame:
+    def _get_json(self, url: str, token: str, params: dict | None = None) -> Any:
         """
-        Fetches transaction data from the API.
+        Performs a conditional GET, reusing the cached body when the API answers 304.
         Args:
+            url: The endpoint URL.
             token: The JWT access token.
-            params: A dictionary of query parameters for filtering.
+            params: A dictionary of query parameters; None values are dropped.
         Returns:
-            A pandas DataFrame with transaction data, or an empty DataFrame on error.
+            The parsed JSON body. Callers must treat it as read-only since it is shared
+            with the validator cache.
         """
-        transactions_url = f"{self.base_url}/transactions"
         headers = self._get_auth_headers(token)
-        
+
         # Filter out None values from params
         clean_params = {}
         if params:
             clean_params = {k: v for k, v in params.items() if v is not None}
-        
+
+        key = (url, token, tuple(sorted(clean_params.items())))
+        with self._validator_lock:
+            cached = self._validator_cache.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        print(f"DEBUG - API call to {url} with params: {clean_params}")
+        response = self._request("GET", url, headers=headers, params=clean_params)
+        if response.status_code == 304 and cached:
+            with self._validator_lock:
+                if key in self._validator_cache:
+                    self._validator_cache.move_to_end(key)
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._validator_lock:
+                self._validator_cache[key] = (etag, body)
+                self._validator_cache.move_to_end(key)
+                while len(self._validator_cache) > self._validator_cache_size:
+                    self._validator_cache.popitem(last=False)
+        return body
+
+    def get_transactions(self, token: str, params: dict | None = None) -> pd.DataFrame:
+        """
+        Fetches transaction data from the API.
+        Args:
+            token: The JWT access token.
+            params: A dictionary of query parameters for filtering.
+        Returns:
+            A pandas DataFrame with transaction data (category as a pandas
+            Categorical), or an empty DataFrame on error.
+        """
+        transactions_url = f"{self.base_url}/transactions"
         try:
-            print(f"DEBUG - API call to {transactions_url} with params: {clean_params}")
-            response = self.session.get(transactions_url, headers=headers, params=clean_params)
-            response.raise_for_status()
-            return pd.DataFrame(response.json())
+            df = pd.DataFrame(self._get_json(transactions_url, token, params))
+            if 'category' in df:
+                # A handful of names repeated on every row: keep them as integer codes.
+                df['category'] = df['category'].astype('category')
+            return df
         except requests.exceptions.RequestException as e:
             print(f"An error occurred fetching transactions: {e}")
             return pd.DataFrame()
 
+    def get_daily_totals(self, token: str, params: dict | None = None) -> pd.DataFrame:
+        """
+        Fetches each category's total per day, the data the charts are drawn from.
+        Args:
+            token: The JWT access token.
+            params: A dictionary of query parameters for filtering.
+        Returns:
+            A pandas DataFrame with transaction_date, category (a pandas Categorical)
+            and amount columns, like the snapshot's 'daily', or an empty DataFrame on error.
+        """
+        daily_url = f"{self.base_url}/transactions/daily"
+        try:
+            daily = pd.DataFrame(self._get_json(daily_url, token, params))
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred fetching daily totals: {e}")
+            return pd.DataFrame()
+        daily['category'] = daily['category'].astype('category')
+        return daily
+
     def get_metrics(self, token: str, params: dict | None = None) -> dict:
         """
         Fetches analytics metrics from the API.
@@ -79,22 +247,53 @@ class ApiClient:
             A dictionary with metrics, or an empty dictionary on error.
         """
         metrics_url = f"{self.base_url}/transactions/metrics"
-        headers = self._get_auth_headers(token)
-        
-        # Filter out None values from params
-        clean_params = {}
-        if params:
-            clean_params = {k: v for k, v in params.items() if v is not None}
-        
         try:
-            print(f"DEBUG - API call to {metrics_url} with params: {clean_params}")
-            response = self.session.get(metrics_url, headers=headers, params=clean_params)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(metrics_url, token, params)
         except requests.exceptions.RequestException as e:
             print(f"An error occurred fetching metrics: {e}")
             return {}
 
+    def get_metrics_batch(self, token: str, windows: List[dict]) -> List[dict]:
+        """
+        Fetches the metrics of several windows in one call, with period-over-period changes.
+        Args:
+            token: The JWT access token.
+            windows: Dicts with optional 'start_date', 'end_date', 'categories' and
+                'compare_to' (the index of another window to compare against).
+        Returns:
+            One dict per window with its 'metrics' and 'change' (None unless
+            compare_to was given), or an empty list on error.
+        """
+        batch_url = f"{self.base_url}/transactions/metrics/batch"
+        print(f"DEBUG - API call to {batch_url} with windows: {windows}")
+        try:
+            response = self._request("POST", batch_url, headers=self._get_auth_headers(token), json={"windows": windows})
+            response.raise_for_status()
+            return response.json()["windows"]
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred fetching batch metrics: {e}")
+            return []
+
+    def get_dashboard_snapshot(self, token: str) -> dict:
+        """
+        Fetches the user's precomputed unfiltered dashboard.
+        Args:
+            token: The JWT access token.
+        Returns:
+            A dictionary with 'user', 'metrics', 'bounds' and 'daily' (a pandas DataFrame
+            of per-day category totals with transaction_date, category and amount
+            columns), or an empty dictionary on error.
+        """
+        snapshot_url = f"{self.base_url}/dashboard/snapshot"
+        try:
+            snapshot = self._get_json(snapshot_url, token)
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred fetching the dashboard snapshot: {e}")
+            return {}
+        daily = pd.DataFrame(snapshot['daily'])
+        daily['category'] = daily['category'].astype('category')
+        return {**snapshot, 'daily': daily}
+
     def get_user_info(self, token: str) -> dict:
         """
         Fetches the current user's information from the API.
@@ -104,14 +303,73 @@ class ApiClient:
             A dictionary with user information, or an empty dictionary on error.
         """
         user_url = f"{self.base_url}/users/me"
-        headers = self._get_auth_headers(token)
         try:
-            response = self.session.get(user_url, headers=headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(user_url, token)
         except requests.exceptions.RequestException as e:
             print(f"An error occurred fetching user info: {e}")
             return {}
 
+    def get_budgets(self, token: str) -> List[dict]:
+        """
+        Fetches the user's budgets with their spending in the current period.
+        Args:
+            token: The JWT access token.
+        Returns:
+            One dict per budget with 'category' (None for an overall budget), 'period',
+            'limit', 'spent', 'remaining' and 'percent_used', or an empty list on error.
+        """
+        budgets_url = f"{self.base_url}/budgets"
+        try:
+            return self._get_json(budgets_url, token)
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred fetching budgets: {e}")
+            return []
+
+    def get_alerts(self, token: str, since: str | None = None) -> List[dict]:
+        """
+        Fetches the budget alerts triggered for the user, newest first.
+        Args:
+            token: The JWT access token.
+            since: An ISO timestamp; only alerts triggered after it are returned.
+        Returns:
+            One dict per alert with 'category', 'period', 'limit', 'spent' and
+            'triggered_at', or an empty list on error.
+        """
+        alerts_url = f"{self.base_url}/alerts"
+        try:
+            return self._get_json(alerts_url, token, params={'since': since})
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred fetching budget alerts: {e}")
+            return []
+
+    def stream_transactions(self, token: str, stop: threading.Event) -> Iterator[Tuple[str, dict]]:
+        """
+        Subscribes to the live transaction feed (server-sent events).
+        Args:
+            token: The JWT access token.
+            stop: Ends the stream once set; checked on every event and keepalive.
+        Yields:
+            (event type, data) pairs, e.g. ("transaction", {...}) or ("resync", {}).
+        Raises:
+            requests.exceptions.RequestException: If the connection fails or drops.
+        """
+        stream_url = f"{self.base_url}/transactions/stream"
+        headers = self._get_auth_headers(token)
+        with self.session.get(stream_url, headers=headers, stream=True, timeout=(5, 60)) as response:
+            response.raise_for_status()
+            event, data = "message", []
+            # chunk_size=None hands over lines as soon as they arrive
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if stop.is_set():
+                    return
+                if not line:
+                    if data:
+                        yield event, json.loads("\n".join(data))
+                    event, data = "message", []
+                elif line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data.append(line[len("data:"):].strip())
+
 # A global instance of the API client that can be imported elsewhere
-api_client = ApiClient() 
\ No newline at end of file
+api_client = ApiClient()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import threading
+from typing import Callable
+
+import pandas as pd
+import param
+import requests
+
+from app.services.api_client import api_client
+
+
+class DashboardData(param.Parameterized):
+    """
+    The chart data (per-day category totals) and metrics currently shown on a
+    dashboard. Filter changes replace them wholesale; live feed events are
+    folded in incrementally, each new transaction as one more row.
+    """
+
+    transactions = param.DataFrame(default=pd.DataFrame())
+    metrics = param.Dict(default={})
+
+    def apply_transaction(self, row: dict) -> None:
+        """
+        Appends one new transaction and updates the metrics without refetching.
+        Args:
+            row: A transaction as returned by the API (amount, category, transaction_date, ...).
+        """
+        amount = float(row['amount'])
+
+        # Copy rather than mutate: the previous metrics dict may be shared with
+        # the ApiClient validator cache.
+        metrics = dict(self.metrics)
+        count = metrics.get('transaction_count', 0) + 1
+        total = float(metrics.get('total_spent') or 0) + amount
+        by_category = dict(metrics.get('spending_by_category', {}))
+        by_category[row['category']] = float(by_category.get(row['category'], 0)) + amount
+        metrics.update(
+            transaction_count=count,
+            total_spent=total,
+            average_transaction=total / count,
+            spending_by_category=by_category,
+        )
+        if metrics.get('change'):
+            metrics['change'] = self._rebase_change(metrics)
+
+        new_row = pd.DataFrame([{**row, 'transaction_date': pd.Timestamp(row['transaction_date'])}])
+        transactions = pd.concat([self.transactions, new_row], ignore_index=True)
+        # concat falls back to object dtype when the new category is not among the codes.
+        transactions['category'] = transactions['category'].astype('category')
+
+        self.param.update(transactions=transactions, metrics=metrics)
+
+    def _rebase_change(self, metrics: dict) -> dict:
+        """
+        Recomputes the period-over-period change for updated metrics. The previous
+        period's value is recovered as the old value minus the old delta.
+        """
+        change = {}
+        for name, old in self.metrics['change'].items():
+            previous = self.metrics[name] - old['delta']
+            delta = metrics[name] - previous
+            change[name] = {
+                'delta': round(delta, 2),
+                'percent_change': round(delta / previous * 100, 1) if previous else None,
+            }
+        return change
+
+
+class TransactionFeed:
+    """
+    Background subscriber to the backend's live transaction feed. Runs on its own
+    thread and reconnects after failures, reporting a "resync" event on reconnect
+    because events may have been missed while disconnected.
+    """
+
+    def __init__(self, token: str, on_event: Callable[[str, dict], None], reconnect_delay: float = 5.0):
+        """
+        Args:
+            token: The JWT access token.
+            on_event: Called from the feed thread with (event type, data).
+            reconnect_delay: Seconds to wait before reconnecting.
+        """
+        self.token = token
+        self.on_event = on_event
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="transaction-feed", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            if connected_before:
+                self.on_event("resync", {})
+            try:
+                for event, data in api_client.stream_transactions(self.token, self._stop):
+                    self.on_event(event, data)
+            except requests.exceptions.RequestException as e:
+                print(f"An error occurred in the transaction feed: {e}")
+            connected_before = True
+            self._stop.wait(self.reconnect_delay)
@@ -1,19 +1,32 @@
+import functools
 import panel as pn
 import pandas as pd
-import holoviews as hv
-import hvplot.pandas  # noqa
 from math import pi
 from bokeh.palettes import Category20c
 from bokeh.plotting import figure
 from bokeh.transform import cumsum
 from typing import Dict, List, Tuple
 
-hv.extension("bokeh")
-
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
+@functools.lru_cache(maxsize=None)
+def load_holoviews():
+    """
+    Import HoloViews and hvplot on first use rather than at startup.
+    
+    Together they take most of a second to import; deferring them lets the
+    dashboard shell and metric cards render while the charts are still loading.
+    
+    Returns:
+        The holoviews module, with the Bokeh backend loaded and DataFrame.hvplot registered
+    """
+    import holoviews as hv
+    import hvplot.pandas  # noqa
+    hv.extension("bokeh")
+    return hv
+
 def format_currency(value: float) -> str:
     """
     Format currency values with smart abbreviations for large numbers.
@@ -85,49 +98,108 @@ def get_colors_for_categories(num_categories: int) -> List[str]:
     else:
         return blue_palette[:num_categories]
 
+def format_change(change: Dict[str, float] | None) -> str:
+    """
+    Format a period-over-period change as an arrow, amount and percentage.
+    
+    Args:
+        change: Dictionary with 'delta' and 'percent_change' (None when the
+            previous period was zero), or None when there is no comparison
+        
+    Returns:
+        HTML snippet; more spending is shown in red, less in green
+    """
+    if not change:
+        return ""
+    
+    delta = change.get('delta', 0)
+    percent = change.get('percent_change')
+    arrow, color = ("▲", "#c62828") if delta > 0 else ("▼", "#2e7d32") if delta < 0 else ("■", "#757575")
+    percent_str = f"{percent:+.1f}%" if percent is not None else "new"
+    
+    return (f'<span style="color: {color}; font-size: 0.9em;">'
+            f'{arrow} {format_currency(abs(delta))} ({percent_str}) vs previous period</span>')
+
+def create_metric_card(name: str, value: float, value_str: str, change: Dict[str, float] | None) -> pn.Column:
+    """
+    Create a styled metric card with an optional period-over-period change line.
+    
+    Args:
+        name: The card title
+        value: The metric value
+        value_str: The formatted metric value
+        change: The change versus the previous period, or None
+        
+    Returns:
+        Panel Column holding the Number indicator and the change line
+    """
+    return pn.Column(
+        pn.indicators.Number(
+            name=name,
+            value=value,
+            format=value_str,
+            sizing_mode="stretch_width"
+        ),
+        pn.pane.HTML(format_change(change), margin=(0, 10)),
+        styles=get_card_style(),
+        sizing_mode="stretch_width"
+    )
+
+def create_loading_placeholder(message: str, height: int) -> pn.Column:
+    """
+    Create a card-styled placeholder shown while a dashboard section loads.
+    
+    Args:
+        message: Text shown next to the spinner
+        height: Height in pixels, matching the section it stands in for
+        
+    Returns:
+        Panel Column with a loading spinner and message
+    """
+    return pn.Column(
+        pn.Row(
+            pn.indicators.LoadingSpinner(value=True, size=25, margin=(0, 10)),
+            pn.pane.Str(message, styles={'color': '#757575'}),
+        ),
+        height=height,
+        styles=get_card_style(),
+        sizing_mode="stretch_width",
+        margin=(10, 5)
+    )
+
 # ============================================================================
 # INDIVIDUAL METRIC CARD FUNCTIONS
 # ============================================================================
 
-def create_total_spend_card(total_spend: float) -> pn.indicators.Number:
+def create_total_spend_card(total_spend: float, change: Dict[str, float] | None = None) -> pn.Column:
     """
     Create the Total Spend metric card.
     
     Args:
         total_spend: The total spending amount
+        change: The change versus the previous period, or None
         
     Returns:
-        Panel Number indicator for total spend
+        Panel Column card for total spend
     """
     total_spend_str = format_currency(total_spend) if total_spend >= 10000 else f"${total_spend:,.2f}"
     
-    return pn.indicators.Number(
-        name="Total Spend",
-        value=total_spend,
-        format=total_spend_str,
-        styles=get_card_style(),
-        sizing_mode="stretch_width"
-    )
+    return create_metric_card("Total Spend", total_spend, total_spend_str, change)
 
-def create_avg_transaction_card(avg_transaction: float) -> pn.indicators.Number:
+def create_avg_transaction_card(avg_transaction: float, change: Dict[str, float] | None = None) -> pn.Column:
     """
     Create the Average Transaction metric card.
     
     Args:
         avg_transaction: The average transaction amount
+        change: The change versus the previous period, or None
         
     Returns:
-        Panel Number indicator for average transaction
+        Panel Column card for average transaction
     """
     avg_transaction_str = f"${avg_transaction:,.2f}"
     
-    return pn.indicators.Number(
-        name="Average Transaction",
-        value=avg_transaction,
-        format=avg_transaction_str,
-        styles=get_card_style(),
-        sizing_mode="stretch_width"
-    )
+    return create_metric_card("Average Transaction", avg_transaction, avg_transaction_str, change)
 
 def create_top_categories_card(spending_by_category: Dict[str, float]) -> pn.indicators.Number:
     """
@@ -179,7 +251,8 @@ def create_bar_chart(df: pd.DataFrame) -> object:
     Returns:
         HoloViews bar chart object
     """
-    spend_by_category = df.groupby('category')['amount'].sum().sort_values(ascending=False)
+    load_holoviews()
+    spend_by_category = df.groupby('category', observed=True)['amount'].sum().sort_values(ascending=False)
     # Create a proper DataFrame for better tooltip formatting
     category_df = spend_by_category.reset_index()
     category_df.columns = ['category', 'total_amount']
@@ -203,12 +276,18 @@ def create_line_chart(df: pd.DataFrame) -> object:
     """
     Create a line chart showing spending over time.
     
+    The daily series is downsampled with LTTB (Largest Triangle Three Buckets)
+    to at most one point per pixel of the plot's width, and re-sampled from the
+    full series on every zoom or pan, so the payload stays the same size however
+    long the history is. Shorter series are sent unchanged.
+    
     Args:
         df: DataFrame with transaction data
         
     Returns:
-        HoloViews line chart object
+        HoloViews DynamicMap of the line chart
     """
+    load_holoviews()
     spend_over_time = df.set_index('transaction_date').resample('D')['amount'].sum()
     return spend_over_time.hvplot.line(
         title="Spend Over Time",
@@ -217,6 +296,7 @@ def create_line_chart(df: pd.DataFrame) -> object:
         height=270,
         grid=True,
         responsive=True,
+        downsample=True,
     ).opts(tools=['hover'], margin=(-20, 5, 10, 5))
 
 def create_donut_chart(df: pd.DataFrame) -> object:
@@ -229,7 +309,7 @@ def create_donut_chart(df: pd.DataFrame) -> object:
     Returns:
         Bokeh figure object or Panel Alert if no data
     """
-    spend_by_category = df.groupby('category')['amount'].sum().sort_values(ascending=False)
+    spend_by_category = df.groupby('category', observed=True)['amount'].sum().sort_values(ascending=False)
     data = spend_by_category.reset_index(name='amount')
 
     # Guard against division by zero if total is 0
@@ -293,6 +373,75 @@ def create_donut_chart(df: pd.DataFrame) -> object:
 
     return pie_chart
 
+# ============================================================================
+# INDIVIDUAL BUDGET FUNCTIONS
+# ============================================================================
+
+def get_budget_bar_color(percent_used: float) -> str:
+    """
+    Pick the progress bar color for a budget.
+    
+    Args:
+        percent_used: Share of the limit spent this period, in percent
+        
+    Returns:
+        A Bootstrap color name: red from the limit on, amber from 80%
+    """
+    if percent_used >= 100:
+        return "danger"
+    elif percent_used >= 80:
+        return "warning"
+    return "success"
+
+def create_budget_bar(budget: dict) -> pn.Column:
+    """
+    Create a labelled progress bar for one budget.
+    
+    Args:
+        budget: Dictionary with 'category' (None for an overall budget), 'period',
+            'limit', 'spent' and 'percent_used'
+        
+    Returns:
+        Panel Column with the label and the progress bar
+    """
+    name = budget.get('category') or "All spending"
+    percent_used = budget.get('percent_used', 0)
+    label = (f"**{name}** · {format_currency(budget.get('spent', 0))} of "
+             f"{format_currency(budget.get('limit', 0))} this {budget.get('period', 'month')} ({percent_used:.0f}%)")
+    
+    return pn.Column(
+        pn.pane.Markdown(label, margin=(0, 10)),
+        pn.indicators.Progress(
+            value=int(min(percent_used, 100)),
+            max=100,
+            bar_color=get_budget_bar_color(percent_used),
+            sizing_mode="stretch_width"
+        ),
+        sizing_mode="stretch_width"
+    )
+
+def create_alert_list(alerts: List[dict]) -> pn.Column:
+    """
+    Create the list of recently triggered budget alerts.
+    
+    Args:
+        alerts: Alert dictionaries from the API, newest first
+        
+    Returns:
+        Panel Column with one Alert pane per alert
+    """
+    items = []
+    for alert in alerts:
+        name = alert.get('category') or "All spending"
+        when = pd.Timestamp(alert['triggered_at']).strftime('%b %d, %H:%M') if alert.get('triggered_at') else ""
+        items.append(pn.pane.Alert(
+            f"**{name}** reached its {alert.get('period', 'month')}ly limit of {format_currency(alert.get('limit', 0))} "
+            f"({format_currency(alert.get('spent', 0))} spent) · {when}",
+            alert_type="danger",
+            margin=(2, 10)
+        ))
+    return pn.Column(*items, sizing_mode="stretch_width")
+
 # ============================================================================
 # MAIN ORCHESTRATION FUNCTIONS
 # ============================================================================
@@ -315,6 +464,7 @@ def create_metric_cards(metrics: dict) -> pn.Row:
     total_spend = metrics.get('total_spent', 0)
     avg_transaction = metrics.get('average_transaction', 0)
     top_categories = metrics.get('spending_by_category', {})
+    change = metrics.get('change') or {}
     
     # Ensure values are numeric
     try:
@@ -328,8 +478,8 @@ def create_metric_cards(metrics: dict) -> pn.Row:
         avg_transaction = 0.0
 
     # Create individual metric cards
-    total_spend_card = create_total_spend_card(total_spend)
-    avg_transaction_card = create_avg_transaction_card(avg_transaction)
+    total_spend_card = create_total_spend_card(total_spend, change.get('total_spent'))
+    avg_transaction_card = create_avg_transaction_card(avg_transaction, change.get('average_transaction'))
     top_categories_card = create_top_categories_card(top_categories)
 
     # Arrange cards in a responsive row with proper spacing
@@ -341,6 +491,19 @@ def create_metric_cards(metrics: dict) -> pn.Row:
         margin=(10, 5)
     )
 
+def create_metric_placeholders() -> pn.Row:
+    """
+    Creates a row of placeholders the size of the metric cards.
+
+    Returns:
+        A Panel Row with one loading placeholder per metric card.
+    """
+    return pn.Row(
+        *[create_loading_placeholder(name, height=110) for name in ("Total Spend", "Average Transaction", "Top Categories")],
+        sizing_mode="stretch_width",
+        margin=(10, 5)
+    )
+
 def create_charts_view(df: pd.DataFrame) -> pn.Column:
     """
     Creates a view containing several charts based on the transaction data.
@@ -377,6 +540,34 @@ def create_charts_view(df: pd.DataFrame) -> pn.Column:
     
     return charts_layout
 
+def create_budget_progress(budgets: List[dict], alerts: List[dict]) -> pn.Column:
+    """
+    Creates the budgets card: a progress bar per budget and the recent alerts.
+
+    Args:
+        budgets: Budget dictionaries from the API, with current-period spending.
+        alerts: Triggered alert dictionaries from the API, newest first.
+
+    Returns:
+        A Panel Column containing the budget progress.
+    """
+    if not budgets:
+        content = [pn.pane.Markdown("No budgets set. Create one with `POST /api/v1/budgets`.",
+                                    styles={'color': '#757575'})]
+    else:
+        content = [create_budget_bar(budget) for budget in budgets]
+        # Keep the card short; the API has the full history
+        if alerts:
+            content += [pn.pane.Markdown("**Recent alerts**", margin=(10, 10, 0, 10)), create_alert_list(alerts[:3])]
+
+    return pn.Column(
+        pn.pane.Markdown("### Budgets", margin=(0, 10)),
+        *content,
+        styles=get_card_style(),
+        sizing_mode="stretch_width",
+        margin=(10, 5)
+    )
+
 def create_filter_widgets(df: pd.DataFrame) -> dict:
     """
     Creates a dictionary of filter widgets based on the transaction data.
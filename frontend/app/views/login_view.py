@@ -1,3 +1,5 @@
+import asyncio
+
 import panel as pn
 import panel.widgets as pnw
 from panel.interact import interact, interactive, fixed, interact_manual
@@ -51,7 +53,7 @@ def create_login_view(on_login_success):
     alert_pane = pn.pane.Alert(alert_type="danger", visible=False)
 
     # 2. Define the Login Callback
-    def login_callback(event):
+    async def login_callback(event):
         """Handle the login button click event."""
         alert_pane.visible = False  # Hide alert on new attempt
         
@@ -65,8 +67,8 @@ def create_login_view(on_login_success):
             alert_pane.visible = True
             return
             
-        # Attempt to login via the API client
-        token = api_client.login(username, password)
+        # Attempt to login via the API client, on a worker thread so other sessions keep being served
+        token = await asyncio.to_thread(api_client.login, username, password)
         
         if token:
             # On success, execute the provided callback